@@ -1,4 +1,4 @@
-import React, { useState, useCallback, useEffect } from 'react';
+import React, { useState, useCallback, useEffect, useRef } from 'react';
 import { Text, View, Image, TouchableOpacity, ActivityIndicator, Alert, ScrollView, SafeAreaView, StatusBar, Modal, TextInput, FlatList } from 'react-native';
 import * as ImagePicker from 'expo-image-picker';
 import axios from 'axios';
@@ -14,6 +14,8 @@ export default function HomeScreen() {
   const { theme } = useTheme();
   const SERVER_IP = '192.168.1.108'; // Sunucu IP adresinizi buraya girin
   const API_URL = `http://${SERVER_IP}:8000`;
+  // Listede gösterilen alanlar; /loglar sadece bunları döndürür
+  const LOG_ALANLARI = 'yemek_adi,kalori,porsiyon,ogun,tur,aktivite_adi,sure_dk,tarih';
 
   const [dailyTarget, setDailyTarget] = useState(2200);
   const [waterTarget, setWaterTarget] = useState(2500);
@@ -26,6 +28,21 @@ export default function HomeScreen() {
   const [aiSelectedMeal, setAiSelectedMeal] = useState('Öğle Yemeği');
 
   const [logs, setLogs] = useState([]);
+  // Seçili günün logları (id -> log) ve son senkron token'ı; sonraki yenilemeler sadece değişenleri çeker
+  const logCache = useRef({ tarih: null, senkron: null, kayitlar: {} });
+
+  // Son yanıtlar ve ETag'leri (url -> { etag, data }); veri değişmediyse sunucu 304 döner
+  const etagCache = useRef({});
+  const getWithEtag = async (url) => {
+    const onceki = etagCache.current[url];
+    const res = await axios.get(url, {
+      headers: onceki ? { 'If-None-Match': onceki.etag } : {},
+      validateStatus: (status) => status === 200 || status === 304,
+    });
+    if (res.status === 304) return onceki.data;
+    if (res.headers.etag) etagCache.current[url] = { etag: res.headers.etag, data: res.data };
+    return res.data;
+  };
   const [totalCalories, setTotalCalories] = useState(0);
   const [totalBurnt, setTotalBurnt] = useState(0);
   const [totalProtein, setTotalProtein] = useState(0);
@@ -90,22 +107,40 @@ export default function HomeScreen() {
         if (data.hedef_kalori) { setDailyTarget(data.hedef_kalori); calculateMacroTargets(data.hedef_kalori); }
         if (data.su_hedefi) setWaterTarget(data.su_hedefi * 1000);
       }
-      const response = await axios.get(`${API_URL}/su-durumu/${user.uid}`);
-      if (response.data.success) setWaterIntake(response.data.toplam);
+      const su = await getWithEtag(`${API_URL}/su-durumu/${user.uid}`);
+      if (su.success) setWaterIntake(su.toplam);
     } catch (e) { console.log(e); }
   };
 
   const fetchLogs = async (dateStr) => {
     try {
-      const response = await axios.get(`${API_URL}/gunluk/${user.uid}?tarih=${dateStr}`);
-      if (response.data.success) {
-        setLogs(response.data.logs);
-        setTotalCalories(response.data.total_calories);
-        setTotalBurnt(response.data.total_burnt || 0);
-        setTotalProtein(response.data.total_protein || 0);
-        setTotalCarb(response.data.total_carb || 0);
-        setTotalFat(response.data.total_fat || 0);
+      const onceki = logCache.current;
+      const params = { tarih: dateStr, select: LOG_ALANLARI };
+      if (onceki.tarih === dateStr && onceki.senkron) params.since = onceki.senkron;
+
+      let response = await axios.get(`${API_URL}/loglar/${user.uid}`, { params });
+      if (!response.data.success) return;
+      const ilk = response.data;
+
+      // tam: gün baştan listelendi; değilse sadece eklenenler ve silinenler geldi
+      const kayitlar = ilk.tam ? {} : { ...onceki.kayitlar };
+      ilk.silinen.forEach(id => { delete kayitlar[id]; });
+      ilk.logs.forEach(log => { kayitlar[log.id] = log; });
+      let sonraki = ilk.sonraki;
+      while (sonraki) {
+        response = await axios.get(`${API_URL}/loglar/${user.uid}`, { params: { tarih: dateStr, select: LOG_ALANLARI, cursor: sonraki } });
+        if (!response.data.success) return;
+        response.data.logs.forEach(log => { kayitlar[log.id] = log; });
+        sonraki = response.data.sonraki;
       }
+
+      logCache.current = { tarih: dateStr, senkron: ilk.senkron, kayitlar };
+      setLogs(Object.values(kayitlar).sort((a, b) => b.tarih.localeCompare(a.tarih)));
+      setTotalCalories(ilk.total_calories);
+      setTotalBurnt(ilk.total_burnt || 0);
+      setTotalProtein(ilk.total_protein || 0);
+      setTotalCarb(ilk.total_carb || 0);
+      setTotalFat(ilk.total_fat || 0);
     } catch (error) { console.log(error); }
   };
 
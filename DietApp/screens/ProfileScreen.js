@@ -1,6 +1,7 @@
 import React, { useState, useCallback } from 'react';
 import { View, Text, StyleSheet, TouchableOpacity, ActivityIndicator, Alert, ScrollView, Modal, TextInput } from 'react-native';
 import { Ionicons } from '@expo/vector-icons';
+import axios from 'axios';
 import { auth, db } from '../firebaseConfig';
 import { doc, getDoc, updateDoc } from 'firebase/firestore';
 import { signOut } from 'firebase/auth';
@@ -9,6 +10,8 @@ import { useTheme } from '../ThemeContext';
 
 export default function ProfileScreen({ navigation }) {
   const { isDark, theme, toggleTheme } = useTheme();
+  const SERVER_IP = '192.168.1.108'; // Sunucu IP adresinizi buraya girin
+  const API_URL = `http://${SERVER_IP}:8000`;
   const [userData, setUserData] = useState(null);
   const [loading, setLoading] = useState(true);
 
@@ -49,6 +52,15 @@ export default function ProfileScreen({ navigation }) {
   };
 
 
+  // Sunucudaki profil önbelleğini temizle (kilo / kalori hedefi hemen kullanılsın)
+  const notifyProfileUpdated = async (uid) => {
+    try {
+      await axios.post(`${API_URL}/profil-guncellendi/${uid}`);
+    } catch (error) {
+      console.log("Profil önbelleği temizlenemedi:", error);
+    }
+  };
+
   const updateWeight = async () => {
     if (!newWeight) return;
     const kg = parseFloat(newWeight);
@@ -87,6 +99,7 @@ export default function ProfileScreen({ navigation }) {
         su_hedefi: newWaterTarget,
         hedef_kalori: tdee  // ✅ Kalori hedefini de güncelle!
       });
+      await notifyProfileUpdated(user.uid);
 
       Alert.alert("Güncellendi ✅", `Yeni kilon: ${kg}kg\nYeni kalori hedefin: ${tdee} kcal\nYeni su hedefin: ${newWaterTarget} Lt`);
       setModalVisible(false);
@@ -324,6 +337,7 @@ export default function ProfileScreen({ navigation }) {
                       activity_level: key,
                       hedef_kalori: tdee
                     });
+                    await notifyProfileUpdated(user.uid);
 
                     Alert.alert("✅ Güncellendi", `Yeni kalori hedefin: ${tdee} kcal`);
                     fetchUserData();
@@ -361,6 +375,7 @@ export default function ProfileScreen({ navigation }) {
                         await updateDoc(doc(db, "users", user.uid), {
                           hedef_kilo: newTarget
                         });
+                        await notifyProfileUpdated(user.uid);
                         Alert.alert("✅ Güncellendi", `Yeni hedef: ${newTarget}kg`);
                         fetchUserData();
                       } catch (error) {
@@ -1,4 +1,4 @@
-import React, { useState, useCallback } from 'react';
+import React, { useState, useCallback, useRef } from 'react';
 import { View, Text, StyleSheet, Dimensions, ActivityIndicator, ScrollView, RefreshControl } from 'react-native';
 import { LineChart, PieChart, ProgressChart } from 'react-native-chart-kit';
 import axios from 'axios';
@@ -19,6 +19,19 @@ export default function ReportScreen() {
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
 
+  // Son yanıtlar ve ETag'leri (url -> { etag, data }); veri değişmediyse sunucu 304 döner
+  const etagCache = useRef({});
+  const getWithEtag = async (url) => {
+    const onceki = etagCache.current[url];
+    const res = await axios.get(url, {
+      headers: onceki ? { 'If-None-Match': onceki.etag } : {},
+      validateStatus: (status) => status === 200 || status === 304,
+    });
+    if (res.status === 304) return onceki.data;
+    if (res.headers.etag) etagCache.current[url] = { etag: res.headers.etag, data: res.data };
+    return res.data;
+  };
+
   useFocusEffect(
     useCallback(() => {
       fetchAllData();
@@ -30,19 +43,22 @@ export default function ReportScreen() {
       const user = auth.currentUser;
       if (!user) return;
 
+      // Haftalık trend, makro dağılım ve hedef özeti tek istekte
+      const data = await getWithEtag(`${API_URL}/dashboard/${user.uid}`);
+      if (!data.success) return;
+      const { haftalik, makro, hedef_ozeti } = data;
+
       // Haftalık trend verisi
-      const weeklyRes = await axios.get(`${API_URL}/istatistik-haftalik/${user.uid}`);
-      if (weeklyRes.data.success) {
+      if (haftalik.success) {
         setWeeklyData({
-          labels: weeklyRes.data.labels,
-          datasets: [{ data: weeklyRes.data.data.map(d => d || 0) }] // 0 değerlerini göster
+          labels: haftalik.labels,
+          datasets: [{ data: haftalik.data.map(d => d || 0) }] // 0 değerlerini göster
         });
       }
 
       // Makro dağılım
-      const macroRes = await axios.get(`${API_URL}/makro-dagilim/${user.uid}`);
-      if (macroRes.data.success) {
-        const { protein, karbonhidrat, yag } = macroRes.data;
+      if (makro.success) {
+        const { protein, karbonhidrat, yag } = makro;
 
         // Pie chart için veri hazırla
         if (protein > 0 || karbonhidrat > 0 || yag > 0) {
@@ -73,9 +89,8 @@ export default function ReportScreen() {
       }
 
       // Hedef özeti
-      const goalRes = await axios.get(`${API_URL}/hedef-ozeti/${user.uid}`);
-      if (goalRes.data.success) {
-        setGoalData(goalRes.data);
+      if (hedef_ozeti.success) {
+        setGoalData(hedef_ozeti);
       }
 
     } catch (error) {
@@ -0,0 +1,309 @@
+"""
+API BENCHMARK'I
+
+main.app'i bellekteki veri deposu (DEPO=bellek, Firebase gerekmez) ve sahte ya da
+gerçek model ile yerel bir uvicorn sunucusunda başlatır, sentetik kullanıcı geçmişi
+yükler ve /predict, /kaydet, /gunluk, /ara-yemek, /istatistik, /dashboard karışımını
+verilen eşzamanlılık seviyelerinde çalıştırır.
+
+Her seviye için endpoint başına istek/sn, hata sayısı ve p50/p95/p99 gecikmeleri
+JSON olarak yazılır; --karsilastir ile önceki bir sonuçla (ör. başka bir commit)
+karşılaştırılır.
+
+Kullanım:
+    python api_benchmark.py
+    python api_benchmark.py --eszamanli 1,16,64 --sure 15 --cikti sonuc.json
+    python api_benchmark.py --karisim predict:1,gunluk:3 --model gercek
+    python api_benchmark.py --cikti yeni.json --karsilastir eski.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# main import edilmeden önce: Firebase yerine bellekteki depo, geri yazma kapalı
+os.environ["DEPO"] = "bellek"
+os.environ.pop("YAZMA_GUNLUGU_DOSYA", None)
+
+import httpx
+import numpy as np
+import uvicorn
+from PIL import Image
+
+from yuk_testi import yuzdelik
+
+VARSAYILAN_KARISIM = "predict:10,kaydet:15,gunluk:30,ara-yemek:25,istatistik:10,dashboard:10"
+ISTATISTIK_SECENEKLERI = [(7, "gun"), (30, "gun"), (30, "hafta"), (90, "hafta"), (365, "ay")]
+
+
+class SahteModel:
+    """Gerçek ViT yerine: batch boyutuyla artan sabit süre bekler, rastgele logit döndürür"""
+
+    def __init__(self, etiketler, ms):
+        self.config = SimpleNamespace(id2label=dict(enumerate(etiketler)))
+        self.ms = ms
+        self.rastgele = np.random.default_rng(0)
+
+    def __call__(self, pixel_values):
+        adet = len(pixel_values)
+        time.sleep(self.ms / 1000 * (1 + 0.25 * (adet - 1)))
+        return self.rastgele.normal(size=(adet, len(self.config.id2label))).astype(np.float32)
+
+
+def sahte_model_kur(main, ms):
+    """main'in model yükleme adımını sahte model ile değiştirir (torch/transformers gerekmez)"""
+    from on_isleme import HizliOnIsleyici
+
+    def yukle():
+        processor = SimpleNamespace(
+            size={"height": 224, "width": 224}, resample=2, do_rescale=True, rescale_factor=1 / 255,
+            do_normalize=True, image_mean=[0.5] * 3, image_std=[0.5] * 3,
+        )
+        main.on_isleyici = HizliOnIsleyici(processor, main.asama_zamanlayici)
+        main.processor, main.model = processor, SahteModel(sorted(main.food_database), ms)
+        main.model_durumu.update(durum="hazir", yukleme_sn=0)
+
+    main._model_yukle_ve_isit = yukle
+
+
+def resim_cesitleri(adet, tohum=0):
+    """test.jpg'den kırpma/kalite ile farklı baytlar (önbellek her isteği yakalamasın)"""
+    temel = Image.open("test.jpg").convert("RGB")
+    rastgele = random.Random(tohum)
+    cesitler = []
+    for _ in range(adet):
+        g, y = temel.size
+        kutu = (rastgele.randint(0, g // 8), rastgele.randint(0, y // 8), g - rastgele.randint(0, g // 8), y - rastgele.randint(0, y // 8))
+        tampon = io.BytesIO()
+        temel.crop(kutu).save(tampon, "JPEG", quality=rastgele.randint(70, 95))
+        cesitler.append(tampon.getvalue())
+    return cesitler
+
+
+async def veri_yukle(depo, yemekler, kullanici_sayisi, gun_sayisi, tohum=0):
+    """Kullanıcı başına profil + gün başına birkaç öğün ve su kaydı"""
+    rastgele = random.Random(tohum)
+    bugun = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    uidler = [f"bench_{i}" for i in range(kullanici_sayisi)]
+    for uid in uidler:
+        await depo.profil_kaydet(uid, {"kilo": rastgele.randint(55, 100), "tdee": rastgele.randint(1800, 2800)})
+        loglar, sular = [], []
+        for gun in range(gun_sayisi):
+            tarih = bugun - timedelta(days=gun)
+            for _ in range(rastgele.randint(2, 6)):
+                yemek = yemekler[rastgele.choice(list(yemekler))]
+                loglar.append({
+                    "yemek_adi": yemek["isim"], "kalori": yemek["kalori"], "protein": yemek["protein"],
+                    "karbonhidrat": yemek["karbonhidrat"], "yag": yemek["yag"], "porsiyon": yemek["birim"],
+                    "kullanici_id": uid, "tarih": tarih, "tur": "yemek", "ogun": "Öğle",
+                })
+            sular += [{"kullanici_id": uid, "miktar": 200, "tarih": tarih}] * rastgele.randint(2, 8)
+        await depo.loglari_toplu_ekle(loglar)
+        await depo.su_toplu_ekle(sular)
+    return uidler
+
+
+def istek_olustur(ad, rastgele, uidler, yemekler, resimler):
+    """(method, yol, httpx argümanları)"""
+    uid = rastgele.choice(uidler)
+    if ad == "predict":
+        return "POST", "/predict", {"files": {"file": ("yemek.jpg", rastgele.choice(resimler), "image/jpeg")}}
+    if ad == "kaydet":
+        yemek = yemekler[rastgele.choice(list(yemekler))]
+        return "POST", "/kaydet", {"json": {
+            "yemek_adi": yemek["isim"], "kalori": yemek["kalori"], "protein": yemek["protein"],
+            "karbonhidrat": yemek["karbonhidrat"], "yag": yemek["yag"], "porsiyon": yemek["birim"],
+            "kullanici_id": uid,
+        }}
+    if ad == "gunluk":
+        return "GET", f"/gunluk/{uid}", {}
+    if ad == "ara-yemek":
+        isim = yemekler[rastgele.choice(list(yemekler))]["isim"]
+        return "GET", "/ara-yemek", {"params": {"q": isim[:rastgele.randint(2, 6)]}}
+    if ad == "istatistik":
+        pencere, aralik = rastgele.choice(ISTATISTIK_SECENEKLERI)
+        return "GET", f"/istatistik/{uid}", {"params": {"pencere": pencere, "aralik": aralik}}
+    if ad == "dashboard":
+        return "GET", f"/dashboard/{uid}", {}
+    raise ValueError(f"Bilinmeyen endpoint: {ad}")
+
+
+async def seviye_calistir(istemci, karisim, eszamanli, sure, uidler, yemekler, resimler, tohum):
+    """sure saniye boyunca eszamanli istemci; endpoint -> {"sureler", "hata", "reddedilen"}"""
+    adlar, agirliklar = zip(*karisim.items())
+    olcumler = defaultdict(lambda: {"sureler": [], "hata": 0, "reddedilen": 0})
+    bitis = time.perf_counter() + sure
+
+    async def dongu(no):
+        rastgele = random.Random(tohum * 1000 + no)
+        while time.perf_counter() < bitis:
+            ad = rastgele.choices(adlar, agirliklar)[0]
+            method, yol, argumanlar = istek_olustur(ad, rastgele, uidler, yemekler, resimler)
+            olcum = olcumler[ad]
+            baslangic = time.perf_counter()
+            try:
+                yanit = await istemci.request(method, yol, **argumanlar)
+                if yanit.status_code == 503:
+                    olcum["reddedilen"] += 1
+                elif yanit.status_code != 200 or yanit.json().get("success") is False:
+                    olcum["hata"] += 1
+            except httpx.HTTPError:
+                olcum["hata"] += 1
+            olcum["sureler"].append(time.perf_counter() - baslangic)
+
+    await asyncio.gather(*(dongu(no) for no in range(eszamanli)))
+    return olcumler
+
+
+def ozetle(olcumler, sure):
+    endpointler = {}
+    for ad, olcum in sorted(olcumler.items()):
+        sirali = sorted(olcum["sureler"])
+        endpointler[ad] = {
+            "adet": len(sirali),
+            "istek_sn": round(len(sirali) / sure, 1),
+            "hata": olcum["hata"],
+            "reddedilen": olcum["reddedilen"],
+            "ort_ms": round(sum(sirali) / len(sirali) * 1000, 2) if sirali else 0,
+            "p50_ms": round(yuzdelik(sirali, 0.50) * 1000, 2),
+            "p95_ms": round(yuzdelik(sirali, 0.95) * 1000, 2),
+            "p99_ms": round(yuzdelik(sirali, 0.99) * 1000, 2),
+        }
+    return endpointler
+
+
+def bos_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def sunucu_baslat(app, port):
+    sunucu = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", loop="asyncio"))
+    thread = threading.Thread(target=sunucu.run, name="benchmark-sunucu", daemon=True)
+    thread.start()
+    while not sunucu.started:
+        time.sleep(0.05)
+    return sunucu, thread
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def karsilastir(onceki, simdiki):
+    """Aynı eşzamanlılık seviyelerinde endpoint başına p95 ve istek/sn farkı"""
+    print(f"\n📊 Karşılaştırma: {onceki['meta'].get('commit')} -> {simdiki['meta'].get('commit')}")
+    eski_seviyeler = {s["eszamanli"]: s for s in onceki["seviyeler"]}
+    for seviye in simdiki["seviyeler"]:
+        eski = eski_seviyeler.get(seviye["eszamanli"])
+        if not eski:
+            continue
+        print(f"  eşzamanlı={seviye['eszamanli']}")
+        for ad, yeni in seviye["endpointler"].items():
+            e = eski["endpointler"].get(ad)
+            if not e or not e["p95_ms"] or not e["istek_sn"]:
+                continue
+            p95 = (yeni["p95_ms"] - e["p95_ms"]) / e["p95_ms"] * 100
+            hiz = (yeni["istek_sn"] - e["istek_sn"]) / e["istek_sn"] * 100
+            print(f"    {ad:<12} p95 {e['p95_ms']:>8.1f} -> {yeni['p95_ms']:>8.1f} ms ({p95:+.0f}%)   "
+                  f"istek/sn {e['istek_sn']:>7.1f} -> {yeni['istek_sn']:>7.1f} ({hiz:+.0f}%)")
+
+
+async def yuk_calistir(args, port, uidler, yemekler, resimler):
+    karisim = {ad: float(agirlik) for ad, agirlik in (p.split(":") for p in args.karisim.split(","))}
+    seviyeler = [int(x) for x in args.eszamanli.split(",")]
+    limitler = httpx.Limits(max_connections=max(seviyeler), max_keepalive_connections=max(seviyeler))
+    sonuc = []
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limitler, timeout=60) as istemci:
+        # Isınma (bağlantılar, önbellekler, ilk forward)
+        await seviye_calistir(istemci, karisim, 4, 1, uidler, yemekler, resimler, tohum=999)
+
+        for eszamanli in seviyeler:
+            olcumler = await seviye_calistir(istemci, karisim, eszamanli, args.sure, uidler, yemekler, resimler, args.tohum)
+            endpointler = ozetle(olcumler, args.sure)
+            toplam = sum(e["adet"] for e in endpointler.values())
+            sonuc.append({"eszamanli": eszamanli, "sure_sn": args.sure, "toplam_istek": toplam,
+                          "istek_sn": round(toplam / args.sure, 1), "endpointler": endpointler})
+
+            print(f"\n⚡ eşzamanlı={eszamanli}: {toplam / args.sure:.1f} istek/sn")
+            print(f"  {'endpoint':<12} {'istek/sn':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'hata':>6} {'503':>6}")
+            for ad, e in endpointler.items():
+                print(f"  {ad:<12} {e['istek_sn']:>9.1f} {e['p50_ms']:>9.1f} {e['p95_ms']:>9.1f} {e['p99_ms']:>9.1f} {e['hata']:>6} {e['reddedilen']:>6}")
+    return sonuc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI servisi için uçtan uca benchmark")
+    parser.add_argument("--eszamanli", default="1,8,32,64", help="Virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--sure", type=float, default=10, help="Her seviyenin süresi (sn)")
+    parser.add_argument("--karisim", default=VARSAYILAN_KARISIM, help="endpoint:ağırlık listesi")
+    parser.add_argument("--model", choices=["sahte", "gercek"], default="sahte", help="Sahte model veya yeni_model")
+    parser.add_argument("--model-ms", type=float, default=40, help="Sahte modelin tek resimlik forward süresi")
+    parser.add_argument("--kullanici", type=int, default=20, help="Sentetik kullanıcı sayısı")
+    parser.add_argument("--gun", type=int, default=120, help="Kullanıcı başına geçmiş gün sayısı")
+    parser.add_argument("--resim-cesidi", type=int, default=64, help="Farklı test resmi sayısı")
+    parser.add_argument("--tohum", type=int, default=42, help="Rastgelelik tohumu (tekrarlanabilirlik)")
+    parser.add_argument("--cikti", default="benchmark_sonuc.json", help="JSON sonuç dosyası")
+    parser.add_argument("--karsilastir", help="Karşılaştırılacak önceki JSON sonuç dosyası")
+    args = parser.parse_args()
+
+    import main as api
+
+    if args.model == "sahte":
+        sahte_model_kur(api, args.model_ms)
+
+    print(f"🌱 {args.kullanici} kullanıcı x {args.gun} gün veri yükleniyor...")
+    uidler = asyncio.run(veri_yukle(api.depo, api.food_database, args.kullanici, args.gun, args.tohum))
+    resimler = resim_cesitleri(args.resim_cesidi, args.tohum)
+
+    port = bos_port()
+    sunucu, thread = sunucu_baslat(api.app, port)
+    try:
+        while api.model_durumu["durum"] not in ("hazir", "hata"):
+            time.sleep(0.2)
+        seviyeler = asyncio.run(yuk_calistir(args, port, uidler, api.food_database, resimler))
+    finally:
+        sunucu.should_exit = True
+        thread.join(timeout=10)
+
+    sonuc = {
+        "meta": {
+            "commit": git_commit(),
+            "tarih": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu": os.cpu_count(),
+            "depo": api.depo.ad,
+            "model": args.model if args.model == "sahte" else api.MODEL_BACKEND,
+            "model_durumu": api.model_durumu["durum"],
+            "ayarlar": vars(args),
+        },
+        "seviyeler": seviyeler,
+    }
+    with open(args.cikti, "w", encoding="utf-8") as f:
+        json.dump(sonuc, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Sonuçlar: {args.cikti}")
+
+    if args.karsilastir:
+        with open(args.karsilastir, "r", encoding="utf-8") as f:
+            karsilastir(json.load(f), sonuc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+ARAMA BENCHMARK'I
+
+Sentetik büyük bir yemek kataloğu üzerinde eski doğrusal taramayı (her istekte
+her isim için .lower()) AramaIndeksi ile karşılaştırır.
+
+Kullanım:
+    python arama_benchmark.py --adet 300000
+"""
+import argparse
+import json
+import random
+import time
+
+from arama_indeksi import AramaIndeksi
+
+EKLER = ["Ev Usulü", "Kaşarlı", "Acılı", "Fırında", "Izgara", "Tavuklu", "Etli", "Sebzeli",
+         "Peynirli", "Yoğurtlu", "Bol Soslu", "Diyet", "Mini", "Büyük Boy", "Tam Buğday"]
+
+SORGULAR = ["k", "ke", "keb", "kebap", "iskender", "İSKENDER", "karnıyarık", "çorba",
+            "tavuk d", "pizza peynirli", "ebap", "lahmacun acılı", "zzzz"]
+BULANIK_SORGULAR = ["iskendr", "lahmcun", "karnyarik", "karniyarik", "mercmek corbasi", "hamburgr peynrli"]
+
+
+def sentetik_katalog(adet, tohum=42):
+    with open("foods.json", "r", encoding="utf-8") as f:
+        temel = json.load(f)
+    rastgele = random.Random(tohum)
+    katalog = {}
+    anahtarlar = list(temel)
+    for i in range(adet):
+        anahtar = rastgele.choice(anahtarlar)
+        ekler = rastgele.sample(EKLER, rastgele.randint(0, 2))
+        katalog[f"{anahtar}_{i}"] = {**temel[anahtar], "isim": " ".join([temel[anahtar]["isim"], *ekler, str(i)])}
+    return katalog
+
+
+def dogrusal_ara(katalog, q, limit=20):
+    """main.py'deki eski ara_yemek davranışı"""
+    sonuclar = []
+    query = q.lower()
+    for yemek_id, yemek in katalog.items():
+        if query in yemek["isim"].lower():
+            sonuclar.append(yemek_id)
+    return sonuclar[:limit]
+
+
+def olc(fonksiyon, tekrar):
+    baslangic = time.perf_counter()
+    for _ in range(tekrar):
+        fonksiyon()
+    return (time.perf_counter() - baslangic) * 1e6 / tekrar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arama indeksi benchmark'ı")
+    parser.add_argument("--adet", type=int, default=300000, help="Sentetik katalog boyutu")
+    parser.add_argument("--tekrar", type=int, default=200, help="İndeks için sorgu tekrarı")
+    args = parser.parse_args()
+
+    katalog = sentetik_katalog(args.adet)
+    print(f"📚 {len(katalog)} kayıtlık katalog")
+
+    baslangic = time.perf_counter()
+    indeks = AramaIndeksi(katalog)
+    print(f"🔨 İndeks kurulumu: {time.perf_counter() - baslangic:.2f} sn\n")
+
+    print(f"{'sorgu':<18}{'doğrusal (µs)':>16}{'indeks (µs)':>14}{'hızlanma':>11}{'sonuç':>8}")
+    for q in SORGULAR:
+        eski = olc(lambda: dogrusal_ara(katalog, q), 3)
+        yeni = olc(lambda: indeks.ara(q), args.tekrar)
+        print(f"{q:<18}{eski:>16.0f}{yeni:>14.1f}{eski / yeni:>10.0f}x{len(indeks.ara(q)):>8}")
+
+    print(f"\n{'bulanık sorgu':<18}{'süre (µs)':>14}{'sonuç':>8}  ilk eşleşme")
+    for q in BULANIK_SORGULAR:
+        sure = olc(lambda: indeks.ara_skorlu(q), 20)
+        sonuclar, _ = indeks.ara_skorlu(q)
+        ilk = f"{katalog[sonuclar[0][0]]['isim']} ({sonuclar[0][2]})" if sonuclar else "-"
+        print(f"{q:<18}{sure:>14.0f}{len(sonuclar):>8}  {ilk}")
+
+
+if __name__ == "__main__":
+    main()
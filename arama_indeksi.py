@@ -0,0 +1,259 @@
+"""
+YEMEK / EGZERSİZ ARAMA İNDEKSİ
+
+Katalog yüklenirken bir kez kurulur; her tuş vuruşunda tüm kayıtları taramak yerine
+ters indeksten (isim ön ekleri, kelime ön ekleri, trigramlar) aday bulunur.
+
+Normalizasyon Türkçe'ye duyarlıdır: "İ" -> "i", "I" -> "ı" ile küçültülür; "iskender" ve
+"İSKENDER" sorguları "İskender Kebap" ile birebir eşleşir. Aksanlar (ı/ş/ğ/ü/ö/ç ->
+i/s/g/u/o/c) sadece bulanık kademede katlanır: "karniyarik" sorgusu "Karnıyarık"ı bulanık
+eşleşme olarak bulur, "ş" ise "Sushi" ile tam eşleşmez.
+
+Kayıtlar kurulumda (isim uzunluğu, isim) sırasına dizilir ve posting listeleri bu
+sırada tutulur. Sonuçlar kademelerle toplanır, her kademe limit dolunca durur:
+  1. İsim sorgu ile başlıyor (tam eşleşme en kısa olduğu için en başta gelir)
+  2. Sorgudaki tüm kelimeler isimde birebir geçiyor
+  3. Sorgudaki tüm kelimeler isimdeki kelimelerin ön eki
+  4. Sorgu ismin herhangi bir yerinde geçiyor (eski alt dize davranışı, en az 3 harf)
+
+Yazım hatalı sorgular ("iskendr", "lahmcun") için bulanık arama kelime sözlüğü
+üzerinde çalışır: sorgu kelimesiyle trigram paylaşan sözlük kelimeleri bulunur,
+sınırlı Levenshtein mesafesi ile süzülür ve kayıtlar benzerlik skoruna göre
+sıralanır. Her sorgunun sabit bir süre bütçesi vardır; bütçe dolarsa o ana kadar
+bulunan sonuçlar döner.
+"""
+import re
+import time
+from array import array
+from collections import defaultdict
+
+MAX_ONEK = 10  # Bundan uzun ön ekler indekslenmez, aday doğrulama ile kontrol edilir
+
+_KUCUK_HARF = str.maketrans({"İ": "i", "I": "ı"})
+_AKSAN_KATLA = str.maketrans("ışğüöçâîû", "isguocaiu")
+_KELIME = re.compile(r"[^\W_]+")
+
+
+def normalize(metin):
+    """Türkçe küçük harf"""
+    return metin.translate(_KUCUK_HARF).lower()
+
+
+def katla(metin):
+    """Normalize edilmiş metinde aksan katlama (bulanık arama için)"""
+    return metin.translate(_AKSAN_KATLA)
+
+
+def kelimeler(metin):
+    return _KELIME.findall(normalize(metin))
+
+
+def trigramlar(metin):
+    return {metin[i:i + 3] for i in range(len(metin) - 2)}
+
+
+def _posta():
+    return array("I")
+
+
+def _kelime_trigramlari(kelime):
+    # Baş/son işaretli trigramlar kısa kelimelerin de eşleşmesini sağlar
+    return trigramlar(f"${kelime}$")
+
+
+def _izin_verilen_mesafe(uzunluk):
+    if uzunluk <= 3:
+        return 0
+    if uzunluk <= 5:
+        return 1
+    if uzunluk <= 9:
+        return 2
+    return 3
+
+
+def levenshtein(a, b, sinir):
+    """a ile b arasındaki düzenleme mesafesi; sınırı aşarsa sinir + 1 döner"""
+    if abs(len(a) - len(b)) > sinir:
+        return sinir + 1
+    onceki = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        simdiki = [i]
+        for j, cb in enumerate(b, 1):
+            simdiki.append(min(onceki[j] + 1, simdiki[j - 1] + 1, onceki[j - 1] + (ca != cb)))
+        if min(simdiki) > sinir:
+            return sinir + 1
+        onceki = simdiki
+    return onceki[-1]
+
+
+class AramaIndeksi:
+    def __init__(self, katalog, alanlar=("isim",), anahtar_dahil=False):
+        # katalog: {id: {"isim": ..., ...}}; anahtar_dahil ise id ("iskender_kebap") de aranır
+        self.katalog = katalog
+
+        metinler = {}
+        for kayit_id, kayit in katalog.items():
+            parcalar = [str(kayit.get(alan, "")) for alan in alanlar]
+            if anahtar_dahil:
+                parcalar.append(kayit_id.replace("_", " "))
+            metinler[kayit_id] = " ".join(" ".join(kelimeler(p)) for p in parcalar)
+
+        # Sıra numarası = (uzunluk, isim) sırasındaki konum; posting'ler bu sırada dolar
+        self.idler = sorted(metinler, key=lambda k: (len(metinler[k]), metinler[k]))
+        self.metinler = [metinler[k] for k in self.idler]
+        self.kelime_listeleri = [tuple(m.split()) for m in self.metinler]
+
+        self.isim_onek_postalari = defaultdict(_posta)
+        self.onek_postalari = defaultdict(_posta)
+        self.kelime_postalari = defaultdict(_posta)
+        self.trigram_postalari = defaultdict(_posta)
+
+        for sira, (metin, kelime_listesi) in enumerate(zip(self.metinler, self.kelime_listeleri)):
+            for i in range(1, min(len(metin), MAX_ONEK) + 1):
+                self.isim_onek_postalari[metin[:i]].append(sira)
+
+            onekler = set()
+            for kelime in set(kelime_listesi):
+                self.kelime_postalari[kelime].append(sira)
+                onekler.update(kelime[:i] for i in range(1, min(len(kelime), MAX_ONEK) + 1))
+            for onek in onekler:
+                self.onek_postalari[onek].append(sira)
+
+            for tri in trigramlar(metin):
+                self.trigram_postalari[tri].append(sira)
+
+        # Bulanık arama için aksanları katlanmış kelime sözlüğü ve sözlük trigramları
+        self.katli_postalari = defaultdict(_posta)
+        for sira, kelime_listesi in enumerate(self.kelime_listeleri):
+            for kelime in {katla(k) for k in kelime_listesi}:
+                self.katli_postalari[kelime].append(sira)
+        self.sozluk = sorted(self.katli_postalari)
+        self.sozluk_trigramlari = defaultdict(_posta)
+        for no, kelime in enumerate(self.sozluk):
+            for tri in _kelime_trigramlari(kelime):
+                self.sozluk_trigramlari[tri].append(no)
+
+    def __len__(self):
+        return len(self.idler)
+
+    @staticmethod
+    def _onekleri_var(kelime_listesi, sorgu_kelimeleri):
+        return all(any(k.startswith(q) for k in kelime_listesi) for q in sorgu_kelimeleri)
+
+    def _topla(self, posta, kosul, secilen, limit):
+        """Posting'i sıra düzeninde gezer, koşulu sağlayanları limit dolana kadar ekler"""
+        for sira in posta:
+            if len(secilen) >= limit:
+                return
+            if sira not in secilen and kosul(sira):
+                secilen[sira] = None
+
+    def ara(self, sorgu, limit=20):
+        """Eşleşen kayıt id'lerini sıralı döndürür"""
+        sorgu_kelimeleri = kelimeler(sorgu)
+        if not sorgu_kelimeleri or limit <= 0:
+            return []
+        sorgu = " ".join(sorgu_kelimeleri)
+        secilen = {}  # sıralı küme
+
+        # 1. İsim sorgu ile başlıyor
+        self._topla(
+            self.isim_onek_postalari.get(sorgu[:MAX_ONEK], ()),
+            lambda s: self.metinler[s].startswith(sorgu),
+            secilen, limit,
+        )
+
+        # 2. Tüm kelimeler birebir geçiyor (en seyrek kelimenin posting'i gezilir)
+        postalar = [self.kelime_postalari.get(q, ()) for q in sorgu_kelimeleri]
+        self._topla(
+            min(postalar, key=len),
+            lambda s: all(q in self.kelime_listeleri[s] for q in sorgu_kelimeleri),
+            secilen, limit,
+        )
+
+        # 3. Tüm kelimeler bir kelimenin ön eki
+        postalar = [self.onek_postalari.get(q[:MAX_ONEK], ()) for q in sorgu_kelimeleri]
+        self._topla(
+            min(postalar, key=len),
+            lambda s: self._onekleri_var(self.kelime_listeleri[s], sorgu_kelimeleri),
+            secilen, limit,
+        )
+
+        # 4. Kelime ortasında alt dize (en seyrek trigramın posting'i gezilir)
+        if len(sorgu) >= 3:
+            postalar = [self.trigram_postalari.get(t, ()) for t in trigramlar(sorgu)]
+            self._topla(min(postalar, key=len), lambda s: sorgu in self.metinler[s], secilen, limit)
+
+        return [self.idler[s] for s in secilen]
+
+    def _benzer_kelimeler(self, sorgu_kelimesi, son_zaman, aday_sayisi=50):
+        """Sorgu kelimesine benzeyen sözlük kelimeleri: {kelime: benzerlik (0-1)}"""
+        ortak = defaultdict(int)
+        for tri in _kelime_trigramlari(sorgu_kelimesi):
+            for no in self.sozluk_trigramlari.get(tri, ()):
+                ortak[no] += 1
+
+        sinir = _izin_verilen_mesafe(len(sorgu_kelimesi))
+        benzerler = {}
+        for no in sorted(ortak, key=ortak.get, reverse=True)[:aday_sayisi]:
+            if time.perf_counter() > son_zaman:
+                break
+            kelime = self.sozluk[no]
+            # Yazılmakta olan kelime için ön ek ile de karşılaştır ("lahmc" -> "lahmacun")
+            mesafe = min(
+                levenshtein(sorgu_kelimesi, kelime, sinir),
+                levenshtein(sorgu_kelimesi, kelime[:len(sorgu_kelimesi)], sinir) + 0.5,
+            )
+            if mesafe <= sinir:
+                benzerler[kelime] = 1 - mesafe / max(len(sorgu_kelimesi), len(kelime))
+        return benzerler
+
+    def bulanik_ara(self, sorgu, limit=20, butce_ms=5):
+        """Yazım hatalarına ve aksansız yazıma toleranslı arama: ([(id, skor), ...], zaman_asimi)"""
+        sorgu_kelimeleri = [katla(q) for q in kelimeler(sorgu)]
+        if not sorgu_kelimeleri or limit <= 0:
+            return [], False
+        son_zaman = time.perf_counter() + butce_ms / 1000
+
+        # Her sorgu kelimesi için kayıt -> en iyi kelime benzerliği
+        kayit_skorlari = None
+        for q in sorgu_kelimeleri:
+            skorlar = {}
+            benzerler = self._benzer_kelimeler(q, son_zaman)
+            # En benzer kelimeler önce işlenir, bütçe dolarsa kalanlar atlanır
+            for kelime in sorted(benzerler, key=benzerler.get, reverse=True):
+                if skorlar and time.perf_counter() > son_zaman:
+                    break
+                benzerlik = benzerler[kelime]
+                for sira in self.katli_postalari[kelime]:
+                    if benzerlik > skorlar.get(sira, 0):
+                        skorlar[sira] = benzerlik
+            if kayit_skorlari is None:
+                kayit_skorlari = skorlar
+            else:
+                # Tüm sorgu kelimeleri eşleşmeli (VE)
+                kayit_skorlari = {s: kayit_skorlari[s] + skorlar[s] for s in kayit_skorlari if s in skorlar}
+            if not kayit_skorlari or time.perf_counter() > son_zaman:
+                break
+
+        zaman_asimi = time.perf_counter() > son_zaman
+        if not kayit_skorlari:
+            return [], zaman_asimi
+
+        # Yüksek skor önce, eşitlikte kısa isim (sıra numarası) önce
+        en_iyiler = sorted(kayit_skorlari.items(), key=lambda x: (-x[1], x[0]))[:limit]
+        return [(self.idler[s], round(skor / len(sorgu_kelimeleri), 3)) for s, skor in en_iyiler], zaman_asimi
+
+    def ara_skorlu(self, sorgu, limit=20, butce_ms=5):
+        """Önce birebir/ön ek eşleşmeleri, limit dolmadıysa bulanık eşleşmeler.
+        Dönüş: ([(id, "tam" | "bulanik", skor), ...], zaman_asimi)"""
+        sonuclar = [(kayit_id, "tam", 1.0) for kayit_id in self.ara(sorgu, limit)]
+        if len(sonuclar) >= limit:
+            return sonuclar, False
+
+        bulunan = {kayit_id for kayit_id, _, _ in sonuclar}
+        bulaniklar, zaman_asimi = self.bulanik_ara(sorgu, limit, butce_ms)
+        for kayit_id, skor in bulaniklar:
+            if kayit_id not in bulunan and len(sonuclar) < limit:
+                sonuclar.append((kayit_id, "bulanik", skor))
+        return sonuclar, zaman_asimi
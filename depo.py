@@ -0,0 +1,452 @@
+"""
+VERİ DEPOSU (REPOSITORY) KATMANI
+
+Endpoint'ler Firestore'a doğrudan değil bu arayüz üzerinden erişir. DEPO ortam
+değişkeni ile seçilir:
+- firestore : Firebase Admin SDK (async istemci), varsayılan
+- sqlite    : Gömülü SQLite dosyası (SQLITE_DOSYA, WAL modu); tek sunuculu kurulumlar için
+- bellek    : Bellekte SQLite (:memory:); çevrimdışı geliştirme ve tekrarlanabilir yük testi
+
+Tüm backend'ler aynı veriyi aynı biçimde döndürür: loglar (id, veri) çiftleri ve
+`tarih` datetime olarak, özetler gunluk_ozet.bos_ozet() alanlarıyla. SQLite'ta
+günlük/aylık özetler ve su sayaçları log ile aynı SQL transaction'ında güncellenir;
+sorgular event loop'u bloklamamak için deponun tek işçili thread'inde çalışır.
+"""
+import asyncio
+import functools
+import json
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+import gunluk_ozet
+import istatistik
+import su_sayaci
+from gunluk_ozet import OZET_ALANLARI, SILINEN_KOLEKSIYONU, SILINEN_SAKLAMA_GUN, bos_ozet, log_katkisi
+
+DEPOLAR = ("firestore", "sqlite", "bellek")
+
+_OZET_SUTUNLARI = OZET_ALANLARI + ("kayit_sayisi",)
+
+
+class FirestoreDeposu:
+    """Mevcut Firestore modüllerine (gunluk_ozet, su_sayaci, istatistik) yönlendirir"""
+
+    ad = "firestore"
+
+    def __init__(self, db):
+        self.db = db
+
+    async def profil_getir(self, uid):
+        doc = await self.db.collection("users").document(uid).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def profil_kaydet(self, uid, profil):
+        await self.db.collection("users").document(uid).set(profil)
+
+    async def log_ekle(self, veri):
+        return await gunluk_ozet.log_ekle(self.db, veri)
+
+    async def loglari_toplu_ekle(self, veriler, idler=None):
+        return await gunluk_ozet.loglari_toplu_ekle(self.db, veriler, idler)
+
+    async def log_sil(self, doc_id):
+        return await gunluk_ozet.log_sil(self.db, doc_id)
+
+    async def gun_loglari(self, uid, baslangic, bitis, azalan=False):
+        """[baslangic, bitis) aralığındaki loglar: [(id, veri)]"""
+        sorgu = self.db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih", ">=", baslangic).where("tarih", "<", bitis)
+        if azalan:
+            sorgu = sorgu.order_by("tarih", direction=firestore.Query.DESCENDING)
+        return [(doc.id, doc.to_dict()) async for doc in sorgu.stream()]
+
+    async def log_sayfasi(self, uid, baslangic, bitis, alanlar=None, limit=50, imlec=None):
+        """[baslangic, bitis) aralığında tarihe göre azalan en fazla limit log: ([(id, veri)], sonraki imleç).
+        imleç (tarih, id) çiftidir; alanlar verilirse sadece o alanlar (ve tarih) okunur."""
+        sorgu = (
+            self.db.collection("yemek_gunlugu").where("kullanici_id", "==", uid)
+            .where("tarih", ">=", baslangic).where("tarih", "<", bitis)
+            .order_by("tarih", direction=firestore.Query.DESCENDING)
+            .order_by(FieldPath.document_id(), direction=firestore.Query.DESCENDING)
+        )
+        if alanlar:
+            sorgu = sorgu.select(sorted({*alanlar, "tarih"}))
+        if imlec:
+            sorgu = sorgu.start_after({"tarih": imlec[0], FieldPath.document_id(): imlec[1]})
+        # Bir fazlası okunarak sonraki sayfa olup olmadığı anlaşılır
+        loglar = [(doc.id, doc.to_dict()) async for doc in sorgu.limit(limit + 1).stream()]
+        sonraki = (loglar[limit - 1][1]["tarih"], loglar[limit - 1][0]) if len(loglar) > limit else None
+        return loglar[:limit], sonraki
+
+    async def log_degisiklikleri(self, uid, tarih_str, sonra, alanlar=None):
+        """Günün sonra'dan sonra yazılan logları ve silinen log id'leri: ([(id, veri)], [id])"""
+        sorgu = self.db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih_str", "==", tarih_str).where("guncelleme", ">", sonra)
+        if alanlar:
+            sorgu = sorgu.select(sorted({*alanlar, "tarih"}))
+        # Silinme kayıtlarından sadece id'ler okunur
+        silinen = self.db.collection(SILINEN_KOLEKSIYONU).where("kullanici_id", "==", uid).where("tarih_str", "==", tarih_str).where("silinme", ">", sonra).select([])
+
+        async def listele(q, donustur):
+            return [donustur(doc) async for doc in q.stream()]
+
+        return await asyncio.gather(
+            listele(sorgu, lambda doc: (doc.id, doc.to_dict())),
+            listele(silinen, lambda doc: doc.id),
+        )
+
+    async def ozet_getir(self, uid, tarih_str):
+        return await gunluk_ozet.ozet_getir(self.db, uid, tarih_str)
+
+    async def gunluk_ozetler(self, uid, baslangic, bitis):
+        return await istatistik.gunluk_ozetler(self.db, uid, baslangic, bitis)
+
+    async def aylik_ozetler(self, uid, ilk_ay, son_ay):
+        return await istatistik.aylik_ozetler(self.db, uid, ilk_ay, son_ay)
+
+    async def su_toplu_ekle(self, kayitlar):
+        await su_sayaci.su_toplu_ekle(self.db, kayitlar)
+
+    async def su_getir(self, uid, tarih_str):
+        return await su_sayaci.su_getir(self.db, uid, tarih_str)
+
+    async def su_araligi(self, uid, baslangic, bitis):
+        return await su_sayaci.su_araligi(self.db, uid, baslangic, bitis)
+
+    async def su_sayfasi(self, uid, baslangic, bitis, limit=500, imlec=None):
+        """su_takibi olayları, log_sayfasi ile aynı sıralama ve imleçle"""
+        sorgu = (
+            self.db.collection("su_takibi").where("kullanici_id", "==", uid)
+            .where("tarih", ">=", baslangic).where("tarih", "<", bitis)
+            .order_by("tarih", direction=firestore.Query.DESCENDING)
+            .order_by(FieldPath.document_id(), direction=firestore.Query.DESCENDING)
+        )
+        if imlec:
+            sorgu = sorgu.start_after({"tarih": imlec[0], FieldPath.document_id(): imlec[1]})
+        kayitlar = [(doc.id, doc.to_dict()) async for doc in sorgu.limit(limit + 1).stream()]
+        sonraki = (kayitlar[limit - 1][1]["tarih"], kayitlar[limit - 1][0]) if len(kayitlar) > limit else None
+        return kayitlar[:limit], sonraki
+
+    async def var_olan_idler(self, log_idleri, su_idleri):
+        """Dokümanı zaten oluşmuş log / su kaydı id'leri (geri yazmalı günlük tekrarı için)"""
+        refler = [self.db.collection("yemek_gunlugu").document(i) for i in log_idleri]
+        refler += [self.db.collection("su_takibi").document(i) for i in su_idleri]
+        if not refler:
+            return set()
+        return {doc.id async for doc in self.db.get_all(refler) if doc.exists}
+
+
+def _zaman(tarih):
+    """SQLite'ta sıralanabilir metin; Firestore gibi saat dilimsiz değerler UTC kabul edilir"""
+    if tarih.tzinfo is not None:
+        tarih = tarih.astimezone(timezone.utc).replace(tzinfo=None)
+    return tarih.isoformat(timespec="microseconds")
+
+
+def _thread_te(metot):
+    """Senkron SQLite metodunu deponun thread'inde çalıştıran async metoda çevirir"""
+    @functools.wraps(metot)
+    async def sarmal(self, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._havuz, functools.partial(metot, self, *args, **kwargs))
+    return sarmal
+
+
+class SqliteDeposu:
+    """Gömülü SQLite; (kullanici_id, tarih) indeksli sorgular ağ gidiş-dönüşü olmadan çalışır"""
+
+    ad = "sqlite"
+
+    SEMA = """
+    CREATE TABLE IF NOT EXISTS users (uid TEXT PRIMARY KEY, veri TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS yemek_gunlugu (
+        id TEXT PRIMARY KEY, kullanici_id TEXT NOT NULL, tarih TEXT NOT NULL, veri TEXT NOT NULL, guncelleme TEXT);
+    CREATE INDEX IF NOT EXISTS yemek_gunlugu_kullanici_tarih ON yemek_gunlugu (kullanici_id, tarih);
+    CREATE TABLE IF NOT EXISTS silinen_loglar (
+        id TEXT PRIMARY KEY, kullanici_id TEXT NOT NULL, tarih_str TEXT NOT NULL, silinme TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS silinen_loglar_kullanici_gun ON silinen_loglar (kullanici_id, tarih_str, silinme);
+    CREATE TABLE IF NOT EXISTS su_takibi (
+        id TEXT PRIMARY KEY, kullanici_id TEXT NOT NULL, tarih TEXT NOT NULL, tarih_str TEXT NOT NULL, miktar);
+    CREATE INDEX IF NOT EXISTS su_takibi_kullanici_tarih ON su_takibi (kullanici_id, tarih);
+    CREATE TABLE IF NOT EXISTS gunluk_ozet (
+        kullanici_id TEXT NOT NULL, tarih_str TEXT NOT NULL,
+        kalori DEFAULT 0, yakilan DEFAULT 0, protein DEFAULT 0, karbonhidrat DEFAULT 0, yag DEFAULT 0,
+        kayit_sayisi DEFAULT 0, PRIMARY KEY (kullanici_id, tarih_str)) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS aylik_ozet (
+        kullanici_id TEXT NOT NULL, ay TEXT NOT NULL,
+        kalori DEFAULT 0, yakilan DEFAULT 0, protein DEFAULT 0, karbonhidrat DEFAULT 0, yag DEFAULT 0,
+        kayit_sayisi DEFAULT 0, PRIMARY KEY (kullanici_id, ay)) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS gunluk_su (
+        kullanici_id TEXT NOT NULL, tarih_str TEXT NOT NULL, toplam DEFAULT 0, bardak DEFAULT 0,
+        PRIMARY KEY (kullanici_id, tarih_str)) WITHOUT ROWID;
+    """
+
+    def __init__(self, yol="dietapp.db"):
+        # Kilit beklemesi (timeout) ve büyük sorgular event loop'u durdurmasın diye sorgular
+        # tek işçili bir thread'de çalışır; tek bağlantı sırayla kullanılır, transaction'lar karışmaz
+        self._havuz = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.baglanti = sqlite3.connect(yol, isolation_level=None, check_same_thread=False, timeout=5)
+        self.baglanti.row_factory = sqlite3.Row
+        if yol != ":memory:":
+            self.baglanti.execute("PRAGMA journal_mode=WAL")
+            self.baglanti.execute("PRAGMA synchronous=NORMAL")
+        self.baglanti.executescript(self.SEMA)
+        # guncelleme sütunundan önce oluşturulmuş dosyalar
+        sutunlar = {s["name"] for s in self.baglanti.execute("PRAGMA table_info(yemek_gunlugu)")}
+        if "guncelleme" not in sutunlar:
+            self.baglanti.execute("ALTER TABLE yemek_gunlugu ADD COLUMN guncelleme TEXT")
+
+    def _transaction(self):
+        return _SqliteTransaction(self.baglanti)
+
+    # --- Profil ---
+    @_thread_te
+    def profil_getir(self, uid):
+        satir = self.baglanti.execute("SELECT veri FROM users WHERE uid = ?", (uid,)).fetchone()
+        return json.loads(satir["veri"]) if satir else None
+
+    @_thread_te
+    def profil_kaydet(self, uid, profil):
+        self.baglanti.execute("INSERT OR REPLACE INTO users (uid, veri) VALUES (?, ?)", (uid, json.dumps(profil, default=str)))
+
+    # --- Loglar + özetler ---
+    def _ozet_artir(self, uid, tarih_str, fark):
+        sutunlar = ", ".join(_OZET_SUTUNLARI)
+        degerler = [fark.get(alan, 0) for alan in _OZET_SUTUNLARI]
+        guncelle = ", ".join(f"{alan} = {alan} + excluded.{alan}" for alan in _OZET_SUTUNLARI)
+        for tablo, anahtar, deger in (("gunluk_ozet", "tarih_str", tarih_str), ("aylik_ozet", "ay", tarih_str[:7])):
+            self.baglanti.execute(
+                f"INSERT INTO {tablo} (kullanici_id, {anahtar}, {sutunlar}) VALUES (?, ?, {', '.join('?' * len(degerler))}) "
+                f"ON CONFLICT (kullanici_id, {anahtar}) DO UPDATE SET {guncelle}",
+                (uid, deger, *degerler),
+            )
+
+    def _log_yaz(self, doc_id, veri):
+        kayit = {k: v for k, v in veri.items() if k != "tarih"}
+        self.baglanti.execute(
+            "INSERT INTO yemek_gunlugu (id, kullanici_id, tarih, veri, guncelleme) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, veri["kullanici_id"], _zaman(veri["tarih"]), json.dumps(kayit), _zaman(datetime.now(timezone.utc))),
+        )
+        fark = {**log_katkisi(veri), "kayit_sayisi": 1}
+        self._ozet_artir(veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d"), fark)
+
+    @_thread_te
+    def log_ekle(self, veri):
+        doc_id = uuid.uuid4().hex
+        with self._transaction():
+            self._log_yaz(doc_id, veri)
+        return doc_id
+
+    @_thread_te
+    def loglari_toplu_ekle(self, veriler, idler=None):
+        """Firestore'daki gibi her log için doküman id'si veya (yazılamadıysa) Exception içeren
+        liste döner; hatalı log savepoint ile geri alınır, diğerleri yazılır"""
+        idler = [i or uuid.uuid4().hex for i in (idler or [None] * len(veriler))]
+        sonuclar = []
+        try:
+            with self._transaction():
+                for doc_id, veri in zip(idler, veriler):
+                    self.baglanti.execute("SAVEPOINT log")
+                    try:
+                        self._log_yaz(doc_id, veri)
+                        sonuclar.append(doc_id)
+                    except Exception as e:
+                        self.baglanti.execute("ROLLBACK TO log")
+                        sonuclar.append(e)
+                    self.baglanti.execute("RELEASE log")
+        except Exception as e:
+            # Transaction açılamadı / commit edilemedi: hiçbiri yazılmadı
+            return [e] * len(veriler)
+        return sonuclar
+
+    @staticmethod
+    def _log_satiri(satir):
+        return satir["id"], {**json.loads(satir["veri"]), "tarih": datetime.fromisoformat(satir["tarih"])}
+
+    @_thread_te
+    def log_sil(self, doc_id):
+        with self._transaction():
+            satir = self.baglanti.execute("SELECT * FROM yemek_gunlugu WHERE id = ?", (doc_id,)).fetchone()
+            if satir is None:
+                return None
+            _, veri = self._log_satiri(satir)
+            fark = {alan: -deger for alan, deger in log_katkisi(veri).items()}
+            fark["kayit_sayisi"] = -1
+            self._ozet_artir(veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d"), fark)
+            self.baglanti.execute("DELETE FROM yemek_gunlugu WHERE id = ?", (doc_id,))
+            simdi = datetime.now(timezone.utc)
+            self.baglanti.execute(
+                "INSERT OR REPLACE INTO silinen_loglar (id, kullanici_id, tarih_str, silinme) VALUES (?, ?, ?, ?)",
+                (doc_id, veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d"), _zaman(simdi)),
+            )
+            # Firestore'daki TTL politikasının karşılığı
+            self.baglanti.execute(
+                "DELETE FROM silinen_loglar WHERE silinme < ?", (_zaman(simdi - timedelta(days=SILINEN_SAKLAMA_GUN)),)
+            )
+        return veri["kullanici_id"]
+
+    @_thread_te
+    def gun_loglari(self, uid, baslangic, bitis, azalan=False):
+        """[baslangic, bitis) aralığındaki loglar: [(id, veri)]"""
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM yemek_gunlugu WHERE kullanici_id = ? AND tarih >= ? AND tarih < ? "
+            f"ORDER BY tarih {'DESC' if azalan else 'ASC'}",
+            (uid, _zaman(baslangic), _zaman(bitis)),
+        ).fetchall()
+        return [self._log_satiri(s) for s in satirlar]
+
+    @staticmethod
+    def _alan_sec(log, alanlar):
+        doc_id, veri = log
+        if not alanlar:
+            return log
+        return doc_id, {alan: veri[alan] for alan in {*alanlar, "tarih"} if alan in veri}
+
+    @_thread_te
+    def log_sayfasi(self, uid, baslangic, bitis, alanlar=None, limit=50, imlec=None):
+        kosul, parametreler = "", []
+        if imlec:
+            kosul = "AND (tarih < ? OR (tarih = ? AND id < ?)) "
+            parametreler = [_zaman(imlec[0]), _zaman(imlec[0]), imlec[1]]
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM yemek_gunlugu WHERE kullanici_id = ? AND tarih >= ? AND tarih < ? "
+            f"{kosul}ORDER BY tarih DESC, id DESC LIMIT ?",
+            (uid, _zaman(baslangic), _zaman(bitis), *parametreler, limit + 1),
+        ).fetchall()
+        loglar = [self._alan_sec(self._log_satiri(s), alanlar) for s in satirlar]
+        sonraki = (loglar[limit - 1][1]["tarih"], loglar[limit - 1][0]) if len(loglar) > limit else None
+        return loglar[:limit], sonraki
+
+    @_thread_te
+    def log_degisiklikleri(self, uid, tarih_str, sonra, alanlar=None):
+        baslangic = datetime.strptime(tarih_str, "%Y-%m-%d")
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM yemek_gunlugu WHERE kullanici_id = ? AND tarih >= ? AND tarih < ? AND guncelleme > ?",
+            (uid, _zaman(baslangic), _zaman(baslangic + timedelta(days=1)), _zaman(sonra)),
+        ).fetchall()
+        silinen = self.baglanti.execute(
+            "SELECT id FROM silinen_loglar WHERE kullanici_id = ? AND tarih_str = ? AND silinme > ?",
+            (uid, tarih_str, _zaman(sonra)),
+        ).fetchall()
+        return [self._alan_sec(self._log_satiri(s), alanlar) for s in satirlar], [s["id"] for s in silinen]
+
+    def _ozet_satiri(self, satir):
+        return {**bos_ozet(), **dict(satir)}
+
+    @_thread_te
+    def ozet_getir(self, uid, tarih_str):
+        satir = self.baglanti.execute(
+            "SELECT * FROM gunluk_ozet WHERE kullanici_id = ? AND tarih_str = ?", (uid, tarih_str)
+        ).fetchone()
+        return self._ozet_satiri(satir) if satir else bos_ozet()
+
+    @_thread_te
+    def gunluk_ozetler(self, uid, baslangic, bitis):
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM gunluk_ozet WHERE kullanici_id = ? AND tarih_str >= ? AND tarih_str <= ?",
+            (uid, baslangic.isoformat(), bitis.isoformat()),
+        ).fetchall()
+        return {s["tarih_str"]: self._ozet_satiri(s) for s in satirlar}
+
+    @_thread_te
+    def aylik_ozetler(self, uid, ilk_ay, son_ay):
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM aylik_ozet WHERE kullanici_id = ? AND ay >= ? AND ay <= ?", (uid, ilk_ay, son_ay)
+        ).fetchall()
+        return {s["ay"]: self._ozet_satiri(s) for s in satirlar}
+
+    # --- Su ---
+    @_thread_te
+    def su_toplu_ekle(self, kayitlar):
+        with self._transaction():
+            for kayit in kayitlar:
+                tarih_str = kayit["tarih"].strftime("%Y-%m-%d")
+                self.baglanti.execute(
+                    "INSERT INTO su_takibi (id, kullanici_id, tarih, tarih_str, miktar) VALUES (?, ?, ?, ?, ?)",
+                    (kayit.get("id") or uuid.uuid4().hex, kayit["kullanici_id"], _zaman(kayit["tarih"]), tarih_str, kayit["miktar"]),
+                )
+                self.baglanti.execute(
+                    "INSERT INTO gunluk_su (kullanici_id, tarih_str, toplam, bardak) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (kullanici_id, tarih_str) DO UPDATE SET toplam = toplam + excluded.toplam, bardak = bardak + 1",
+                    (kayit["kullanici_id"], tarih_str, kayit["miktar"]),
+                )
+
+    @_thread_te
+    def su_getir(self, uid, tarih_str):
+        satir = self.baglanti.execute(
+            "SELECT toplam FROM gunluk_su WHERE kullanici_id = ? AND tarih_str = ?", (uid, tarih_str)
+        ).fetchone()
+        return satir["toplam"] if satir else 0
+
+    @_thread_te
+    def su_araligi(self, uid, baslangic, bitis):
+        satirlar = self.baglanti.execute(
+            "SELECT tarih_str, toplam FROM gunluk_su WHERE kullanici_id = ? AND tarih_str >= ? AND tarih_str <= ?",
+            (uid, baslangic.isoformat(), bitis.isoformat()),
+        ).fetchall()
+        return {s["tarih_str"]: s["toplam"] for s in satirlar}
+
+    @_thread_te
+    def su_sayfasi(self, uid, baslangic, bitis, limit=500, imlec=None):
+        kosul, parametreler = "", []
+        if imlec:
+            kosul = "AND (tarih < ? OR (tarih = ? AND id < ?)) "
+            parametreler = [_zaman(imlec[0]), _zaman(imlec[0]), imlec[1]]
+        satirlar = self.baglanti.execute(
+            "SELECT * FROM su_takibi WHERE kullanici_id = ? AND tarih >= ? AND tarih < ? "
+            f"{kosul}ORDER BY tarih DESC, id DESC LIMIT ?",
+            (uid, _zaman(baslangic), _zaman(bitis), *parametreler, limit + 1),
+        ).fetchall()
+        kayitlar = [
+            (s["id"], {"miktar": s["miktar"], "kullanici_id": s["kullanici_id"], "tarih": datetime.fromisoformat(s["tarih"]), "tarih_str": s["tarih_str"]})
+            for s in satirlar
+        ]
+        sonraki = (kayitlar[limit - 1][1]["tarih"], kayitlar[limit - 1][0]) if len(kayitlar) > limit else None
+        return kayitlar[:limit], sonraki
+
+    @_thread_te
+    def var_olan_idler(self, log_idleri, su_idleri):
+        mevcut = set()
+        for tablo, idler in (("yemek_gunlugu", log_idleri), ("su_takibi", su_idleri)):
+            idler = list(idler)
+            for i in range(0, len(idler), 500):
+                parca = idler[i:i + 500]
+                satirlar = self.baglanti.execute(
+                    f"SELECT id FROM {tablo} WHERE id IN ({', '.join('?' * len(parca))})", parca
+                ).fetchall()
+                mevcut.update(s["id"] for s in satirlar)
+        return mevcut
+
+
+class BellekDeposu(SqliteDeposu):
+    """Bellekte SQLite; süreç kapanınca veri kaybolur"""
+
+    ad = "bellek"
+
+    def __init__(self):
+        super().__init__(":memory:")
+
+
+class _SqliteTransaction:
+    # BEGIN IMMEDIATE: birden fazla worker aynı dosyaya yazarken kilit yükseltme çakışmasını önler
+    def __init__(self, baglanti):
+        self.baglanti = baglanti
+
+    def __enter__(self):
+        self.baglanti.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, tip, deger, iz):
+        self.baglanti.execute("ROLLBACK" if tip else "COMMIT")
+
+
+def depo_olustur(ad, db=None, sqlite_dosya="dietapp.db"):
+    """DEPO ayarına göre backend'i kurar; firestore için async istemci (db) verilmeli"""
+    if ad not in DEPOLAR:
+        raise ValueError(f"Bilinmeyen depo: {ad} (seçenekler: {', '.join(DEPOLAR)})")
+    if ad == "firestore":
+        return FirestoreDeposu(db)
+    if ad == "sqlite":
+        return SqliteDeposu(sqlite_dosya)
+    return BellekDeposu()
@@ -0,0 +1,213 @@
+"""
+GEÇMİŞ DIŞA AKTARIMI
+
+Bir kullanıcının tüm yemek_gunlugu veya su_takibi geçmişini depo üzerinden sayfa
+sayfa okuyup NDJSON, CSV veya Parquet olarak akış halinde üretir. Bellekte aynı anda
+en fazla bir sayfa (SAYFA_BOYUTU kayıt) ve onun kodlanmış baytları bulunur; geçmişin
+uzunluğu bellek kullanımını değiştirmez.
+
+- ndjson / csv: sikistirma=gzip (zlib) veya zstd (zstandard paketi) ile sıkıştırılabilir
+- parquet: pyarrow gerekir; her sayfa bir row group olarak yazılır, sıkıştırma
+  dosyanın tamamına değil parquet'in sütun codec'i olarak uygulanır
+
+Kayıtlar tarihe göre azalan sırada (en yeni önce) gelir.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+
+SAYFA_BOYUTU = 500
+FORMATLAR = ("ndjson", "csv", "parquet")
+SIKISTIRMALAR = ("yok", "gzip", "zstd")
+
+# Kaynak başına CSV / Parquet sütunları (NDJSON kayıtları da bu alanlarla sınırlıdır)
+SUTUNLAR = {
+    "yemek_gunlugu": ("id", "tarih", "tur", "ogun", "yemek_adi", "aktivite_adi", "porsiyon", "sure_dk", "kalori", "protein", "karbonhidrat", "yag"),
+    "su_takibi": ("id", "tarih", "miktar"),
+}
+# Parquet sütun tipleri (pyarrow tip adı)
+_PARQUET_TIPLERI = {
+    "id": "string", "tarih": "timestamp", "tur": "string", "ogun": "string", "yemek_adi": "string",
+    "aktivite_adi": "string", "porsiyon": "string", "sure_dk": "float64", "kalori": "float64",
+    "protein": "float64", "karbonhidrat": "float64", "yag": "float64", "miktar": "float64",
+}
+
+# Tarih filtresi verilmezse tüm geçmiş
+EN_ESKI = datetime(1970, 1, 1)
+EN_YENI = datetime(9999, 12, 31)
+
+
+def dosya_uzantisi(format, sikistirma):
+    uzanti = format
+    if format != "parquet" and sikistirma != "yok":
+        uzanti += {"gzip": ".gz", "zstd": ".zst"}[sikistirma]
+    return uzanti
+
+
+def medya_tipi(format, sikistirma):
+    if format == "parquet":
+        return "application/vnd.apache.parquet"
+    if sikistirma == "gzip":
+        return "application/gzip"
+    if sikistirma == "zstd":
+        return "application/zstd"
+    return {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}[format]
+
+
+def bagimlilik_kontrol(format, sikistirma):
+    """Opsiyonel paket eksikse akış başlamadan hata mesajı döndürür"""
+    try:
+        if format == "parquet":
+            import pyarrow.parquet  # noqa: F401
+        elif sikistirma == "zstd":
+            import zstandard  # noqa: F401
+    except ImportError as e:
+        return f"{format}/{sikistirma} için {e.name} paketi gerekli (pip install {e.name})"
+    return None
+
+
+async def kayit_sayfalari(depo, kaynak, uid, baslangic=EN_ESKI, bitis=EN_YENI, sayfa_boyutu=SAYFA_BOYUTU):
+    """Depodan imleçli sayfalarla okur; her sayfa için sütunlarla sınırlı satır listesi üretir"""
+    sutunlar = SUTUNLAR[kaynak]
+    sayfa_oku = depo.log_sayfasi if kaynak == "yemek_gunlugu" else depo.su_sayfasi
+    imlec = None
+    while True:
+        kayitlar, imlec = await sayfa_oku(uid, baslangic, bitis, limit=sayfa_boyutu, imlec=imlec)
+        if kayitlar:
+            yield [_satir(doc_id, veri, sutunlar) for doc_id, veri in kayitlar]
+        if imlec is None:
+            return
+
+
+async def ilk_sayfayi_oku(sayfalar):
+    """İlk sayfayı hemen okur, tüm sayfaları veren üreteci döndürür. Depo hataları yanıt
+    başlıkları gönderilmeden önce burada yükselir (akış yarıda kesilmez)."""
+    try:
+        ilk = await sayfalar.__anext__()
+    except StopAsyncIteration:
+        ilk = None
+
+    async def devam():
+        if ilk is not None:
+            yield ilk
+        async for sayfa in sayfalar:
+            yield sayfa
+
+    return devam()
+
+
+def _satir(doc_id, veri, sutunlar):
+    veri = {**veri, "id": doc_id}
+    return {alan: veri.get(alan) for alan in sutunlar}
+
+
+def _metin(deger):
+    return deger.isoformat() if isinstance(deger, datetime) else deger
+
+
+def _ndjson(satirlar):
+    return "".join(
+        json.dumps({alan: _metin(deger) for alan, deger in satir.items()}, ensure_ascii=False) + "\n"
+        for satir in satirlar
+    ).encode("utf-8")
+
+
+class _CsvKodlayici:
+    def __init__(self, sutunlar):
+        self.sutunlar = sutunlar
+        self.baslik_yazildi = False
+
+    def __call__(self, satirlar):
+        tampon = io.StringIO()
+        yazici = csv.writer(tampon)
+        if not self.baslik_yazildi:
+            yazici.writerow(self.sutunlar)
+            self.baslik_yazildi = True
+        yazici.writerows([_metin(satir[alan]) for alan in self.sutunlar] for satir in satirlar)
+        return tampon.getvalue().encode("utf-8")
+
+
+class _BosaltilanTampon(io.RawIOBase):
+    """ParquetWriter'ın yazdığı baytları biriktirir; her row group'tan sonra boşaltılır"""
+
+    def __init__(self):
+        self._parcalar = []
+        self._konum = 0
+
+    def writable(self):
+        return True
+
+    def write(self, veri):
+        self._parcalar.append(bytes(veri))
+        self._konum += len(veri)
+        return len(veri)
+
+    def tell(self):
+        return self._konum
+
+    def bosalt(self):
+        veri = b"".join(self._parcalar)
+        self._parcalar = []
+        return veri
+
+
+def _sikistirici(sikistirma):
+    if sikistirma == "gzip":
+        nesne = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip başlığı
+        return nesne.compress, nesne.flush
+    if sikistirma == "zstd":
+        import zstandard
+        nesne = zstandard.ZstdCompressor().compressobj()
+        return nesne.compress, nesne.flush
+    return (lambda veri: veri), (lambda: b"")
+
+
+async def akis(sayfalar, kaynak, format, sikistirma="yok"):
+    """kayit_sayfalari() çıktısını seçilen formatta bayt parçalarına çevirir"""
+    sutunlar = SUTUNLAR[kaynak]
+    if format == "parquet":
+        async for parca in _parquet_akisi(sayfalar, sutunlar, sikistirma):
+            yield parca
+        return
+
+    kodla = _ndjson if format == "ndjson" else _CsvKodlayici(sutunlar)
+    sikistir, bitir = _sikistirici(sikistirma)
+    if format == "csv":
+        # Hiç kayıt yoksa da başlık satırı yazılır
+        yield sikistir(kodla([]))
+    async for satirlar in sayfalar:
+        parca = sikistir(kodla(satirlar))
+        if parca:
+            yield parca
+    yield bitir()
+
+
+def _parquet_degeri(deger, tip):
+    if deger is None:
+        return None
+    if tip == "timestamp":
+        # Saat dilimli (Firestore) tarihler UTC'ye çevrilir; SQLite zaten saat dilimsiz UTC
+        return deger.astimezone(timezone.utc).replace(tzinfo=None) if deger.tzinfo else deger
+    if tip == "string":
+        return str(deger)
+    return float(deger)
+
+
+async def _parquet_akisi(sayfalar, sutunlar, sikistirma):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipler = {"string": pa.string(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    sema = pa.schema([(alan, tipler[_PARQUET_TIPLERI[alan]]) for alan in sutunlar])
+    codec = {"yok": "none", "gzip": "gzip", "zstd": "zstd"}[sikistirma]
+
+    tampon = _BosaltilanTampon()
+    yazici = pq.ParquetWriter(tampon, sema, compression=codec)
+    async for satirlar in sayfalar:
+        sutun_verisi = {alan: [_parquet_degeri(satir[alan], _PARQUET_TIPLERI[alan]) for satir in satirlar] for alan in sutunlar}
+        yazici.write_table(pa.table(sutun_verisi, schema=sema))
+        yield tampon.bosalt()
+    yazici.close()
+    yield tampon.bosalt()
@@ -0,0 +1,102 @@
+"""
+DIŞA AKTARIM BENCHMARK'I
+
+Bellekteki depoya (depo.BellekDeposu, Firebase gerekmez) birkaç yıllık sentetik geçmiş
+yükler ve /disa-aktar akışının (disa_aktarim.akis) tepe Python bellek kullanımını,
+tüm geçmişi tek seferde okuyup JSON'a çeviren yaklaşımla karşılaştırır. Akışta tepe
+bellek geçmiş uzadıkça sabit kalmalı, tek seferde yaklaşımda doğrusal artmalıdır.
+
+Bellek tracemalloc ile ölçülür (sadece Python nesneleri; SQLite'ın kendi belleği hariç).
+
+Kullanım:
+    python disa_aktarim_benchmark.py
+    python disa_aktarim_benchmark.py --yillar 1,4,10 --gunluk 12 --format csv --sikistirma gzip
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import disa_aktarim
+from depo import BellekDeposu
+
+UID = "benchmark"
+
+
+async def gecmis_yukle(depo, yil, gunluk, tohum=42):
+    """yil * 365 gün, gün başına gunluk öğün + 6 bardak su"""
+    with open("foods.json", "r", encoding="utf-8") as f:
+        yemekler = list(json.load(f).values())
+    rastgele = random.Random(tohum)
+    bugun = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    for gun in range(yil * 365):
+        tarih = bugun - timedelta(days=gun)
+        loglar = []
+        for i in range(gunluk):
+            yemek = rastgele.choice(yemekler)
+            loglar.append({
+                "yemek_adi": yemek["isim"], "kalori": yemek["kalori"], "protein": yemek["protein"],
+                "karbonhidrat": yemek["karbonhidrat"], "yag": yemek["yag"], "porsiyon": yemek["birim"],
+                "kullanici_id": UID, "tarih": tarih + timedelta(hours=i), "tur": "yemek", "ogun": "Öğle",
+            })
+        await depo.loglari_toplu_ekle(loglar)
+        await depo.su_toplu_ekle([{"kullanici_id": UID, "miktar": 200, "tarih": tarih + timedelta(hours=i)} for i in range(6)])
+
+
+async def akis_olc(depo, kaynak, format, sikistirma):
+    """Akışı tüketir (baytlar atılır): (bayt, süre, tepe bellek)"""
+    tracemalloc.reset_peak()
+    baslangic_bellek = tracemalloc.get_traced_memory()[0]
+    baslangic = time.perf_counter()
+    toplam = 0
+    sayfalar = disa_aktarim.kayit_sayfalari(depo, kaynak, UID)
+    async for parca in disa_aktarim.akis(sayfalar, kaynak, format, sikistirma):
+        toplam += len(parca)
+    return toplam, time.perf_counter() - baslangic, tracemalloc.get_traced_memory()[1] - baslangic_bellek
+
+
+async def tek_seferde_olc(depo):
+    """Karşılaştırma: tüm loglar tek sorguda okunup tek JSON yanıtı olarak kurulur (/gunluk tarzı)"""
+    tracemalloc.reset_peak()
+    baslangic_bellek = tracemalloc.get_traced_memory()[0]
+    baslangic = time.perf_counter()
+    loglar = await depo.gun_loglari(UID, disa_aktarim.EN_ESKI, disa_aktarim.EN_YENI)
+    govde = json.dumps([{"id": doc_id, **veri} for doc_id, veri in loglar], default=str).encode("utf-8")
+    return len(govde), time.perf_counter() - baslangic, tracemalloc.get_traced_memory()[1] - baslangic_bellek
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dışa aktarım akışı bellek benchmark'ı")
+    parser.add_argument("--yillar", default="1,2,4,8", help="Virgülle ayrılmış geçmiş uzunlukları (yıl)")
+    parser.add_argument("--gunluk", type=int, default=8, help="Gün başına log sayısı")
+    parser.add_argument("--format", choices=disa_aktarim.FORMATLAR, default="ndjson")
+    parser.add_argument("--sikistirma", choices=disa_aktarim.SIKISTIRMALAR, default="yok")
+    parser.add_argument("--kaynak", choices=tuple(disa_aktarim.SUTUNLAR), default="yemek_gunlugu")
+    args = parser.parse_args()
+
+    eksik = disa_aktarim.bagimlilik_kontrol(args.format, args.sikistirma)
+    if eksik:
+        print(f"❌ {eksik}")
+        return
+
+    print(f"{'yıl':>4}{'kayıt':>10}{'çıktı (MB)':>12}{'akış (sn)':>11}{'akış tepe (MB)':>16}{'tek sefer tepe (MB)':>21}")
+    for yil in [int(y) for y in args.yillar.split(",")]:
+        depo = BellekDeposu()
+        asyncio.run(gecmis_yukle(depo, yil, args.gunluk))
+        kayit = yil * 365 * (args.gunluk if args.kaynak == "yemek_gunlugu" else 6)
+
+        # Yükleme sonrası başlatılır: sadece dışa aktarımın ayırdığı bellek ölçülür
+        tracemalloc.start()
+        bayt, sure, akis_tepe = asyncio.run(akis_olc(depo, args.kaynak, args.format, args.sikistirma))
+        tek_tepe = asyncio.run(tek_seferde_olc(depo))[2] if args.kaynak == "yemek_gunlugu" else None
+        tracemalloc.stop()
+
+        tek = f"{tek_tepe / 1e6:>21.1f}" if tek_tepe is not None else f"{'-':>21}"
+        print(f"{yil:>4}{kayit:>10}{bayt / 1e6:>12.1f}{sure:>11.2f}{akis_tepe / 1e6:>16.2f}{tek}")
+
+
+if __name__ == "__main__":
+    main()
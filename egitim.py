@@ -1,4 +1,28 @@
+"""
+MODEL EĞİTİMİ
+
+İki mod:
+- tam (varsayılan): ViT'in tamamı dataset/ üzerinde 25 tur ince ayar yapılır. Resimler
+  bir kez uint8 parçalara çözülür (bkz. egitim_onbellek.py), artırma DataLoader
+  işçilerinde tensörler üzerinde yapılır; --veri canli eski (her turda JPEG çözme) yoldur.
+- bas: omurga dondurulur; resimlerin CLS vektörleri bir kez çıkarılıp diskteki özellik
+  deposunda (bkz. ozellik_deposu.py) tutulur ve sadece sınıflandırma katmanı eğitilir.
+  dataset/ altına yeni bir sınıf klasörü (ör. tavuk_doner) eklendiğinde sadece yeni
+  resimler için omurga çalışır; eğitim saniyeler sürer. Çıktı yeni_model formatındadır.
+
+Kullanım:
+    python egitim.py
+    python egitim.py --yukleyici-testi --isci 8     # Sadece veri hattı hızı (resim/sn)
+    python egitim.py --yukleyici-kontrol            # Küçük sentetik veride veri hattı kontrolü
+    python egitim.py --mod bas
+    python egitim.py --mod bas --omurga google/vit-base-patch16-224-in21k --epoch 300
+"""
+import argparse
+import hashlib
 import os
+import tempfile
+import time
+from types import SimpleNamespace
 import torch
 import numpy as np
 import evaluate
@@ -7,8 +31,12 @@ from transformers import (
     ViTImageProcessor, 
     ViTForImageClassification, 
     TrainingArguments, 
-    Trainer
+    Trainer,
+    TrainerCallback
 )
+from PIL import Image
+from ozellik_deposu import OzellikDeposu, dataset_tara
+from egitim_onbellek import OnbellekKumesi, onbellek_hazirla
 from torchvision.transforms import (
     Compose, 
     Normalize, 
@@ -16,30 +44,19 @@ from torchvision.transforms import (
     RandomHorizontalFlip, 
     ToTensor, 
     Resize, 
-    CenterCrop
+    CenterCrop,
+    ConvertImageDtype
 )
 
 # --- AYARLAR ---
 MODEL_ADI = "google/vit-base-patch16-224-in21k"
 DATASET_KLASORU = "dataset"
 CIKIS_KLASORU = "yeni_model"
+OZELLIK_KLASORU = "ozellikler"
+ONBELLEK_KLASORU = "egitim_onbellegi"
 
-def main():
-    print("🚀 Eğitim hazırlığı başlıyor...")
-
-    # 1. Veri Setini Yükle
-    try:
-        ds = load_dataset("imagefolder", data_dir=DATASET_KLASORU)
-        ds = ds['train'].train_test_split(test_size=0.15) 
-    except Exception as e:
-        print(f"HATA: Veri seti yüklenemedi! Hata: {e}")
-        return
-
-    labels = ds['train'].features['label'].names
-    print(f"✅ Tespit edilen yemekler ({len(labels)} adet): {labels}")
-
-    # 2. Ön İşleme
-    processor = ViTImageProcessor.from_pretrained(MODEL_ADI)
+def _donusumler(processor):
+    """(eğitim, doğrulama) dönüşümleri"""
     normalize = Normalize(mean=processor.image_mean, std=processor.image_std)
     
     _train_transforms = Compose([
@@ -55,21 +72,128 @@ def main():
         ToTensor(),
         normalize,
     ])
+    return _train_transforms, _val_transforms
 
-    def preprocess_train(example_batch):
-        example_batch["pixel_values"] = [
-            _train_transforms(image.convert("RGB")) for image in example_batch["image"]
-        ]
-        return example_batch
+def _tensor_donusumleri(processor):
+    """Önbellekteki (3, H, W) uint8 tensörler için _donusumler() karşılığı"""
+    normalize = Normalize(mean=processor.image_mean, std=processor.image_std)
+    
+    _train_transforms = Compose([
+        RandomResizedCrop(224, antialias=True),
+        RandomHorizontalFlip(),
+        ConvertImageDtype(torch.float32),
+        normalize,
+    ])
+    
+    _val_transforms = Compose([
+        Resize(224, antialias=True),
+        CenterCrop(224),
+        ConvertImageDtype(torch.float32),
+        normalize,
+    ])
+    return _train_transforms, _val_transforms
+
+class _HizRaporu(TrainerCallback):
+    """Tur başına eğitim süresi ve resim/sn"""
+
+    def __init__(self, resim_sayisi):
+        self.resim_sayisi = resim_sayisi
+        self._baslangic = None
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._baslangic = time.perf_counter()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        sure = time.perf_counter() - self._baslangic
+        print(f"\n⏱️ Tur {round(state.epoch)}: {sure:.1f} sn, {self.resim_sayisi / sure:.1f} resim/sn")
 
-    def preprocess_val(example_batch):
+# DataLoader işçileri spawn ile başlatıldığında (Windows, macOS) collate fonksiyonu ve
+# dönüşümler pickle edilir; lambda / iç fonksiyon olamazlar
+def _topla(ornekler):
+    return {
+        "pixel_values": torch.stack([f["pixel_values"] for f in ornekler]),
+        "labels": torch.tensor([f["label"] for f in ornekler])
+    }
+
+class _OrnekDonusumu:
+    """datasets with_transform için: batch'teki resimlere dönüşüm uygular"""
+
+    def __init__(self, donusum):
+        self.donusum = donusum
+
+    def __call__(self, example_batch):
         example_batch["pixel_values"] = [
-            _val_transforms(image.convert("RGB")) for image in example_batch["image"]
+            self.donusum(image.convert("RGB")) for image in example_batch["image"]
         ]
         return example_batch
 
-    train_ds = ds['train'].with_transform(preprocess_train)
-    val_ds = ds['test'].with_transform(preprocess_val)
+def _canli_veri(processor):
+    """Resimler her turda dataset/ altından çözülür"""
+    ds = load_dataset("imagefolder", data_dir=DATASET_KLASORU)
+    ds = ds['train'].train_test_split(test_size=0.15) 
+    labels = ds['train'].features['label'].names
+    _train_transforms, _val_transforms = _donusumler(processor)
+    return ds['train'].with_transform(_OrnekDonusumu(_train_transforms)), ds['test'].with_transform(_OrnekDonusumu(_val_transforms)), labels
+
+def _onbellekli_veri(processor, args):
+    """Resimler bir kez uint8 parçalara çözülür (bkz. egitim_onbellek.py)"""
+    meta = onbellek_hazirla(DATASET_KLASORU, args.onbellek_klasoru, isci=args.isci or None)
+    # Canlı moddaki train_test_split(test_size=0.15) karşılığı
+    sira = np.random.default_rng(args.tohum).permutation(len(meta["etiketler"]))
+    n_test = int(np.ceil(len(sira) * 0.15))
+    _train_transforms, _val_transforms = _tensor_donusumleri(processor)
+    train_ds = OnbellekKumesi(args.onbellek_klasoru, meta, sira[n_test:], _train_transforms)
+    val_ds = OnbellekKumesi(args.onbellek_klasoru, meta, sira[:n_test], _val_transforms)
+    return train_ds, val_ds, meta["siniflar"]
+
+def yukleyici_testi(train_ds, isci, batch=64, adet=20):
+    """Modelsiz, sadece veri hattının hızı (resim/sn)"""
+    yukleyici = torch.utils.data.DataLoader(train_ds, batch_size=batch, shuffle=True, num_workers=isci, persistent_workers=isci > 0, collate_fn=_topla)
+    for tur in range(2):  # İlk tur işçi başlatmayı da içerir
+        baslangic, resim = time.perf_counter(), 0
+        for i, ornekler in enumerate(yukleyici):
+            resim += len(ornekler["labels"])
+            if i + 1 == adet:
+                break
+        print(f"   Tur {tur + 1}: {resim / (time.perf_counter() - baslangic):.1f} resim/sn ({isci} işçi)")
+
+def yukleyici_kontrolu(isci):
+    """Geçici klasörde küçük sentetik bir dataset için önbelleği kurup yukleyici_testi'ni
+    eğitim ve doğrulama dönüşümleriyle çalıştırır (model indirmez)"""
+    with tempfile.TemporaryDirectory() as kok:
+        veri_klasoru, onbellek_klasoru = os.path.join(kok, "dataset"), os.path.join(kok, "onbellek")
+        rastgele = np.random.default_rng(0)
+        for sinif in ("a", "b"):
+            os.makedirs(os.path.join(veri_klasoru, sinif))
+            # Kare olmayan boyutlar da olsun
+            for i, (genislik, yukseklik) in enumerate([(320, 240), (240, 320), (300, 300), (500, 260)]):
+                Image.fromarray(rastgele.integers(0, 256, (yukseklik, genislik, 3), dtype=np.uint8)).save(os.path.join(veri_klasoru, sinif, f"{i}.jpg"))
+        meta = onbellek_hazirla(veri_klasoru, onbellek_klasoru, parca_boyutu=3, isci=2)
+        # ViT işlemcisinin ortalama / standart sapması (0.5)
+        for donusum in _tensor_donusumleri(SimpleNamespace(image_mean=[0.5] * 3, image_std=[0.5] * 3)):
+            kume = OnbellekKumesi(onbellek_klasoru, meta, range(len(meta["etiketler"])), donusum)
+            yukleyici_testi(kume, isci, batch=3, adet=2)
+            ornekler = _topla([kume[i] for i in range(len(kume))])
+            assert tuple(ornekler["pixel_values"].shape) == (8, 3, 224, 224), ornekler["pixel_values"].shape
+            assert ornekler["labels"].tolist() == meta["etiketler"], ornekler["labels"]
+    print("✅ Yükleyici kontrolü geçti")
+
+def tam_egitim(cli):
+    print("🚀 Eğitim hazırlığı başlıyor...")
+
+    # 1. Veri Setini Yükle
+    processor = ViTImageProcessor.from_pretrained(MODEL_ADI)
+    try:
+        train_ds, val_ds, labels = _onbellekli_veri(processor, cli) if cli.veri == "onbellek" else _canli_veri(processor)
+    except Exception as e:
+        print(f"HATA: Veri seti yüklenemedi! Hata: {e}")
+        return
+
+    print(f"✅ Tespit edilen yemekler ({len(labels)} adet): {labels}")
+    print(f"   Eğitim: {len(train_ds)}, doğrulama: {len(val_ds)} resim ({cli.veri}, {cli.isci} işçi)")
+    if cli.yukleyici_testi:
+        yukleyici_testi(train_ds, cli.isci)
+        return
 
     # 3. Model
     print("🧠 Model hazırlanıyor...")
@@ -96,6 +220,10 @@ def main():
         load_best_model_at_end=True,
         metric_for_best_model="accuracy",
         save_total_limit=2,
+        # Artırma işçilerde yapılır; işçiler turlar arasında yeniden başlatılmaz
+        dataloader_num_workers=cli.isci,
+        dataloader_persistent_workers=cli.isci > 0,
+        dataloader_pin_memory=torch.cuda.is_available(),
     )
 
     # Metrik
@@ -113,10 +241,8 @@ def main():
         eval_dataset=val_ds,
         tokenizer=processor,
         compute_metrics=compute_metrics,
-        data_collator=lambda x: {
-            "pixel_values": torch.stack([f["pixel_values"] for f in x]),
-            "labels": torch.tensor([f["label"] for f in x])
-        } 
+        data_collator=_topla,
+        callbacks=[_HizRaporu(len(train_ds))],
     )
 
     print("\n🔥 EĞİTİM BAŞLIYOR! (25 Tur)...")
@@ -130,5 +256,178 @@ def main():
     
     print(f"✅ İŞLEM BİTTİ! Yeni beynin burada: {CIKIS_KLASORU}")
 
+# --- SADECE SINIFLANDIRMA KATMANI (ÖZELLİK DEPOSU) ---
+def _parmak_izi(model):
+    """Omurga ağırlıklarının özeti; değişirse depodaki vektörler geçersizdir"""
+    ozet = hashlib.sha256()
+    for tensor in (model.vit.embeddings.patch_embeddings.projection.weight, model.vit.encoder.layer[-1].output.dense.weight, model.vit.layernorm.weight):
+        ozet.update(tensor.detach().float().cpu().numpy().tobytes())
+    return ozet.hexdigest()[:16]
+
+class _ResimKumesi(torch.utils.data.Dataset):
+    def __init__(self, kayitlar, donusum):
+        self.kayitlar = kayitlar
+        self.donusum = donusum
+
+    def __len__(self):
+        return len(self.kayitlar)
+
+    def __getitem__(self, i):
+        yol = os.path.join(DATASET_KLASORU, self.kayitlar[i][0])
+        try:
+            with Image.open(yol) as img:
+                return self.donusum(img.convert("RGB")), True
+        except Exception as e:
+            print(f"⚠️ Okunamadı, atlanıyor: {yol} ({e})")
+            return torch.zeros(3, 224, 224), False
+
+def _ozellik_cikar(deposu, model, donusum, eksikler, dosyalar, batch, isci, cihaz):
+    """Eksik resimler için omurgayı çalıştırıp CLS vektörlerini depoya ekler"""
+    yukleyici = torch.utils.data.DataLoader(_ResimKumesi(eksikler, donusum), batch_size=batch, num_workers=isci)
+    baslangic, islenen = time.perf_counter(), 0
+    with torch.no_grad():
+        for pikseller, gecerli in yukleyici:
+            # ViTForImageClassification'ın sınıflandırıcıya verdiği girdi: son katman (layernorm sonrası) CLS
+            cls = model.vit(pixel_values=pikseller.to(cihaz)).last_hidden_state[:, 0, :].float().cpu().numpy()
+            parca = eksikler[islenen:islenen + len(gecerli)]
+            deposu.ekle(
+                [(yol, sinif, *dosyalar[yol][1:]) for yol, sinif in parca],
+                [v if ok else None for v, ok in zip(cls, gecerli.tolist())],
+            )
+            islenen += len(gecerli)
+            # Yarıda kesilirse yapılan iş kaybolmasın
+            if islenen % (batch * 20) < batch:
+                deposu.kaydet()
+            print(f"   {islenen}/{len(eksikler)} resim ({islenen / (time.perf_counter() - baslangic):.1f} resim/sn)", end="\r")
+    deposu.kaydet()
+    print()
+
+def _katmani_egit(X, y, siniflar, baslangic_agirlik, epoch, lr, dogrulama, tohum=42):
+    """Sınıf başına dogrulama oranında ayrılan kümede en iyi doğruluğu veren doğrusal katman"""
+    rastgele = np.random.default_rng(tohum)
+    egitim_idx, dogrulama_idx = [], []
+    for k in range(len(siniflar)):
+        idx = rastgele.permutation(np.flatnonzero(y == k))
+        n = int(len(idx) * dogrulama) if len(idx) > 1 else 0
+        dogrulama_idx.extend(idx[:n])
+        egitim_idx.extend(idx[n:])
+    egitim_idx, dogrulama_idx = np.array(egitim_idx, dtype=np.int64), np.array(dogrulama_idx, dtype=np.int64)
+
+    torch.manual_seed(tohum)
+    X, y = torch.from_numpy(X), torch.from_numpy(y)
+    katman = torch.nn.Linear(X.shape[1], len(siniflar))
+    if baslangic_agirlik is not None:
+        with torch.no_grad():
+            for k, (agirlik, bias) in baslangic_agirlik.items():
+                katman.weight[k], katman.bias[k] = agirlik, bias
+    optim = torch.optim.AdamW(katman.parameters(), lr=lr, weight_decay=1e-4)
+    zamanlayici = torch.optim.lr_scheduler.CosineAnnealingLR(optim, epoch)
+
+    def dogruluk(idx):
+        with torch.no_grad():
+            idx = torch.from_numpy(idx)
+            return (katman(X[idx]).argmax(1) == y[idx]).float().mean().item() if len(idx) else float("nan")
+
+    en_iyi, en_iyi_durum = -1.0, None
+    for tur in range(epoch):
+        karisik = torch.from_numpy(rastgele.permutation(egitim_idx))
+        for i in range(0, len(karisik), 256):
+            parca = karisik[i:i + 256]
+            kayip = torch.nn.functional.cross_entropy(katman(X[parca]), y[parca], label_smoothing=0.1)
+            optim.zero_grad()
+            kayip.backward()
+            optim.step()
+        zamanlayici.step()
+        skor = dogruluk(dogrulama_idx) if len(dogrulama_idx) else dogruluk(egitim_idx)
+        if skor >= en_iyi:
+            en_iyi, en_iyi_durum = skor, {ad: t.clone() for ad, t in katman.state_dict().items()}
+        if (tur + 1) % max(1, epoch // 10) == 0:
+            print(f"   tur {tur + 1}/{epoch}: kayıp {kayip.item():.4f}, eğitim {dogruluk(egitim_idx):.3f}, doğrulama {dogruluk(dogrulama_idx):.3f}")
+    katman.load_state_dict(en_iyi_durum)
+    return katman, en_iyi
+
+def bas_egitimi(args):
+    cihaz = "cuda" if torch.cuda.is_available() else "cpu"
+    # Varsayılan omurga: mevcut yeni_model (yemeklere ince ayarlı), yoksa temel ViT
+    omurga = args.omurga or (CIKIS_KLASORU if os.path.exists(os.path.join(CIKIS_KLASORU, "config.json")) else MODEL_ADI)
+    print(f"🧊 Dondurulmuş omurga: {omurga} ({cihaz})")
+
+    try:
+        processor = ViTImageProcessor.from_pretrained(omurga)
+    except OSError:
+        processor = ViTImageProcessor.from_pretrained(MODEL_ADI)
+    model = ViTForImageClassification.from_pretrained(omurga).to(cihaz).eval()
+    _, _val_transforms = _donusumler(processor)
+
+    # 1. Özellik deposunu dataset/ ile eşitle
+    deposu = OzellikDeposu(args.ozellik_klasoru, omurga, _parmak_izi(model), model.config.hidden_size)
+    dosyalar = dataset_tara(DATASET_KLASORU)
+    eksikler = deposu.eksikler(dosyalar)
+    print(f"📦 Özellik deposu: {len(dosyalar)} resim, {len(eksikler)} tanesi için omurga çalışacak")
+    if eksikler:
+        _ozellik_cikar(deposu, model, _val_transforms, eksikler, dosyalar, args.batch, args.isci, cihaz)
+    else:
+        deposu.kaydet()
+    print(f"   {deposu.istatistik()}")
+
+    X, sinif_adlari = deposu.veri()
+    siniflar = sorted(set(sinif_adlari))
+    if len(siniflar) < 2:
+        print("HATA: En az iki sınıf gerekli")
+        return
+    y = np.array([siniflar.index(s) for s in sinif_adlari], dtype=np.int64)
+    print(f"✅ Tespit edilen yemekler ({len(siniflar)} adet): {siniflar}")
+
+    # 2. Mevcut sınıflar omurganın kendi katmanından başlar; yeni sınıflar sıfırdan
+    eski = {ad: int(i) for i, ad in model.config.id2label.items()}
+    baslangic_agirlik = {
+        k: (model.classifier.weight[eski[ad]].detach().cpu(), model.classifier.bias[eski[ad]].detach().cpu())
+        for k, ad in enumerate(siniflar) if ad in eski and model.classifier.out_features == len(eski)
+    }
+    yeni = [ad for ad in siniflar if ad not in eski]
+    if yeni:
+        print(f"🆕 Yeni sınıflar: {yeni}")
+
+    print(f"\n🔥 Sınıflandırma katmanı eğitiliyor ({args.epoch} tur, {len(y)} vektör)...")
+    baslangic = time.perf_counter()
+    katman, dogruluk = _katmani_egit(X, y, siniflar, baslangic_agirlik or None, args.epoch, args.lr, args.dogrulama)
+    print(f"   {time.perf_counter() - baslangic:.1f} sn, en iyi doğrulama doğruluğu: {dogruluk:.3f}")
+
+    # 3. Omurga + yeni katman yeni_model formatında (from_pretrained ile açılır)
+    model.classifier = katman.to(cihaz)
+    model.num_labels = len(siniflar)
+    model.config.id2label = {str(i): c for i, c in enumerate(siniflar)}
+    model.config.label2id = {c: str(i) for i, c in enumerate(siniflar)}
+    print("\n💾 Yeni model kaydediliyor...")
+    model.save_pretrained(args.cikis)
+    processor.save_pretrained(args.cikis)
+    print(f"✅ İŞLEM BİTTİ! Yeni beynin burada: {args.cikis}")
+    print("   ONNX / TorchScript backend kullanılıyorsa: python model_disa_aktar.py")
+
+def main():
+    parser = argparse.ArgumentParser(description="ViT yemek sınıflandırıcı eğitimi")
+    parser.add_argument("--mod", choices=("tam", "bas"), default="tam", help="tam: tüm ViT ince ayar, bas: sadece sınıflandırma katmanı")
+    parser.add_argument("--omurga", default=None, help="bas modu: dondurulmuş omurga (varsayılan: yeni_model, yoksa temel ViT)")
+    parser.add_argument("--ozellik-klasoru", default=OZELLIK_KLASORU)
+    parser.add_argument("--cikis", default=CIKIS_KLASORU)
+    parser.add_argument("--epoch", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--dogrulama", type=float, default=0.15, help="Sınıf başına doğrulama oranı")
+    parser.add_argument("--batch", type=int, default=64, help="Özellik çıkarma batch boyutu")
+    parser.add_argument("--isci", type=int, default=min(8, os.cpu_count() or 1), help="DataLoader işçi sayısı")
+    parser.add_argument("--veri", choices=("onbellek", "canli"), default="onbellek", help="tam modu: uint8 parça önbelleği veya her turda JPEG çözme")
+    parser.add_argument("--onbellek-klasoru", default=ONBELLEK_KLASORU)
+    parser.add_argument("--tohum", type=int, default=42, help="Önbellek modunda eğitim/doğrulama ayrımı")
+    parser.add_argument("--yukleyici-testi", action="store_true", help="Eğitmeden sadece veri hattının resim/sn hızını ölç")
+    parser.add_argument("--yukleyici-kontrol", action="store_true", help="Küçük sentetik dataset üzerinde önbellek + DataLoader hattını dene")
+    args = parser.parse_args()
+
+    if args.yukleyici_kontrol:
+        yukleyici_kontrolu(args.isci)
+    elif args.mod == "tam":
+        tam_egitim(args)
+    else:
+        bas_egitimi(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+EĞİTİM VERİ ÖNBELLEĞİ (uint8 PARÇALAR)
+
+Tam eğitimde her tur her JPEG'in yeniden çözülüp boyutlandırılması CPU'yu darboğaz
+yapar. Bu modül dataset/ altındaki resimleri bir kez çözer, en-boy oranını koruyarak kısa
+kenarı BOYUT px olacak şekilde küçültür ve uint8 parça dosyalarına art arda (düz dizi
+olarak) yazar; her resmin (yükseklik, genişlik) değeri meta.json'da tutulur (256 px ve
+4:3'te resim başına ~262 KB). Eğitimde parçalar np.memmap ile salt okunur açılır:
+DataLoader işçileri aynı sayfa önbelleğini paylaşır, kopya oluşmaz. Artırma
+(RandomResizedCrop, çevirme) ve normalizasyon (3, H, W) uint8 tensörler üzerinde
+işçilerde yapılır.
+
+Resmin tamamı saklandığı için RandomResizedCrop canlı çözmedeki gibi kenarları da görür,
+doğrulama dönüşümü (Resize(224) + CenterCrop(224)) aynı bölgeyi verir. Tek fark çok uzun
+resimlerdir: uzun kenar MAX_ORAN x BOYUT'u aşarsa ortadan kırpılır (panoramalar diski
+şişirmesin; 4:3 ve 16:9 fotoğraflar kırpılmaz).
+
+Önbellek, dataset/ dosya listesinin (yol, boyut, değişme zamanı) parmak izi değişince
+yeniden kurulur. meta.json en son yazılır; yarıda kalan kurulum kullanılmaz.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+
+from ozellik_deposu import dataset_tara
+
+BOYUT = 256
+PARCA_BOYUTU = 1024  # Parça başına resim
+MAX_ORAN = 2  # Uzun kenar / kısa kenar üst sınırı
+META_SURUMU = 2
+
+
+def _parmak_izi(dosyalar, boyut):
+    ozet = hashlib.sha256(f"{META_SURUMU}:{boyut}:{MAX_ORAN}".encode())
+    for yol, (sinif, mtime, bayt) in sorted(dosyalar.items()):
+        ozet.update(f"{yol}|{sinif}|{mtime}|{bayt}\n".encode())
+    return ozet.hexdigest()[:16]
+
+
+def _coz(yol, boyut):
+    """Resmi kısa kenarı boyut px olan (3, H, W) uint8 diziye çevirir; okunamazsa None"""
+    try:
+        with Image.open(yol) as img:
+            # JPEG'ler hedefe yakın ölçekte çözülür (kısa kenar >= boyut kalır)
+            img.draft("RGB", (boyut, boyut))
+            img = img.convert("RGB")
+            olcek = boyut / min(img.size)
+            img = img.resize((max(boyut, round(img.width * olcek)), max(boyut, round(img.height * olcek))), Image.Resampling.BILINEAR)
+            uzun = boyut * MAX_ORAN
+            if max(img.size) > uzun:
+                genislik, yukseklik = min(img.width, uzun), min(img.height, uzun)
+                sol, ust = (img.width - genislik) // 2, (img.height - yukseklik) // 2
+                img = img.crop((sol, ust, sol + genislik, ust + yukseklik))
+            return np.ascontiguousarray(np.asarray(img, dtype=np.uint8).transpose(2, 0, 1))
+    except Exception as e:
+        print(f"⚠️ Okunamadı, atlanıyor: {yol} ({e})")
+        return None
+
+
+def onbellek_hazirla(dataset_klasoru, klasor, boyut=BOYUT, parca_boyutu=PARCA_BOYUTU, isci=None):
+    """Önbellek güncelse meta'sını, değilse parçaları yeniden yazıp yeni meta'yı döndürür"""
+    dosyalar = dataset_tara(dataset_klasoru)
+    parmak_izi = _parmak_izi(dosyalar, boyut)
+    meta_yolu = os.path.join(klasor, "meta.json")
+    if os.path.exists(meta_yolu):
+        with open(meta_yolu, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("parmak_izi") == parmak_izi:
+            return meta
+        os.remove(meta_yolu)
+
+    os.makedirs(klasor, exist_ok=True)
+    siniflar = sorted({sinif for sinif, _, _ in dosyalar.values()})
+    yollar = sorted(dosyalar)
+    print(f"🗜️ Eğitim önbelleği hazırlanıyor: {len(yollar)} resim -> {klasor} (kısa kenar {boyut} px, uint8)")
+
+    baslangic = time.perf_counter()
+    etiketler, parcalar, sekiller = [], [], []
+    # PIL çözme ve boyutlandırma sırasında GIL'i bırakır; thread'ler yeterli
+    with ThreadPoolExecutor(isci or os.cpu_count()) as havuz:
+        for p, i in enumerate(range(0, len(yollar), parca_boyutu)):
+            grup = yollar[i:i + parca_boyutu]
+            resimler = list(havuz.map(lambda yol: _coz(os.path.join(dataset_klasoru, yol), boyut), grup))
+            gecerli = [(yol, resim) for yol, resim in zip(grup, resimler) if resim is not None]
+            # Resimler farklı boyutlarda; parça düz bir dizi, sınırlar sekiller'den hesaplanır
+            dizi = np.lib.format.open_memmap(
+                os.path.join(klasor, f"parca_{p:04d}.npy"), mode="w+", dtype=np.uint8, shape=(sum(resim.size for _, resim in gecerli),)
+            )
+            ofset = 0
+            for _, resim in gecerli:
+                dizi[ofset:ofset + resim.size] = resim.reshape(-1)
+                ofset += resim.size
+            dizi.flush()
+            del dizi
+            etiketler.extend(siniflar.index(dosyalar[yol][0]) for yol, _ in gecerli)
+            sekiller.extend(list(resim.shape[1:]) for _, resim in gecerli)
+            parcalar.append(len(gecerli))
+            islenen = i + len(grup)
+            print(f"   {islenen}/{len(yollar)} resim ({islenen / (time.perf_counter() - baslangic):.1f} resim/sn)", end="\r")
+    print()
+
+    meta = {"surum": META_SURUMU, "parmak_izi": parmak_izi, "boyut": boyut, "siniflar": siniflar, "max_oran": MAX_ORAN,
+            "parcalar": parcalar, "etiketler": etiketler, "sekiller": sekiller}
+    gecici = meta_yolu + ".tmp"
+    with open(gecici, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(gecici, meta_yolu)
+    return meta
+
+
+class OnbellekKumesi(torch.utils.data.Dataset):
+    """Önbellekteki resimlerden indeksler alt kümesi; {"pixel_values", "label"} döndürür.
+    Parçalar her işçide ilk erişimde açılır (memmap'ler pickle edilip kopyalanmaz)."""
+
+    def __init__(self, klasor, meta, indeksler, donusum):
+        self.klasor = klasor
+        self.indeksler = np.asarray(indeksler, dtype=np.int64)
+        self.donusum = donusum
+        self.etiketler = meta["etiketler"]
+        self._sinirlar = np.cumsum([0] + meta["parcalar"])
+        # Her resmin (yükseklik, genişlik) değeri ve kendi parçası içindeki başlangıcı
+        self._sekiller = np.asarray(meta["sekiller"], dtype=np.int64).reshape(-1, 2)
+        boyutlar = 3 * self._sekiller[:, 0] * self._sekiller[:, 1]
+        self._ofsetler = np.zeros(len(boyutlar), dtype=np.int64)
+        for bas, son in zip(self._sinirlar[:-1], self._sinirlar[1:]):
+            self._ofsetler[bas + 1:son] = np.cumsum(boyutlar[bas:son - 1])
+        self._parcalar = None
+
+    def __len__(self):
+        return len(self.indeksler)
+
+    def _parca(self, p):
+        if self._parcalar is None:
+            self._parcalar = {}
+        if p not in self._parcalar:
+            self._parcalar[p] = np.load(os.path.join(self.klasor, f"parca_{p:04d}.npy"), mmap_mode="r")
+        return self._parcalar[p]
+
+    def __getitem__(self, i):
+        indeks = int(self.indeksler[i])
+        p = int(np.searchsorted(self._sinirlar, indeks, side="right")) - 1
+        yukseklik, genislik = (int(x) for x in self._sekiller[indeks])
+        ofset = int(self._ofsetler[indeks])
+        # memmap salt okunur; torch'a yazılabilir kopya verilir (tek resim)
+        duz = np.array(self._parca(p)[ofset:ofset + 3 * yukseklik * genislik])
+        resim = torch.from_numpy(duz.reshape(3, yukseklik, genislik))
+        return {"pixel_values": self.donusum(resim), "label": self.etiketler[indeks]}
+
+    def __getstate__(self):
+        durum = self.__dict__.copy()
+        durum["_parcalar"] = None
+        return durum
@@ -0,0 +1,235 @@
+"""
+GÜNLÜK BESLENME ÖZETLERİ
+
+Her kullanıcı ve gün için tek bir `gunluk_ozet/{uid}_{YYYY-MM-DD}` dokümanı tutulur.
+/kaydet, /spor-yap ve /sil log yazımını ve özet güncellemesini aynı transaction
+içinde yapar; özet endpoint'leri günün tüm loglarını taramak yerine tek doküman okur.
+
+Özeti henüz olmayan bir güne (eski veriler) ilk yazma veya okuma yapıldığında özet
+o günün loglarından hesaplanıp aynı transaction içinde oluşturulur.
+
+Aylık özetler (`aylik_ozet/{uid}_{YYYY-MM}`) o aydaki günlük özetlerin toplamıdır;
+günlük özetteki her değişiklik aynı transaction'da aylık özete de Increment ile eklenir.
+Tüm özetleri baştan kurmak için: python ozet_yeniden_olustur.py
+
+Toplu kayıtta (/kaydet-toplu) transaction yerine 500 işlemlik batch'ler kullanılır;
+her batch kendi loglarının özet artışlarını da içerir.
+
+Loglara yazılırken `tarih_str` ve `guncelleme` (sunucu zamanı) eklenir; silinen logların
+yerine `silinen_loglar/{doc_id}` kaydı bırakılır. /loglar bunlarla istemcinin son
+senkronundan sonra eklenen ve silinen kayıtları döndürür.
+
+Fonksiyonlar async Firestore istemcisi (firestore_async.client()) ile çalışır.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+
+OZET_KOLEKSIYONU = "gunluk_ozet"
+AYLIK_KOLEKSIYONU = "aylik_ozet"
+SILINEN_KOLEKSIYONU = "silinen_loglar"
+# Silinme kayıtları bu süre sonra Firestore TTL politikasıyla (son_kullanma alanı) silinir;
+# daha eski senkron token'ı ile gelen istemci tam listeyi yeniden alır
+SILINEN_SAKLAMA_GUN = 30
+BATCH_LIMITI = 500  # Firestore batch başına en fazla işlem
+OZET_ALANLARI = ("kalori", "yakilan", "protein", "karbonhidrat", "yag")
+
+
+def ozet_id(uid, tarih_str):
+    return f"{uid}_{tarih_str}"
+
+
+def ay_id(uid, tarih_str):
+    return f"{uid}_{tarih_str[:7]}"
+
+
+def bos_ozet():
+    return {**{alan: 0 for alan in OZET_ALANLARI}, "kayit_sayisi": 0}
+
+
+def log_katkisi(veri):
+    """Bir log kaydının özet alanlarına katkısı"""
+    if veri.get("tur") == "spor":
+        return {"yakilan": veri.get("kalori", 0)}
+    return {alan: veri.get(alan, 0) for alan in ("kalori", "protein", "karbonhidrat", "yag")}
+
+
+def loglardan_ozet(loglar):
+    ozet = bos_ozet()
+    for veri in loglar:
+        for alan, deger in log_katkisi(veri).items():
+            ozet[alan] += deger
+        ozet["kayit_sayisi"] += 1
+    return ozet
+
+
+def gun_sorgusu(db, uid, tarih_str):
+    start = datetime.strptime(tarih_str, "%Y-%m-%d")
+    end = start + timedelta(days=1)
+    return db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih", ">=", start).where("tarih", "<", end)
+
+
+def _log_kaydi(veri, tarih_str):
+    """Firestore'a yazılan log: senkron için gün ve yazılma zamanı eklenir"""
+    return {**veri, "tarih_str": tarih_str, "guncelleme": firestore.SERVER_TIMESTAMP}
+
+
+def _ozet_ref(db, uid, tarih_str):
+    return db.collection(OZET_KOLEKSIYONU).document(ozet_id(uid, tarih_str))
+
+
+def _aylik_artir(transaction, db, uid, tarih_str, fark):
+    """Günlük özetteki değişikliği aylık özete yansıtır (okumadan, Increment ile).
+    transaction yerine bir write batch de verilebilir."""
+    ref = db.collection(AYLIK_KOLEKSIYONU).document(ay_id(uid, tarih_str))
+    transaction.set(ref, {
+        "kullanici_id": uid,
+        "ay": tarih_str[:7],
+        **{alan: firestore.Increment(deger) for alan, deger in fark.items()},
+    }, merge=True)
+
+
+async def _ozet_yaz(transaction, db, uid, tarih_str, veri, isaret, haric_id=None):
+    """Özet varsa Increment ile günceller, yoksa günün loglarından kurar.
+    Transaction'da tüm okumalar yazmalardan önce yapılmalı; bu fonksiyon
+    hem okur hem yazar, bu yüzden log yazımı ondan sonra yapılmalı."""
+    ref = _ozet_ref(db, uid, tarih_str)
+    doc = await ref.get(transaction=transaction)
+    if doc.exists:
+        fark = {alan: isaret * deger for alan, deger in log_katkisi(veri).items()}
+        fark["kayit_sayisi"] = isaret
+        transaction.update(ref, {alan: firestore.Increment(deger) for alan, deger in fark.items()})
+        _aylik_artir(transaction, db, uid, tarih_str, fark)
+        return
+
+    loglar = [d.to_dict() for d in await gun_sorgusu(db, uid, tarih_str).get(transaction=transaction) if d.id != haric_id]
+    if isaret > 0:
+        loglar.append(veri)
+    ozet = loglardan_ozet(loglar)
+    transaction.set(ref, {"kullanici_id": uid, "tarih_str": tarih_str, **ozet})
+    # Özeti olmayan gün aylık toplama hiç katılmamıştı, tamamı eklenir
+    _aylik_artir(transaction, db, uid, tarih_str, ozet)
+
+
+async def log_ekle(db, veri):
+    """Log kaydını ekler ve günün özetini aynı transaction'da günceller; doküman id'si döner"""
+    log_ref = db.collection("yemek_gunlugu").document()
+    tarih_str = veri["tarih"].strftime("%Y-%m-%d")
+
+    @firestore.async_transactional
+    async def islem(transaction):
+        await _ozet_yaz(transaction, db, veri["kullanici_id"], tarih_str, veri, 1)
+        transaction.set(log_ref, _log_kaydi(veri, tarih_str))
+
+    await islem(db.transaction())
+    return log_ref.id
+
+
+async def log_sil(db, doc_id):
+    """Log kaydını siler, günün özetinden düşer ve silinme kaydı bırakır.
+    Silinen kaydın kullanici_id'sini, kayıt yoksa None döndürür"""
+    log_ref = db.collection("yemek_gunlugu").document(doc_id)
+
+    @firestore.async_transactional
+    async def islem(transaction):
+        doc = await log_ref.get(transaction=transaction)
+        if not doc.exists:
+            return None
+        veri = doc.to_dict()
+        tarih_str = veri["tarih"].strftime("%Y-%m-%d")
+        await _ozet_yaz(transaction, db, veri["kullanici_id"], tarih_str, veri, -1, haric_id=doc_id)
+        transaction.delete(log_ref)
+        transaction.set(db.collection(SILINEN_KOLEKSIYONU).document(doc_id), {
+            "kullanici_id": veri["kullanici_id"],
+            "tarih_str": tarih_str,
+            "silinme": firestore.SERVER_TIMESTAMP,
+            "son_kullanma": datetime.now(timezone.utc) + timedelta(days=SILINEN_SAKLAMA_GUN),
+        })
+        return veri["kullanici_id"]
+
+    return await islem(db.transaction())
+
+
+async def ozet_getir(db, uid, tarih_str):
+    """Günün özetini tek doküman okumayla döndürür; yoksa loglardan kurar"""
+    doc = await _ozet_ref(db, uid, tarih_str).get()
+    if doc.exists:
+        return {**bos_ozet(), **doc.to_dict()}
+
+    @firestore.async_transactional
+    async def islem(transaction):
+        ref = _ozet_ref(db, uid, tarih_str)
+        doc = await ref.get(transaction=transaction)
+        if doc.exists:
+            return {**bos_ozet(), **doc.to_dict()}
+        loglar = [d.to_dict() for d in await gun_sorgusu(db, uid, tarih_str).get(transaction=transaction)]
+        ozet = loglardan_ozet(loglar)
+        if loglar:
+            transaction.set(ref, {"kullanici_id": uid, "tarih_str": tarih_str, **ozet})
+            _aylik_artir(transaction, db, uid, tarih_str, ozet)
+        return ozet
+
+    return await islem(db.transaction())
+
+
+async def _batch_yaz(db, parca):
+    """[(indeks, doc_id, veri)] loglarını ve günlük/aylık özet artışlarını tek batch'te yazar"""
+    batch = db.batch()
+    refler = []
+    farklar = defaultdict(lambda: defaultdict(int))  # (uid, gün) -> özet farkı
+    for indeks, doc_id, veri in parca:
+        ref = db.collection("yemek_gunlugu").document(doc_id)
+        tarih_str = veri["tarih"].strftime("%Y-%m-%d")
+        batch.set(ref, _log_kaydi(veri, tarih_str))
+        refler.append((indeks, ref.id))
+        fark = farklar[(veri["kullanici_id"], tarih_str)]
+        for alan, deger in log_katkisi(veri).items():
+            fark[alan] += deger
+        fark["kayit_sayisi"] += 1
+
+    for (uid, tarih_str), fark in farklar.items():
+        batch.set(_ozet_ref(db, uid, tarih_str), {
+            "kullanici_id": uid,
+            "tarih_str": tarih_str,
+            **{alan: firestore.Increment(deger) for alan, deger in fark.items()},
+        }, merge=True)
+        _aylik_artir(batch, db, uid, tarih_str, fark)
+
+    await batch.commit()
+    return refler
+
+
+async def loglari_toplu_ekle(db, veriler, idler=None):
+    """Logları en fazla 500 işlemlik batch'lerle yazar; her log için doküman id'si veya
+    (batch'i yazılamadıysa) Exception içeren liste döner. idler verilmezse id'ler otomatik üretilir."""
+    idler = idler or [None] * len(veriler)
+    gunler = {(veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d")) for veri in veriler}
+    # Özeti olmayan eski günlerin özeti önce loglardan kurulur; böylece batch'teki
+    # merge + Increment eksik bir özet oluşturmaz (logu hiç olmayan gün sıfırdan başlar)
+    await asyncio.gather(*(ozet_getir(db, uid, tarih_str) for uid, tarih_str in gunler))
+
+    # Her batch: loglar + gün başına günlük ve aylık özet yazımı
+    parcalar = [[]]
+    parca_gunleri = set()
+    for indeks, veri in enumerate(veriler):
+        gun = (veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d"))
+        yeni_gunler = parca_gunleri | {gun}
+        if len(parcalar[-1]) + 1 + 2 * len(yeni_gunler) > BATCH_LIMITI:
+            parcalar.append([])
+            yeni_gunler = {gun}
+        parcalar[-1].append((indeks, idler[indeks], veri))
+        parca_gunleri = yeni_gunler
+
+    sonuclar = [None] * len(veriler)
+    for parca in parcalar:
+        if not parca:
+            continue
+        try:
+            for indeks, doc_id in await _batch_yaz(db, parca):
+                sonuclar[indeks] = doc_id
+        except Exception as e:
+            for indeks, _, _ in parca:
+                sonuclar[indeks] = e
+    return sonuclar
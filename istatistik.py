@@ -0,0 +1,109 @@
+"""
+ARALIK İSTATİSTİKLERİ
+
+/istatistik için pencere (7/30/90/365 gün) ve aralık (gun/hafta/ay) bazında kalori,
+yakılan ve makro serileri üretir. Loglar taranmaz:
+- gun / hafta: penceredeki günlük özetler (gunluk_ozet) tek aralık sorgusuyla okunur
+- ay: pencerenin tamamen kapsadığı aylar aylık özetlerden (aylik_ozet), kenardaki
+  yarım aylar günlük özetlerden okunur
+
+Böylece okunan doküman sayısı kullanıcının geçmişi büyüdükçe değil, sadece pencere
+ile artar. "ay" aralığında aylık ve kenar günlük sorgular eşzamanlı gönderilir.
+"""
+import asyncio
+from datetime import date, timedelta
+
+from gunluk_ozet import AYLIK_KOLEKSIYONU, OZET_ALANLARI, OZET_KOLEKSIYONU
+
+PENCERELER = (7, 30, 90, 365)
+ARALIKLAR = ("gun", "hafta", "ay")
+
+GUN_ISIMLERI = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+AY_ISIMLERI = ["Oca", "Şub", "Mar", "Nis", "May", "Haz", "Tem", "Ağu", "Eyl", "Eki", "Kas", "Ara"]
+
+
+def _ay_sonu(gun):
+    sonraki = (gun.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return sonraki - timedelta(days=1)
+
+
+async def gunluk_ozetler(db, uid, baslangic, bitis):
+    """[baslangic, bitis] arasındaki günlük özetler: {"YYYY-MM-DD": özet}"""
+    docs = db.collection(OZET_KOLEKSIYONU).where("kullanici_id", "==", uid).where("tarih_str", ">=", baslangic.isoformat()).where("tarih_str", "<=", bitis.isoformat()).stream()
+    return {veri["tarih_str"]: veri for veri in [d.to_dict() async for d in docs]}
+
+
+async def aylik_ozetler(db, uid, ilk_ay, son_ay):
+    """[ilk_ay, son_ay] arasındaki aylık özetler: {"YYYY-MM": özet}"""
+    docs = db.collection(AYLIK_KOLEKSIYONU).where("kullanici_id", "==", uid).where("ay", ">=", ilk_ay).where("ay", "<=", son_ay).stream()
+    return {veri["ay"]: veri for veri in [d.to_dict() async for d in docs]}
+
+
+def _kova(gun, aralik):
+    if aralik == "hafta":
+        return gun - timedelta(days=gun.weekday())
+    if aralik == "ay":
+        return gun.replace(day=1)
+    return gun
+
+
+def _etiket(kova, aralik, pencere, yillar):
+    if aralik == "ay":
+        return AY_ISIMLERI[kova.month - 1] + (f" {kova.year % 100:02d}" if yillar > 1 else "")
+    if aralik == "gun" and pencere <= 7:
+        return GUN_ISIMLERI[kova.weekday()]
+    return kova.strftime("%d.%m")
+
+
+async def seri_olustur(depo, uid, pencere=7, aralik="gun", bugun=None):
+    """depo: depo.py backend'i (gunluk_ozetler / aylik_ozetler sağlar)"""
+    bugun = bugun or date.today()
+    baslangic = bugun - timedelta(days=pencere - 1)
+
+    # Penceredeki her gün için sıralı kovalar
+    kovalar = {}
+    gun = baslangic
+    while gun <= bugun:
+        kovalar.setdefault(_kova(gun, aralik), {alan: 0 for alan in OZET_ALANLARI})
+        gun += timedelta(days=1)
+
+    def ekle(kova, ozet):
+        for alan in OZET_ALANLARI:
+            kovalar[kova][alan] += ozet.get(alan, 0)
+
+    if aralik == "ay":
+        # Tamamen pencere içindeki aylar aylık özetten
+        tam_aylar = [k for k in kovalar if k >= baslangic and _ay_sonu(k) <= bugun]
+
+        # Kenardaki yarım aylar günlük özetten (en fazla iki kısa aralık sorgusu)
+        kenarlar = []
+        if baslangic.day != 1:
+            kenarlar.append((baslangic, min(_ay_sonu(baslangic), bugun)))
+        if _ay_sonu(bugun) != bugun and (not kenarlar or kenarlar[0][1] < bugun):
+            kenarlar.append((max(bugun.replace(day=1), baslangic), bugun))
+
+        async def aylik_sorgu():
+            if not tam_aylar:
+                return {}
+            return await depo.aylik_ozetler(uid, tam_aylar[0].strftime("%Y-%m"), tam_aylar[-1].strftime("%Y-%m"))
+
+        aylik, *kenar_ozetleri = await asyncio.gather(
+            aylik_sorgu(),
+            *(depo.gunluk_ozetler(uid, ilk, son) for ilk, son in kenarlar),
+        )
+        for kova in tam_aylar:
+            ekle(kova, aylik.get(kova.strftime("%Y-%m"), {}))
+        for gunluk in kenar_ozetleri:
+            for tarih_str, ozet in gunluk.items():
+                ekle(_kova(date.fromisoformat(tarih_str), aralik), ozet)
+    else:
+        for tarih_str, ozet in (await depo.gunluk_ozetler(uid, baslangic, bugun)).items():
+            ekle(_kova(date.fromisoformat(tarih_str), aralik), ozet)
+
+    yillar = len({k.year for k in kovalar})
+    return {
+        "pencere": pencere,
+        "aralik": aralik,
+        "labels": [_etiket(k, aralik, pencere, yillar) for k in kovalar],
+        **{alan: [kovalar[k][alan] for k in kovalar] for alan in OZET_ALANLARI},
+    }
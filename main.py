@@ -1,14 +1,32 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from typing import List
 from fastapi.middleware.cors import CORSMiddleware
-from transformers import ViTImageProcessor, ViTForImageClassification
-from PIL import Image
-import torch
-import io
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse, Response
+from fastapi.encoders import jsonable_encoder
+import numpy as np
+import os
+import time
 import json
+import base64
+import asyncio
+import threading
 import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime, date, timedelta
-from pydantic import BaseModel
+from firebase_admin import credentials, firestore_async
+from datetime import datetime, date, timedelta, timezone
+from pydantic import BaseModel, ValidationError
+from tahmin_kuyrugu import MikroBatchKuyrugu, KuyrukDolu
+from tahmin_onbellek import TahminOnbellegi, bayt_hash, algisal_hash
+from arama_indeksi import AramaIndeksi
+from profil_onbellek import ProfilOnbellegi
+from yanit_onbellek import YanitOnbellegi, etag_eslesir
+from yazma_gunlugu import YazmaGunlugu
+from depo import depo_olustur
+from gunluk_ozet import SILINEN_SAKLAMA_GUN
+import disa_aktarim
+from metrikler import MetrikKaydi, IzlenenDepo, istek_baslat, istek_bitir, ADET_SINIRLARI
+from yavas_istek import YavasIstekProfilleyici
+from istatistik import seri_olustur, PENCERELER, ARALIKLAR, GUN_ISIMLERI
+from on_isleme import HizliOnIsleyici, AsamaZamanlayici, GecersizResim, yukleme_dogrula, MAX_YUKLEME_BAYT
 
 app = FastAPI()
 
@@ -21,31 +39,154 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- 2. FIREBASE BAĞLANTISI ---
-try:
-    if not firebase_admin._apps:
-        cred = credentials.Certificate("firebase_key.json")
-        firebase_admin.initialize_app(cred)
-        print("☁️ Firebase Bağlandı")
-except Exception as e:
-    print(f"❌ Firebase Hatası: {e}")
+# --- METRİKLER (/metrics, Prometheus metin formatı; bkz. metrikler.py) ---
+metrik_kaydi = MetrikKaydi()
+istek_suresi = metrik_kaydi.histogram(
+    "dietapp_istek_suresi_saniye", "HTTP istek süresi", ("method", "yol", "durum"),
+)
+istek_depo_islemi = metrik_kaydi.histogram(
+    "dietapp_istek_depo_islemi", "İstek başına depo işlemi sayısı", ("method", "yol"), ADET_SINIRLARI,
+)
+istek_okunan_dokuman = metrik_kaydi.histogram(
+    "dietapp_istek_okunan_dokuman", "İstek başına okunan doküman sayısı", ("method", "yol"), ADET_SINIRLARI,
+)
+
+# Opsiyonel: YAVAS_ISTEK_MS'yi aşan isteklerin örneklenmiş yığınları (bkz. yavas_istek.py)
+YAVAS_ISTEK_MS = os.getenv("YAVAS_ISTEK_MS")
+yavas_istek_profilleyici = YavasIstekProfilleyici(
+    esik_ms=float(YAVAS_ISTEK_MS),
+    ornek_ms=float(os.getenv("YAVAS_ISTEK_ORNEK_MS", "5")),
+    dizin=os.getenv("YAVAS_ISTEK_DIZIN", "yavas_istekler"),
+) if YAVAS_ISTEK_MS else None
+
+@app.on_event("startup")
+def yavas_istek_profilleyici_baslat():
+    if yavas_istek_profilleyici:
+        yavas_istek_profilleyici.baslat()
+
+@app.middleware("http")
+async def istek_metrikleri(request: Request, call_next):
+    baslangic = time.perf_counter()
+    sayaclar, token = istek_baslat()
+    if yavas_istek_profilleyici:
+        yavas_istek_profilleyici.istek_basladi()
+
+    def kaydet(durum):
+        bitis = time.perf_counter()
+        # Ham yol yerine route şablonu (/gunluk/{uid}); eşleşmeyen yollar tek etikette toplanır
+        route = request.scope.get("route")
+        yol = route.path if route else "eslesmeyen"
+        istek_suresi.gozlemle(bitis - baslangic, method=request.method, yol=yol, durum=durum)
+        istek_depo_islemi.gozlemle(sayaclar["islem"], method=request.method, yol=yol)
+        istek_okunan_dokuman.gozlemle(sayaclar["okunan"], method=request.method, yol=yol)
+        if yavas_istek_profilleyici:
+            yavas_istek_profilleyici.istek_bitti(f"{request.method} {yol}", baslangic, bitis)
+
+    try:
+        yanit = await call_next(request)
+    except BaseException:
+        kaydet(500)
+        raise
+    finally:
+        istek_bitir(token)
+
+    # Gövde endpoint'in görevinde (bağlam kopyasında aynı sayaç sözlüğüyle) üretilir; akış
+    # yanıtlarında (ör. /disa-aktar) depo çağrıları gövde gönderilirken yapıldığı için
+    # ölçüm gövde bittiğinde alınır
+    govde = yanit.body_iterator
+
+    async def olculen_govde():
+        try:
+            async for parca in govde:
+                yield parca
+        finally:
+            kaydet(yanit.status_code)
+
+    yanit.body_iterator = olculen_govde()
+    return yanit
 
-db = firestore.client()
+# --- 2. VERİ DEPOSU ---
+# firestore | sqlite | bellek (bkz. depo.py); sqlite/bellek Firebase olmadan çalışır
+DEPO = os.getenv("DEPO", "firestore")
+SQLITE_DOSYA = os.getenv("SQLITE_DOSYA", "dietapp.db")
+
+db = None
+if DEPO == "firestore":
+    try:
+        if not firebase_admin._apps:
+            cred = credentials.Certificate("firebase_key.json")
+            firebase_admin.initialize_app(cred)
+            print("☁️ Firebase Bağlandı")
+    except Exception as e:
+        print(f"❌ Firebase Hatası: {e}")
+
+    # Async istemci: Firestore beklenirken threadpool thread'i tutulmaz, handler'lar
+    # async def olarak event loop üzerinde çalışır
+    db = firestore_async.client()
+
+# Depo çağrıları işlem/koleksiyon başına sayılır ve süreleri ölçülür
+depo = IzlenenDepo(depo_olustur(DEPO, db, SQLITE_DOSYA), metrik_kaydi)
+print(f"🗄️ Veri deposu: {depo.ad}")
 
 # --- 3. AI MODELİ (21 SINIFLI YENİ BEYİN) ---
 MODEL_PATH = "./yeni_model"  # Eğittiğimiz model klasörü
+# eager | torchscript | compile | int8 | onnx | onnx-int8 (bkz. tahmin_backend.py)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "eager")
 
-print("🧠 Model yükleniyor...")
-try:
-    # AutoModel yerine eğitimde kullandığımız ViT sınıflarını kullanıyoruz
-    processor = ViTImageProcessor.from_pretrained(MODEL_PATH)
-    model = ViTForImageClassification.from_pretrained(MODEL_PATH)
-    print("✅ Model Başarıyla Yüklendi! (21 Yemek Tanınıyor)")
-except Exception as e:
-    print(f"❌ HATA: Model yüklenemedi! {e}")
-    print("⚠️ YEDEK: Google'ın temel modeli yükleniyor...")
-    processor = ViTImageProcessor.from_pretrained("google/vit-base-patch16-224-in21k")
-    model = ViTForImageClassification.from_pretrained("google/vit-base-patch16-224-in21k")
+# Model sunucu açıldıktan sonra arka planda yüklenir; bu sürede arama, kayıt ve
+# su endpoint'leri çalışır, /predict ise 503 döner
+processor = None
+model = None
+on_isleyici = None
+asama_zamanlayici = AsamaZamanlayici(metrik_kaydi.histogram(
+    "dietapp_tahmin_asama_suresi_saniye", "Tahmin aşama süreleri (decode, resize, normalize, forward, postprocess)", ("asama",),
+))
+model_durumu = {"durum": "bekliyor", "hata": None, "yukleme_sn": None}
+
+def _model_yukle():
+    model_durumu["durum"] = "yukleniyor"
+    try:
+        _model_yukle_ve_isit()
+    except Exception as e:
+        print(f"❌ HATA: Model hazırlanamadı! {e}")
+        model_durumu.update(durum="hata", hata=str(e))
+
+def _model_yukle_ve_isit():
+    global processor, model, on_isleyici
+    baslangic = time.perf_counter()
+
+    # Ağır importlar (torch, transformers) sadece burada yapılır
+    from transformers import ViTImageProcessor
+    from tahmin_backend import backend_yukle
+
+    print(f"🧠 Model yükleniyor... (backend: {MODEL_BACKEND})")
+    try:
+        # AutoModel yerine eğitimde kullandığımız ViT sınıflarını kullanıyoruz
+        yeni_processor = ViTImageProcessor.from_pretrained(MODEL_PATH)
+        yeni_model = backend_yukle(MODEL_BACKEND, MODEL_PATH)
+        print("✅ Model Başarıyla Yüklendi! (21 Yemek Tanınıyor)")
+    except Exception as e:
+        print(f"❌ HATA: Model yüklenemedi! {e}")
+        print("⚠️ YEDEK: Google'ın temel modeli yükleniyor...")
+        yeni_processor = ViTImageProcessor.from_pretrained("google/vit-base-patch16-224-in21k")
+        yeni_model = backend_yukle("eager", "google/vit-base-patch16-224-in21k")
+
+    # Isınma: ilk gerçek istek tembel başlatma maliyetini ödemesin
+    boyut = yeni_processor.size
+    yeni_model(np.zeros((1, 3, boyut["height"], boyut["width"]), dtype=np.float32))
+
+    # Resmi küçültülmüş JPEG draft ile çözer, RGB'ye çevirir (PNG transparanlığı hatasını önler)
+    # ve processor ile aynı resize/normalize adımlarını NumPy ile uygular
+    on_isleyici = HizliOnIsleyici(yeni_processor, asama_zamanlayici)
+    processor, model = yeni_processor, yeni_model
+
+    sure = round(time.perf_counter() - baslangic, 2)
+    model_durumu.update(durum="hazir", yukleme_sn=sure)
+    print(f"🔥 Model hazır ({sure} sn)")
+
+@app.on_event("startup")
+def model_yuklemeyi_baslat():
+    threading.Thread(target=_model_yukle, name="model-yukle", daemon=True).start()
 
 # Veritabanlarını Oku
 try:
@@ -60,6 +201,62 @@ try:
 except:
     exercise_database = {}
 
+# Arama indeksleri (her istekte tüm kataloğu taramamak için bir kez kurulur)
+yemek_indeksi = AramaIndeksi(food_database)
+yemek_id_indeksi = AramaIndeksi(food_database, anahtar_dahil=True)
+spor_indeksi = AramaIndeksi(exercise_database)
+
+# Kullanıcı profilleri (kilo, tdee) nadiren değişir; her istekte users/{uid} okunmaz.
+# PROFIL_ONBELLEK_DOSYA verilirse worker'lar ortak SQLite dosyasını paylaşır
+profil_onbellegi = ProfilOnbellegi(
+    max_boyut=int(os.getenv("PROFIL_ONBELLEK_BOYUT", "10000")),
+    ttl_sn=int(os.getenv("PROFIL_ONBELLEK_TTL", "600")),
+    paylasimli_dosya=os.getenv("PROFIL_ONBELLEK_DOSYA") or None,
+    gecersiz_yoklama_ms=int(os.getenv("PROFIL_ONBELLEK_YOKLAMA_MS", "500")),
+)
+
+async def _profil_getir(uid):
+    """users/{uid} profili (önbellekten); doküman yoksa None"""
+    async def yukle():
+        return await depo.profil_getir(uid)
+    return await profil_onbellegi.getir_veya_yukle(uid, yukle)
+
+# Kullanıcı özeti yanıtları (makro, hedef, haftalık, su, dashboard) ETag ile önbelleğe alınır;
+# yazan endpoint'ler kullanıcının sürümünü artırır. Birden fazla worker varsa
+# YANIT_ONBELLEK_DOSYA ile sürümler ortak SQLite dosyasında tutulur
+yanit_onbellegi = YanitOnbellegi(
+    max_boyut=int(os.getenv("YANIT_ONBELLEK_BOYUT", "10000")),
+    max_bayt=int(os.getenv("YANIT_ONBELLEK_MB", "32")) * 1024 * 1024,
+    ttl_sn=int(os.getenv("YANIT_ONBELLEK_TTL", "300")),
+    paylasimli_dosya=os.getenv("YANIT_ONBELLEK_DOSYA") or None,
+)
+
+async def _onbellekli(request, uid, anahtar, uret):
+    """uret() yanıtını (kullanıcı, anahtar) için önbellekten verir; If-None-Match eşleşirse 304.
+    Sadece başarılı yanıtlar saklanır; önbellekte geçerli kayıt varsa depo okunmaz."""
+    surum = yanit_onbellegi.surum(uid)
+    kayit = yanit_onbellegi.getir(uid, anahtar, surum)
+    if kayit is not None:
+        etag, govde = kayit
+    else:
+        yanit = await uret()
+        govde = JSONResponse(jsonable_encoder(yanit)).body
+        if not yanit.get("success"):
+            return Response(govde, media_type="application/json")
+        etag = yanit_onbellegi.koy(uid, anahtar, surum, govde)
+
+    # no-cache: istemci saklayabilir ama her seferinde ETag ile doğrulamalı
+    basliklar = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_eslesir(request.headers.get("if-none-match"), etag):
+        yanit_onbellegi.degismedi += 1
+        return Response(status_code=304, headers=basliklar)
+    return Response(govde, media_type="application/json", headers=basliklar)
+
+def _veri_degisti(*uidler):
+    """Kullanıcının kayıtları değişti; önbellekteki özet yanıtları geçersiz olur"""
+    for uid in uidler:
+        yanit_onbellegi.artir(uid)
+
 # --- 4. DATA MODELLERİ (Pydantic) ---
 class YemekKayit(BaseModel):
     yemek_adi: str
@@ -86,149 +283,455 @@ class SporKayit(BaseModel):
 
 @app.get("/")
 def home():
-    return {"durum": "Sunucu Aktif 🚀", "model": "21 Sınıflı ViT"}
+    return {"durum": "Sunucu Aktif 🚀", "model": "21 Sınıflı ViT", "backend": MODEL_BACKEND, "model_durumu": model_durumu["durum"]}
+
+# --- SAĞLIK KONTROLLERİ ---
+@app.get("/canli")
+def liveness():
+    """Süreç ayakta mı (liveness)"""
+    return {"success": True}
+
+@app.get("/hazir")
+def readiness():
+    """Model yüklenip ısındı mı (readiness); hazır değilse 503"""
+    if model_durumu["durum"] != "hazir":
+        return JSONResponse(status_code=503, content={"success": False, **model_durumu})
+    return {"success": True, **model_durumu}
 
 # --- YAPAY ZEKA TAHMİNİ ---
+# Batch ayarları (ortam değişkeni ile değiştirilebilir)
+BATCH_MAX_BOYUT = int(os.getenv("BATCH_MAX_BOYUT", "8"))
+BATCH_MAX_BEKLEME_MS = int(os.getenv("BATCH_MAX_BEKLEME_MS", "10"))
+TAHMIN_ISCI_SAYISI = int(os.getenv("TAHMIN_ISCI_SAYISI", "1"))
+TAHMIN_MAX_BEKLEYEN = int(os.getenv("TAHMIN_MAX_BEKLEYEN", "64"))
+
+TOP_K = 5  # Sonuçlarda tutulan en olası sınıf sayısı
+
+def _batch_tahmin(pixel_listesi):
+    """Birden fazla resmi tek forward ile sınıflandırır, her resim için etiket + güven + top-k döner"""
+    baslangic = time.perf_counter()
+    logits = model(np.concatenate(pixel_listesi))
+    asama_zamanlayici.kaydet("forward", time.perf_counter() - baslangic)
+
+    baslangic = time.perf_counter()
+
+    # Softmax (taşmayı önlemek için satır maksimumu çıkarılır)
+    olasilik = np.exp(logits - logits.max(-1, keepdims=True))
+    olasilik /= olasilik.sum(-1, keepdims=True)
+
+    sonuclar = []
+    for satir in olasilik:
+        sirali = satir.argsort()[::-1][:TOP_K]
+        sonuclar.append({
+            "label": model.config.id2label[int(sirali[0])],
+            "guven": round(float(satir[sirali[0]]), 4),
+            "top_k": [{"label": model.config.id2label[int(i)], "guven": round(float(satir[i]), 4)} for i in sirali],
+        })
+    asama_zamanlayici.kaydet("postprocess", time.perf_counter() - baslangic)
+    return sonuclar
+
+tahmin_kuyrugu = MikroBatchKuyrugu(
+    _batch_tahmin,
+    on_isle=lambda contents: on_isleyici(contents),
+    max_batch=BATCH_MAX_BOYUT,
+    max_bekleme_ms=BATCH_MAX_BEKLEME_MS,
+    isci_sayisi=TAHMIN_ISCI_SAYISI,
+    max_bekleyen=TAHMIN_MAX_BEKLEYEN,
+    bekleme_metrigi=metrik_kaydi.histogram("dietapp_tahmin_kuyruk_bekleme_saniye", "Tahmin isteğinin batch'e alınana kadar kuyrukta beklediği süre"),
+)
+
+# Tekrar yüklenen fotoğraflar için önbellek (TAHMIN_ONBELLEK_MOD: sha256 | phash)
+TAHMIN_ONBELLEK_BOYUT = int(os.getenv("TAHMIN_ONBELLEK_BOYUT", "1024"))
+TAHMIN_ONBELLEK_TTL = int(os.getenv("TAHMIN_ONBELLEK_TTL", "3600"))
+TAHMIN_ONBELLEK_MOD = os.getenv("TAHMIN_ONBELLEK_MOD", "sha256")
+PHASH_ESIK = int(os.getenv("PHASH_ESIK", "4"))
+
+tahmin_onbellegi = TahminOnbellegi(
+    max_boyut=TAHMIN_ONBELLEK_BOYUT,
+    ttl_sn=TAHMIN_ONBELLEK_TTL,
+    phash_esik=PHASH_ESIK if TAHMIN_ONBELLEK_MOD == "phash" else None,
+)
+
+@app.on_event("startup")
+async def tahmin_kuyrugu_baslat():
+    await tahmin_kuyrugu.baslat()
+
+@app.on_event("shutdown")
+async def tahmin_kuyrugu_durdur():
+    await tahmin_kuyrugu.durdur()
+
+def _mesgul_yaniti(retry_after, mesaj):
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": mesaj},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+def _model_hazir_degil_yaniti():
+    # Yükleme hata verdiyse tekrar denemek işe yaramaz: Retry-After yok, hata döner
+    if model_durumu["durum"] == "hata":
+        return JSONResponse(status_code=503, content={"success": False, "error": f"Model yüklenemedi: {model_durumu['hata']}", **model_durumu})
+    return _mesgul_yaniti(5, "Model henüz yükleniyor")
+
+def _yemek_bilgisi(label):
+    """Etiketi veritabanından bulur, yoksa varsayılan boş veri döner"""
+    info = food_database.get(label)
+    if not info:
+        # Veritabanında yoksa sadece ismini döndür
+        info = {"isim": label.replace("_", " ").title(), "kalori": 0, "birim": "?", "protein":0, "karbonhidrat":0, "yag":0}
+    return info
+
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
+    if model is None:
+        return _model_hazir_degil_yaniti()
     try:
-        # Resmi oku ve RGB'ye çevir (PNG transparanlığı hatasını önler)
-        contents = await file.read()
-        img = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        # Modele ver
-        inputs = processor(images=img, return_tensors="pt")
-        
-        with torch.no_grad():
-            outputs = model(**inputs)
-            # En yüksek olasılıklı sınıfı bul
-            predicted_class_idx = outputs.logits.argmax(-1).item()
-            label = model.config.id2label[predicted_class_idx]
-        
-        print(f"📸 Tahmin Edilen: {label}")
+        # Sınırdan büyük dosyalar tamamı okunmadan reddedilir
+        contents = await file.read(MAX_YUKLEME_BAYT + 1)
+        yukleme_dogrula(contents)
+
+        phash_hesapla = None
+        if TAHMIN_ONBELLEK_MOD == "phash":
+            # Sadece birebir eşleşme yoksa çalışır; havuzu kullandığı için tahminle aynı
+            # kabul kontrolünden geçer
+            phash_hesapla = lambda: tahmin_kuyrugu.kabul_ile(algisal_hash, contents)
 
-        # Etiketi veritabanından bul
-        # Eğer foods.json'da yoksa varsayılan boş veri dön
-        info = food_database.get(label)
+        # Ön işleme ve model tahmin havuzunda çalışır, event loop bloklanmaz
+        # (aynı anda gelen isteklerle tek batch halinde, aynı fotoğraf önbellekten)
+        sonuc, onbellekten = await tahmin_onbellegi.getir_veya_hesapla(
+            bayt_hash(contents), lambda: tahmin_kuyrugu.tahmin_et(contents), phash_hesapla
+        )
+        label = sonuc["label"]
         
-        if not info:
-            # Veritabanında yoksa sadece ismini döndür
-            info = {"isim": label.replace("_", " ").title(), "kalori": 0, "birim": "?", "protein":0, "karbonhidrat":0, "yag":0}
+        print(f"📸 Tahmin Edilen: {label}{' (önbellek)' if onbellekten else ''}")
 
-        return {"success": True, "data": info}
+        return {"success": True, "data": _yemek_bilgisi(label)}
         
+    except KuyrukDolu as e:
+        return _mesgul_yaniti(e.retry_after, str(e))
+    except GecersizResim as e:
+        return JSONResponse(status_code=e.status_code, content={"success": False, "error": str(e)})
     except Exception as e:
         print(f"Hata: {e}")
         return {"success": False, "error": str(e)}
 
+# --- ÇOKLU RESİM TAHMİNİ ---
+TOPLU_MAX_RESIM = int(os.getenv("TOPLU_MAX_RESIM", "16"))
+
+@app.post("/predict-batch")
+async def predict_batch(files: List[UploadFile] = File(...), k: int = 3):
+    """Galeriden seçilen birden fazla resmi tek istekte ve tek batch forward'da tanır"""
+    if model is None:
+        return _model_hazir_degil_yaniti()
+    if len(files) > TOPLU_MAX_RESIM:
+        return JSONResponse(status_code=413, content={"success": False, "error": f"En fazla {TOPLU_MAX_RESIM} resim gönderilebilir"})
+    k = max(1, min(k, TOP_K))
+
+    try:
+        icerikler = [await f.read(MAX_YUKLEME_BAYT + 1) for f in files]
+        # Ön işleme havuzda paralel, sınıflandırma tek forward'da
+        sonuclar = await tahmin_kuyrugu.tahmin_et_toplu(icerikler)
+    except KuyrukDolu as e:
+        return _mesgul_yaniti(e.retry_after, str(e))
+    except Exception as e:
+        print(f"Hata: {e}")
+        return {"success": False, "error": str(e)}
+
+    sonuc_listesi = []
+    for f, sonuc in zip(files, sonuclar):
+        if isinstance(sonuc, Exception):
+            sonuc_listesi.append({"dosya": f.filename, "success": False, "error": str(sonuc)})
+            continue
+        sonuc_listesi.append({
+            "dosya": f.filename,
+            "success": True,
+            "label": sonuc["label"],
+            "guven": sonuc["guven"],
+            "top_k": [{**t, "isim": _yemek_bilgisi(t["label"])["isim"]} for t in sonuc["top_k"][:k]],
+            "data": _yemek_bilgisi(sonuc["label"]),
+        })
+    print(f"📸 Toplu Tahmin: {[s.get('label') for s in sonuc_listesi]}")
+
+    return {"success": True, "sonuclar": sonuc_listesi}
+
+@app.get("/tahmin-istatistik")
+def tahmin_istatistik():
+    """Batch kuyruğu derinliği, batch boyutu ve kuyrukta bekleme süresi histogramları,
+    aşama süreleri (decode / resize / normalize / forward / postprocess)"""
+    return {
+        "success": True,
+        **tahmin_kuyrugu.istatistik(),
+        "asamalar": asama_zamanlayici.istatistik(),
+        "onbellek": tahmin_onbellegi.istatistik(),
+    }
+
 # --- YEMEK ARAMA ---
+# Bulanık (yazım hatası toleranslı) arama için sorgu başına süre bütçesi
+BULANIK_BUTCE_MS = float(os.getenv("BULANIK_BUTCE_MS", "5"))
+
+def _skorlu_ara(indeks, q, limit, bulanik):
+    """Tam eşleşmeler + (istenirse) bulanık eşleşmeler: [(id, eslesme, skor)], zaman_asimi"""
+    if not bulanik:
+        return [(k, "tam", 1.0) for k in indeks.ara(q, limit)], False
+    return indeks.ara_skorlu(q, limit, BULANIK_BUTCE_MS)
+
 @app.get("/ara-yemek")
-def ara_yemek(q: str):
-    """Yemek veritabanında arama yapar"""
+def ara_yemek(q: str, limit: int = 20, bulanik: bool = True):
+    """Yemek veritabanında arama yapar (yazım hatalarına toleranslı)"""
     try:
         sonuclar = []
-        query = q.lower()
-        for yemek_id, yemek in food_database.items():
-            if query in yemek["isim"].lower():
-                sonuclar.append({
-                    "id": yemek_id,
-                    "isim": yemek["isim"],
-                    "kalori": yemek["kalori"],
-                    "protein": yemek["protein"],
-                    "karbonhidrat": yemek["karbonhidrat"],
-                    "yag": yemek["yag"],
-                    "birim": yemek["birim"]
-                })
-        return {"sonuclar": sonuclar}
+        eslesmeler, zaman_asimi = _skorlu_ara(yemek_indeksi, q, limit, bulanik)
+        for yemek_id, eslesme, skor in eslesmeler:
+            yemek = food_database[yemek_id]
+            sonuclar.append({
+                "id": yemek_id,
+                "isim": yemek["isim"],
+                "kalori": yemek["kalori"],
+                "protein": yemek["protein"],
+                "karbonhidrat": yemek["karbonhidrat"],
+                "yag": yemek["yag"],
+                "birim": yemek["birim"],
+                "eslesme": eslesme,
+                "skor": skor
+            })
+        return {"sonuclar": sonuclar, "zaman_asimi": zaman_asimi}
     except Exception as e:
         return {"sonuclar": []}
 
 # --- SPOR ARAMA ---
 @app.get("/ara-spor")
-def ara_spor(q: str):
-    """Egzersiz veritabanında arama yapar"""
+def ara_spor(q: str, limit: int = 20, bulanik: bool = True):
+    """Egzersiz veritabanında arama yapar (yazım hatalarına toleranslı)"""
     try:
         sonuclar = []
-        query = q.lower()
-        for spor_id, spor in exercise_database.items():
-            if query in spor["isim"].lower():
-                sonuclar.append({
-                    "id": spor_id,
-                    "isim": spor["isim"],
-                    "met": spor["met"]
-                })
-        return {"sonuclar": sonuclar}
+        eslesmeler, zaman_asimi = _skorlu_ara(spor_indeksi, q, limit, bulanik)
+        for spor_id, eslesme, skor in eslesmeler:
+            spor = exercise_database[spor_id]
+            sonuclar.append({
+                "id": spor_id,
+                "isim": spor["isim"],
+                "met": spor["met"],
+                "eslesme": eslesme,
+                "skor": skor
+            })
+        return {"sonuclar": sonuclar, "zaman_asimi": zaman_asimi}
     except Exception as e:
         return {"sonuclar": []}
 
+# --- GERİ YAZMALI KAYIT (OPSİYONEL) ---
+# YAZMA_GUNLUGU_DOSYA verilirse /su-ic, /kaydet ve /spor-yap kaydı yerel günlüğe
+# fsync edince onaylar; Firestore'a arka planda gruplar halinde yazılır (bkz. yazma_gunlugu.py)
+YAZMA_GUNLUGU_DOSYA = os.getenv("YAZMA_GUNLUGU_DOSYA")
+YAZMA_ARALIK_MS = int(os.getenv("YAZMA_ARALIK_MS", "200"))
+YAZMA_MAX_GRUP = int(os.getenv("YAZMA_MAX_GRUP", "400"))
+
+async def _gunlukten_yaz(kayitlar, dogrula):
+    """Günlükteki log ve su kayıtlarını batch'lerle Firestore'a yazar"""
+    if dogrula:
+        # Çökme / hatalı deneme sonrası: dokümanı zaten oluşmuş kayıtlar tekrar yazılmaz
+        mevcut = await depo.var_olan_idler(
+            [k["id"] for k in kayitlar if k["tur"] == "log"],
+            [k["id"] for k in kayitlar if k["tur"] == "su"],
+        )
+        kayitlar = [k for k in kayitlar if k["id"] not in mevcut]
+
+    loglar = [k for k in kayitlar if k["tur"] == "log"]
+    sular = [k for k in kayitlar if k["tur"] == "su"]
+    if loglar:
+        sonuclar = await depo.loglari_toplu_ekle([k["veri"] for k in loglar], [k["id"] for k in loglar])
+        hatalar = [s for s in sonuclar if isinstance(s, Exception)]
+        if hatalar:
+            raise hatalar[0]
+    if sular:
+        await depo.su_toplu_ekle([{**k["veri"], "id": k["id"]} for k in sular])
+
+yazma_gunlugu = YazmaGunlugu(YAZMA_GUNLUGU_DOSYA, _gunlukten_yaz, YAZMA_ARALIK_MS, YAZMA_MAX_GRUP) if YAZMA_GUNLUGU_DOSYA else None
+
+@app.on_event("startup")
+async def yazma_gunlugu_baslat():
+    if yazma_gunlugu:
+        await yazma_gunlugu.baslat()
+
+@app.on_event("shutdown")
+async def yazma_gunlugu_durdur():
+    if yazma_gunlugu:
+        await yazma_gunlugu.durdur()
+
+async def _log_yaz(veri):
+    """Log kaydı: geri yazmalı modda günlüğe, değilse doğrudan transaction ile"""
+    if yazma_gunlugu:
+        await yazma_gunlugu.ekle({"tur": "log", "uid": veri["kullanici_id"], "veri": veri})
+    else:
+        await depo.log_ekle(veri)
+
+async def _bekleyenleri_yaz(uid):
+    """Okumadan önce kullanıcının günlükte bekleyen kayıtlarını yazar (yazdığını görsün)"""
+    if yazma_gunlugu and yazma_gunlugu.bekleyen_var(uid):
+        await yazma_gunlugu.bosalt()
+
+@app.get("/yazma-istatistik")
+def write_behind_stats():
+    """Geri yazmalı günlük: bekleyen kayıt, grup ve fsync sayıları"""
+    if not yazma_gunlugu:
+        return {"success": True, "aktif": False}
+    return {"success": True, **yazma_gunlugu.istatistik()}
+
+# Diğer bileşenlerin anlık durumları okuma anında /metrics'e eklenir
+metrik_kaydi.gosterge("dietapp_model_hazir", "Model yüklendi mi (1/0)", lambda: int(model_durumu["durum"] == "hazir"))
+metrik_kaydi.gosterge("dietapp_tahmin_bekleyen", "Tahmin kuyruğunda bekleyen istek", lambda: tahmin_kuyrugu.istatistik()["bekleyen"])
+metrik_kaydi.gosterge(
+    "dietapp_onbellek_isabet_orani", "Önbellek isabet oranı",
+    lambda: {"tahmin": tahmin_onbellegi.istatistik()["isabet_orani"], "profil": profil_onbellegi.istatistik()["isabet_orani"],
+            "yanit": yanit_onbellegi.istatistik()["isabet_orani"]},
+    etiket="onbellek",
+)
+metrik_kaydi.gosterge(
+    "dietapp_yazma_gunlugu_bekleyen", "Geri yazmalı günlükte bekleyen kayıt",
+    lambda: yazma_gunlugu.istatistik()["bekleyen"] if yazma_gunlugu else 0,
+)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metin formatında istek, tahmin aşaması ve depo metrikleri"""
+    return PlainTextResponse(metrik_kaydi.metin(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/yavas-istekler")
+def slow_requests():
+    """YAVAS_ISTEK_MS açıksa son yavaş isteklerin profil dosyaları"""
+    if not yavas_istek_profilleyici:
+        return {"success": True, "aktif": False}
+    return {"success": True, **yavas_istek_profilleyici.istatistik()}
+
 # --- YEMEK KAYIT ---
-@app.post("/kaydet")
-def save(k: YemekKayit):
-    try:
-        if k.tarih_str:
-            kayit_tarihi = datetime.strptime(k.tarih_str, "%Y-%m-%d")
-            simdi = datetime.now()
-            kayit_tarihi = kayit_tarihi.replace(hour=simdi.hour, minute=simdi.minute)
-        else:
-            kayit_tarihi = datetime.now()
+def _kayit_tarihi(tarih_str):
+    """Seçilen gün + şu anki saat (geçmiş güne kayıt için), tarih yoksa şimdi"""
+    if tarih_str:
+        kayit_tarihi = datetime.strptime(tarih_str, "%Y-%m-%d")
+        simdi = datetime.now()
+        return kayit_tarihi.replace(hour=simdi.hour, minute=simdi.minute)
+    return datetime.now()
 
-        veri = {
-            **k.dict(), 
-            "tarih": kayit_tarihi,
-            "tur": "yemek",
-            "ogun": k.ogun if k.ogun else "Atıştırmalık"
-        }
-        if "tarih_str" in veri: del veri["tarih_str"]
+def _yemek_verisi(k):
+    veri = {
+        **k.dict(), 
+        "tarih": _kayit_tarihi(k.tarih_str),
+        "tur": "yemek",
+        "ogun": k.ogun if k.ogun else "Atıştırmalık"
+    }
+    if "tarih_str" in veri: del veri["tarih_str"]
+    return veri
+
+def _spor_verisi(kayit, egzersiz, kilo):
+    yakilan = int(egzersiz["met"] * float(kilo) * (kayit.sure_dk / 60))
+    return {
+        "aktivite_adi": egzersiz["isim"],
+        "sure_dk": kayit.sure_dk,
+        "kalori": yakilan,
+        "tarih": _kayit_tarihi(kayit.tarih_str),
+        "kullanici_id": kayit.kullanici_id,
+        "tur": "spor"
+    }
 
-        db.collection("yemek_gunlugu").add(veri)
+@app.post("/kaydet")
+async def save(k: YemekKayit):
+    try:
+        # Log ve günlük özet aynı transaction'da yazılır (geri yazmalı modda günlüğe)
+        await _log_yaz(_yemek_verisi(k))
+        _veri_degisti(k.kullanici_id)
         return {"success": True}
     except Exception as e: return {"success": False, "error": str(e)}
 
 # --- SPOR KAYIT ---
 @app.post("/spor-yap")
-def add_exercise(kayit: SporKayit):
+async def add_exercise(kayit: SporKayit):
     try:
         egzersiz = exercise_database.get(kayit.egzersiz_id)
         if not egzersiz: return {"success": False, "error": "Bulunamadı"}
 
-        user_doc = db.collection("users").document(kayit.kullanici_id).get()
-        kilo = user_doc.to_dict().get("kilo", 70) if user_doc.exists else 70
-        yakilan = int(egzersiz["met"] * float(kilo) * (kayit.sure_dk / 60))
-        
-        if kayit.tarih_str:
-            kayit_tarihi = datetime.strptime(kayit.tarih_str, "%Y-%m-%d")
-            simdi = datetime.now()
-            kayit_tarihi = kayit_tarihi.replace(hour=simdi.hour, minute=simdi.minute)
-        else:
-            kayit_tarihi = datetime.now()
-
-        yeni_veri = {
-            "aktivite_adi": egzersiz["isim"],
-            "sure_dk": kayit.sure_dk,
-            "kalori": yakilan,
-            "tarih": kayit_tarihi,
-            "kullanici_id": kayit.kullanici_id,
-            "tur": "spor"
-        }
-        db.collection("yemek_gunlugu").add(yeni_veri)
+        profil = await _profil_getir(kayit.kullanici_id)
+        kilo = profil.get("kilo", 70) if profil else 70
+        await _log_yaz(_spor_verisi(kayit, egzersiz, kilo))
+        _veri_degisti(kayit.kullanici_id)
         return {"success": True}
     except Exception as e: return {"success": False, "error": str(e)}
 
+# --- TOPLU KAYIT ---
+TOPLU_MAX_KAYIT = int(os.getenv("TOPLU_MAX_KAYIT", "1000"))
+
+class TopluKayit(BaseModel):
+    # Her öğe YemekKayit ya da SporKayit (egzersiz_id içeren) alanlarını taşır;
+    # öğeler tek tek doğrulanır, hatalı öğe diğerlerini engellemez
+    kayitlar: List[dict]
+
+@app.post("/kaydet-toplu")
+async def save_bulk(istek: TopluKayit):
+    """Bir günün tamamını veya çevrimdışıyken biriken kayıtları tek istekte yazar.
+    Spor kalorisi için her kullanıcının profili bir kez okunur, kayıtlar 500 işlemlik
+    batch'lerle yazılır. Her öğe için {"success", "id" | "error"} döner."""
+    if len(istek.kayitlar) > TOPLU_MAX_KAYIT:
+        return JSONResponse(status_code=413, content={"success": False, "error": f"En fazla {TOPLU_MAX_KAYIT} kayıt gönderilebilir"})
+
+    sonuclar = [None] * len(istek.kayitlar)
+    yemekler, sporlar = [], []  # (indeks, model)
+    for i, oge in enumerate(istek.kayitlar):
+        try:
+            if "egzersiz_id" in oge:
+                kayit = SporKayit(**oge)
+                if kayit.egzersiz_id not in exercise_database:
+                    sonuclar[i] = {"success": False, "error": "Bulunamadı"}
+                    continue
+                sporlar.append((i, kayit))
+            else:
+                yemekler.append((i, YemekKayit(**oge)))
+        except ValidationError as e:
+            hatalar = "; ".join(f"{'.'.join(map(str, h['loc']))}: {h['msg']}" for h in e.errors())
+            sonuclar[i] = {"success": False, "error": hatalar}
+
+    try:
+        # Spor kaydı olan her kullanıcı için tek profil okuması (önbellekten)
+        uidler = sorted({kayit.kullanici_id for _, kayit in sporlar})
+        profiller = dict(zip(uidler, await asyncio.gather(*(_profil_getir(uid) for uid in uidler))))
+
+        veriler = [(i, _yemek_verisi(k)) for i, k in yemekler]
+        for i, kayit in sporlar:
+            profil = profiller[kayit.kullanici_id]
+            kilo = profil.get("kilo", 70) if profil else 70
+            veriler.append((i, _spor_verisi(kayit, exercise_database[kayit.egzersiz_id], kilo)))
+        veriler.sort(key=lambda x: x[0])
+
+        yazilan = await depo.loglari_toplu_ekle([veri for _, veri in veriler])
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    finally:
+        # Hata durumunda da bazı batch'ler yazılmış olabilir
+        _veri_degisti(*{kayit.kullanici_id for _, kayit in yemekler + sporlar})
+
+    for (i, _), sonuc in zip(veriler, yazilan):
+        if isinstance(sonuc, Exception):
+            sonuclar[i] = {"success": False, "error": str(sonuc)}
+        else:
+            sonuclar[i] = {"success": True, "id": sonuc}
+
+    basarili = sum(1 for s in sonuclar if s["success"])
+    print(f"📝 Toplu Kayıt: {basarili}/{len(sonuclar)} başarılı")
+    return {"success": basarili == len(sonuclar), "basarili": basarili, "sonuclar": sonuclar}
+
 # --- GÜNLÜK LİSTELEME ---
 @app.get("/gunluk/{uid}")
-def get_logs(uid: str, tarih: str = None):
+async def get_logs(uid: str, tarih: str = None):
     if not tarih: tarih = date.today().strftime("%Y-%m-%d")
     try:
+        await _bekleyenleri_yaz(uid)
         start = datetime.strptime(tarih, "%Y-%m-%d")
         end = start + timedelta(days=1)
-        docs = db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih", ">=", start).where("tarih", "<", end).order_by("tarih", direction=firestore.Query.DESCENDING).stream()
+        loglar = await depo.gun_loglari(uid, start, end, azalan=True)
         
         liste = []
         toplam = {"kalori": 0, "yakilan": 0, "protein": 0, "karbonhidrat": 0, "yag": 0}
         
-        for doc in docs:
-            veri = doc.to_dict()
-            veri["id"] = doc.id
+        for doc_id, veri in loglar:
+            for alan in _SENKRON_ALANLARI: veri.pop(alan, None)
+            veri["id"] = doc_id
             if "tarih" in veri: veri["tarih"] = veri["tarih"].strftime("%d.%m.%Y %H:%M")
             liste.append(veri)
             
@@ -243,160 +746,382 @@ def get_logs(uid: str, tarih: str = None):
         return {"success": True, "logs": liste, "total_calories": toplam["kalori"], "total_burnt": toplam["yakilan"], "total_protein": toplam["protein"], "total_carb": toplam["karbonhidrat"], "total_fat": toplam["yag"]}
     except Exception as e: return {"success": False, "error": str(e)}
 
+# --- SAYFALI / DELTA LOG API ---
+LOG_SAYFA_BOYUTU = 50
+LOG_MAX_SAYFA = 200
+# select ile istenebilecek alanlar (id her zaman döner)
+LOG_ALANLARI = ("yemek_adi", "kalori", "protein", "karbonhidrat", "yag", "porsiyon", "ogun", "tur", "aktivite_adi", "sure_dk", "tarih")
+# Depoya senkron için yazılan alanlar; istemciye gönderilmez
+_SENKRON_ALANLARI = ("guncelleme", "tarih_str")
+# Senkron token'ı sorgu zamanından bu kadar geriden verilir: sunucu saatleri arasındaki fark
+# ve sorgu sırasında commit edilen yazmalar kaçmaz (istemci kayıtları id ile birleştirir)
+SENKRON_PAYI_SN = 5
+
+def _token_kodla(deger):
+    return base64.urlsafe_b64encode(json.dumps(deger).encode()).decode().rstrip("=")
+
+def _token_coz(token):
+    return json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+
+def _log_ciktisi(doc_id, veri, alanlar):
+    cikti = {"id": doc_id}
+    for alan in alanlar or veri:
+        if alan in veri and alan not in _SENKRON_ALANLARI:
+            cikti[alan] = veri[alan]
+    if "tarih" in cikti:
+        cikti["tarih"] = cikti["tarih"].isoformat(timespec="minutes")
+    return cikti
+
+@app.get("/loglar/{uid}")
+async def get_logs_page(uid: str, tarih: str = None, select: str = None, limit: int = LOG_SAYFA_BOYUTU, cursor: str = None, since: str = None):
+    """Günün logları: imleçli sayfalama (cursor), alan seçimi (select) ve since ile sadece
+    son senkrondan sonra eklenen loglar + silinen log id'leri"""
+    if not tarih: tarih = date.today().strftime("%Y-%m-%d")
+    try:
+        alanlar = None
+        if select:
+            alanlar = [a.strip() for a in select.split(",") if a.strip()]
+            bilinmeyen = sorted(set(alanlar) - set(LOG_ALANLARI))
+            if bilinmeyen:
+                return {"success": False, "error": f"Bilinmeyen alan(lar): {', '.join(bilinmeyen)}"}
+        limit = max(1, min(limit, LOG_MAX_SAYFA))
+        try:
+            imlec = None
+            if cursor:
+                imlec = _token_coz(cursor)
+                imlec = (datetime.fromisoformat(imlec["t"]), imlec["id"])
+            sonra = datetime.fromisoformat(_token_coz(since)["t"]) if since else None
+        except (ValueError, KeyError, TypeError):
+            return {"success": False, "error": "Geçersiz cursor veya since"}
+
+        await _bekleyenleri_yaz(uid)
+        simdi = datetime.now(timezone.utc)
+        yanit = {"success": True, "tarih": tarih, "senkron": _token_kodla({"t": (simdi - timedelta(seconds=SENKRON_PAYI_SN)).isoformat()})}
+        # Silinme kayıtları saklama süresinden eski token ile eksik kalabilir: tam liste döner
+        if sonra is not None and sonra < simdi - timedelta(days=SILINEN_SAKLAMA_GUN):
+            sonra = None
+
+        ozet = None
+        if sonra is not None:
+            (loglar, silinen), ozet = await asyncio.gather(
+                depo.log_degisiklikleri(uid, tarih, sonra, alanlar),
+                depo.ozet_getir(uid, tarih),
+            )
+            yanit.update(tam=False, silinen=silinen, sonraki=None)
+        else:
+            start = datetime.strptime(tarih, "%Y-%m-%d")
+            sayfa = depo.log_sayfasi(uid, start, start + timedelta(days=1), alanlar, limit, imlec)
+            if imlec:
+                loglar, sonraki = await sayfa
+            else:
+                # Günün toplamları ilk sayfayla birlikte (özet dokümanından, tek okuma)
+                (loglar, sonraki), ozet = await asyncio.gather(sayfa, depo.ozet_getir(uid, tarih))
+            yanit.update(tam=True, silinen=[], sonraki=sonraki and _token_kodla({"t": sonraki[0].isoformat(), "id": sonraki[1]}))
+
+        yanit["logs"] = [_log_ciktisi(doc_id, veri, alanlar) for doc_id, veri in loglar]
+        if ozet is not None:
+            yanit.update(total_calories=ozet["kalori"], total_burnt=ozet["yakilan"], total_protein=ozet["protein"], total_carb=ozet["karbonhidrat"], total_fat=ozet["yag"])
+        return yanit
+    except Exception as e: return {"success": False, "error": str(e)}
+
 # --- ARAMA İŞLEMLERİ ---
 @app.get("/arama/{terim}")
-def search_food(terim: str):
+def search_food(terim: str, limit: int = 20, bulanik: bool = True):
     try:
-        res = []
-        for k, v in food_database.items():
-            if terim.lower() in k.lower() or terim.lower() in v['isim'].lower():
-                res.append({"id": k, **v})
-        return {"success": True, "results": res[:20]}
+        eslesmeler, zaman_asimi = _skorlu_ara(yemek_id_indeksi, terim, limit, bulanik)
+        res = [{"id": k, **food_database[k], "eslesme": eslesme, "skor": skor} for k, eslesme, skor in eslesmeler]
+        return {"success": True, "results": res, "zaman_asimi": zaman_asimi}
     except Exception as e: return {"success": False, "error": str(e)}
 
 @app.get("/egzersiz-ara/{terim}")
-def search_exercise(terim: str):
+def search_exercise(terim: str, limit: int = 20, bulanik: bool = True):
     try:
         res = []
-        for k, v in exercise_database.items():
-            if terim.lower() in v['isim'].lower():
-                res.append({"id": k, "isim": v["isim"], "met": v["met"]})
-        return {"success": False, "message": "Tanınmadı"}
+        eslesmeler, zaman_asimi = _skorlu_ara(spor_indeksi, terim, limit, bulanik)
+        for k, eslesme, skor in eslesmeler:
+            v = exercise_database[k]
+            res.append({"id": k, "isim": v["isim"], "met": v["met"], "eslesme": eslesme, "skor": skor})
+        return {"success": True, "results": res, "zaman_asimi": zaman_asimi}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- SU TAKİBİ ---
 @app.get("/su-durumu/{uid}")
-def get_water(uid: str):
-    try:
-        bugun = date.today().strftime("%Y-%m-%d")
-        docs = db.collection("su_takibi").where("kullanici_id", "==", uid).where("tarih_str", "==", bugun).stream()
-        return {"success": True, "toplam": sum([d.to_dict().get("miktar", 0) for d in docs])}
-    except Exception as e: return {"success": False, "error": str(e)}
+async def get_water(uid: str, request: Request):
+    bugun = date.today().strftime("%Y-%m-%d")
+
+    async def uret():
+        try:
+            # Günün kayıtları yerine tek sayaç dokümanı okunur
+            await _bekleyenleri_yaz(uid)
+            return {"success": True, "toplam": await depo.su_getir(uid, bugun)}
+        except Exception as e: return {"success": False, "error": str(e)}
+
+    return await _onbellekli(request, uid, f"su-durumu:{bugun}", uret)
 
 @app.post("/su-ic")
-def drink(k: SuKayit):
+async def drink(k: SuKayit):
     try:
-        db.collection("su_takibi").add({**k.dict(), "tarih": datetime.now(), "tarih_str": date.today().strftime("%Y-%m-%d")})
+        # Olay kaydı + günlük sayaç (Increment) tek batch'te (geri yazmalı modda günlüğe)
+        if yazma_gunlugu:
+            await yazma_gunlugu.ekle({"tur": "su", "uid": k.kullanici_id, "veri": {"kullanici_id": k.kullanici_id, "miktar": k.miktar, "tarih": datetime.now()}})
+        else:
+            await depo.su_toplu_ekle([{"kullanici_id": k.kullanici_id, "miktar": k.miktar, "tarih": datetime.now()}])
+        _veri_degisti(k.kullanici_id)
         return {"success": True}
     except Exception as e: return {"success": False, "error": str(e)}
 
+SU_GECMISI_MAX_GUN = 366
+
+@app.get("/su-gecmisi/{uid}")
+async def get_water_history(uid: str, baslangic: str = None, bitis: str = None):
+    """[baslangic, bitis] (YYYY-MM-DD, varsayılan son 7 gün) için günlük su toplamları"""
+    try:
+        bitis_gunu = datetime.strptime(bitis, "%Y-%m-%d").date() if bitis else date.today()
+        baslangic_gunu = datetime.strptime(baslangic, "%Y-%m-%d").date() if baslangic else bitis_gunu - timedelta(days=6)
+        gun_sayisi = (bitis_gunu - baslangic_gunu).days + 1
+        if gun_sayisi < 1 or gun_sayisi > SU_GECMISI_MAX_GUN:
+            return {"success": False, "error": f"Aralık 1-{SU_GECMISI_MAX_GUN} gün olmalı"}
+
+        toplamlar = await depo.su_araligi(uid, baslangic_gunu, bitis_gunu)
+        gunler = [(baslangic_gunu + timedelta(days=i)).isoformat() for i in range(gun_sayisi)]
+        return {"success": True, "labels": gunler, "toplam": [toplamlar.get(g, 0) for g in gunler]}
+    except Exception as e: return {"success": False, "error": str(e)}
+
 # --- KAYIT SİLME ---
 @app.delete("/sil/{doc_id}")
-def delete(doc_id: str):
+async def delete(doc_id: str):
     try:
-        db.collection("yemek_gunlugu").document(doc_id).delete()
+        # Günlük özetten de düşülür; kayıt henüz günlükte bekliyor olabilir, önce yazılır
+        if yazma_gunlugu:
+            await yazma_gunlugu.bosalt()
+        uid = await depo.log_sil(doc_id)
+        if uid:
+            _veri_degisti(uid)
         return {"success": True}
     except Exception as e: return {"success": False, "error": str(e)}
 
+# --- GEÇMİŞ DIŞA AKTARIMI ---
+@app.get("/disa-aktar/{uid}")
+async def export_history(uid: str, kaynak: str = "yemek_gunlugu", format: str = "ndjson", sikistirma: str = "yok", baslangic: str = None, bitis: str = None):
+    """Kullanıcının yemek_gunlugu / su_takibi geçmişi; depodan sayfa sayfa okunup akış halinde
+    gönderilir, bellek kullanımı geçmişin uzunluğuna bağlı değildir (bkz. disa_aktarim.py)"""
+    if kaynak not in disa_aktarim.SUTUNLAR:
+        return {"success": False, "error": f"kaynak şunlardan biri olmalı: {tuple(disa_aktarim.SUTUNLAR)}"}
+    if format not in disa_aktarim.FORMATLAR:
+        return {"success": False, "error": f"format şunlardan biri olmalı: {disa_aktarim.FORMATLAR}"}
+    if sikistirma not in disa_aktarim.SIKISTIRMALAR:
+        return {"success": False, "error": f"sikistirma şunlardan biri olmalı: {disa_aktarim.SIKISTIRMALAR}"}
+    eksik = disa_aktarim.bagimlilik_kontrol(format, sikistirma)
+    if eksik:
+        return {"success": False, "error": eksik}
+    try:
+        ilk = datetime.strptime(baslangic, "%Y-%m-%d") if baslangic else disa_aktarim.EN_ESKI
+        son = datetime.strptime(bitis, "%Y-%m-%d") + timedelta(days=1) if bitis else disa_aktarim.EN_YENI
+        await _bekleyenleri_yaz(uid)
+        # İlk sayfa yanıttan önce okunur: depo hatası kesik dosya yerine hata yanıtı olarak döner
+        sayfalar = await disa_aktarim.ilk_sayfayi_oku(disa_aktarim.kayit_sayfalari(depo, kaynak, uid, ilk, son))
+    except Exception as e: return {"success": False, "error": str(e)}
+
+    async def parcalar():
+        try:
+            async for parca in disa_aktarim.akis(sayfalar, kaynak, format, sikistirma):
+                yield parca
+        except Exception as e:
+            # Başlıklar gönderildi; bağlantı kesilir, istemci eksik dosyayı tamamlanmış sanmaz
+            print(f"❌ Dışa aktarım hatası ({uid}, {kaynak}): {e}")
+            raise
+
+    dosya_adi = f"{uid}_{kaynak}.{disa_aktarim.dosya_uzantisi(format, sikistirma)}"
+    return StreamingResponse(
+        parcalar(),
+        media_type=disa_aktarim.medya_tipi(format, sikistirma),
+        headers={"Content-Disposition": f'attachment; filename="{dosya_adi}"'},
+    )
+
+# --- PROFİL ÖNBELLEĞİ ---
+@app.post("/profil-guncellendi/{uid}")
+async def profile_updated(uid: str):
+    """Uygulama profili (kilo, aktivite, hedef) güncelledikten sonra çağırır; önbellekteki kopya
+    ve kullanıcının önbelleğe alınmış özet yanıtları silinir"""
+    # async: önbellek event loop'ta kullanılıyor, ortak depo thread'de güncellenir
+    await profil_onbellegi.gecersiz_kil(uid)
+    # tdee değişmiş olabilir (hedef özeti, dashboard)
+    _veri_degisti(uid)
+    return {"success": True}
+
+@app.get("/profil-istatistik")
+def profile_cache_stats():
+    """Profil önbelleği isabet / ıska sayıları"""
+    return {"success": True, **profil_onbellegi.istatistik()}
+
+@app.get("/yanit-istatistik")
+async def response_cache_stats():
+    """Özet yanıt önbelleği: isabet / ıska, 304 sayısı, boyut ve bayt"""
+    return {"success": True, **yanit_onbellegi.istatistik()}
+
 # --- ANALİTİK RAPORLAR ---
+async def _hafta_loglari(uid, ilk_gun, bugun):
+    """[ilk_gun, bugun] aralığındaki tüm loglar tek aralık sorgusuyla"""
+    start = datetime.combine(ilk_gun, datetime.min.time())
+    end = datetime.combine(bugun + timedelta(days=1), datetime.min.time())
+    return [veri for _, veri in await depo.gun_loglari(uid, start, end)]
+
+def _gunlere_ayir(loglar, ilk_gun, gun_sayisi=7):
+    """Logları günlere ayırır: {gun: {"kalori", "yakilan", "protein", "karbonhidrat", "yag"}}"""
+    gunler = {ilk_gun + timedelta(days=i): {"kalori": 0, "yakilan": 0, "protein": 0, "karbonhidrat": 0, "yag": 0} for i in range(gun_sayisi)}
+    for veri in loglar:
+        toplam = gunler.get(veri["tarih"].date())
+        if toplam is None:
+            continue
+        if veri.get("tur") == "spor":
+            toplam["yakilan"] += veri.get("kalori", 0)
+        else:
+            toplam["kalori"] += veri.get("kalori", 0)
+            toplam["protein"] += veri.get("protein", 0)
+            toplam["karbonhidrat"] += veri.get("karbonhidrat", 0)
+            toplam["yag"] += veri.get("yag", 0)
+    return gunler
+
+def _haftalik_yanit(gunler):
+    return {
+        "success": True,
+        # Türkçe gün kısaltmaları
+        "labels": [GUN_ISIMLERI[gun.weekday()] for gun in gunler],
+        "data": [toplam["kalori"] for toplam in gunler.values()],
+        "yakilan": [toplam["yakilan"] for toplam in gunler.values()]
+    }
+
 @app.get("/istatistik-haftalik/{uid}")
-def get_weekly_stats(uid: str):
-    """Son 7 günün günlük kalori toplamlarını döndürür"""
-    try:
-        bugun = date.today()
-        gunler_labels = []
-        gunler_data = []
-        
-        # Son 7 gün için döngü
-        for i in range(6, -1, -1):
-            gun = bugun - timedelta(days=i)
-            start = datetime.combine(gun, datetime.min.time())
-            end = start + timedelta(days=1)
-            
-            # O günün verilerini çek
-            docs = db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih", ">=", start).where("tarih", "<", end).stream()
-            
-            gunluk_kalori = 0
-            for doc in docs:
-                veri = doc.to_dict()
-                # Sadece yemekleri say (spor değil)
-                if veri.get("tur") != "spor":
-                    gunluk_kalori += veri.get("kalori", 0)
+async def get_weekly_stats(uid: str, request: Request):
+    """Son 7 günün günlük kalori (ve yakılan kalori) toplamlarını döndürür"""
+    bugun = date.today()
+
+    async def uret():
+        try:
+            ilk_gun = bugun - timedelta(days=6)
             
-            # Türkçe gün kısaltmaları
-            gun_isimleri = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
-            gunler_labels.append(gun_isimleri[gun.weekday()])
-            gunler_data.append(gunluk_kalori)
+            # 7 gün için tek aralık sorgusu, günlere bellekte ayrılır
+            return _haftalik_yanit(_gunlere_ayir(await _hafta_loglari(uid, ilk_gun, bugun), ilk_gun))
+        except Exception as e:
+            print(f"Haftalık istatistik hatası: {e}")
+            return {"success": False, "error": str(e)}
+
+    return await _onbellekli(request, uid, f"istatistik-haftalik:{bugun}", uret)
+
+@app.get("/istatistik/{uid}")
+async def get_stats(uid: str, pencere: int = 7, aralik: str = "gun"):
+    """Son 7/30/90/365 gün için gün/hafta/ay bazında kalori, yakılan ve makro serileri"""
+    if pencere not in PENCERELER:
+        return {"success": False, "error": f"pencere şunlardan biri olmalı: {PENCERELER}"}
+    if aralik not in ARALIKLAR:
+        return {"success": False, "error": f"aralik şunlardan biri olmalı: {ARALIKLAR}"}
+    try:
+        return {"success": True, **(await seri_olustur(depo, uid, pencere, aralik))}
+    except Exception as e:
+        print(f"İstatistik hatası: {e}")
+        return {"success": False, "error": str(e)}
+
+async def _makro_dagilim(uid, tarih):
+    try:
+        # Günün tüm logları yerine tek özet dokümanı okunur
+        await _bekleyenleri_yaz(uid)
+        ozet = await depo.ozet_getir(uid, tarih)
+        toplam = {alan: ozet[alan] for alan in ("protein", "karbonhidrat", "yag", "kalori", "yakilan")}
         
-        return {
-            "success": True,
-            "labels": gunler_labels,
-            "data": gunler_data
-        }
+        return {"success": True, **toplam}
     except Exception as e:
-        print(f"Haftalık istatistik hatası: {e}")
+        print(f"Makro dağılım hatası: {e}")
         return {"success": False, "error": str(e)}
 
 @app.get("/makro-dagilim/{uid}")
-def get_macro_distribution(uid: str, tarih: str = None):
+async def get_macro_distribution(uid: str, request: Request, tarih: str = None):
     """Belirtilen tarih için makro dağılımını döndürür (varsayılan: bugün)"""
+    if not tarih:
+        tarih = date.today().strftime("%Y-%m-%d")
+    return await _onbellekli(request, uid, f"makro-dagilim:{tarih}", lambda: _makro_dagilim(uid, tarih))
+
+def _hedef_ozeti_yaniti(hedef_kalori, gerceklesen):
+    # Hedef makrolar (basit hesaplama: %30 protein, %40 karb, %30 yağ)
+    hedef_protein = int((hedef_kalori * 0.30) / 4)  # 1g protein = 4 kalori
+    hedef_karb = int((hedef_kalori * 0.40) / 4)
+    hedef_yag = int((hedef_kalori * 0.30) / 9)  # 1g yağ = 9 kalori
+    
+    return {
+        "success": True,
+        "hedef": {
+            "kalori": hedef_kalori,
+            "protein": hedef_protein,
+            "karbonhidrat": hedef_karb,
+            "yag": hedef_yag
+        },
+        "gerceklesen": {
+            "kalori": gerceklesen.get("kalori", 0),
+            "protein": gerceklesen.get("protein", 0),
+            "karbonhidrat": gerceklesen.get("karbonhidrat", 0),
+            "yag": gerceklesen.get("yag", 0),
+            "yakilan": gerceklesen.get("yakilan", 0)
+        }
+    }
+
+async def _hedef_ozeti(uid, bugun):
     try:
-        if not tarih:
-            tarih = date.today().strftime("%Y-%m-%d")
-        
-        start = datetime.strptime(tarih, "%Y-%m-%d")
-        end = start + timedelta(days=1)
-        
-        docs = db.collection("yemek_gunlugu").where("kullanici_id", "==", uid).where("tarih", ">=", start).where("tarih", "<", end).stream()
+        # Kullanıcı bilgileri ve bugünkü makro dağılımı paralel okunur
+        user_data, makro_response = await asyncio.gather(
+            _profil_getir(uid),
+            _makro_dagilim(uid, bugun),
+        )
+        if user_data is None:
+            return {"success": False, "error": "Kullanıcı bulunamadı"}
         
-        toplam = {"protein": 0, "karbonhidrat": 0, "yag": 0, "kalori": 0, "yakilan": 0}
+        hedef_kalori = user_data.get("tdee", 2000)  # Varsayılan 2000
         
-        for doc in docs:
-            veri = doc.to_dict()
-            if veri.get("tur") == "spor":
-                toplam["yakilan"] += veri.get("kalori", 0)
-            else:
-                toplam["protein"] += veri.get("protein", 0)
-                toplam["karbonhidrat"] += veri.get("karbonhidrat", 0)
-                toplam["yag"] += veri.get("yag", 0)
-                toplam["kalori"] += veri.get("kalori", 0)
+        if not makro_response.get("success"):
+            return makro_response
         
-        return {"success": True, **toplam}
+        return _hedef_ozeti_yaniti(hedef_kalori, makro_response)
     except Exception as e:
-        print(f"Makro dağılım hatası: {e}")
+        print(f"Hedef özeti hatası: {e}")
         return {"success": False, "error": str(e)}
 
 @app.get("/hedef-ozeti/{uid}")
-def get_goal_summary(uid: str):
+async def get_goal_summary(uid: str, request: Request):
     """Kullanıcının hedef kalori/makrolarını ve bugünkü gerçekleşmeyi döndürür"""
+    bugun = date.today().strftime("%Y-%m-%d")
+    return await _onbellekli(request, uid, f"hedef-ozeti:{bugun}", lambda: _hedef_ozeti(uid, bugun))
+
+# --- RAPOR EKRANI (TEK İSTEK) ---
+async def _dashboard(uid, bugun):
     try:
-        # Kullanıcı bilgilerini al
-        user_doc = db.collection("users").document(uid).get()
-        if not user_doc.exists:
-            return {"success": False, "error": "Kullanıcı bulunamadı"}
+        ilk_gun = bugun - timedelta(days=6)
         
-        user_data = user_doc.to_dict()
-        hedef_kalori = user_data.get("tdee", 2000)  # Varsayılan 2000
-        
-        # Bugünkü makro dağılımını al
-        bugun = date.today().strftime("%Y-%m-%d")
-        makro_response = get_macro_distribution(uid, bugun)
+        await _bekleyenleri_yaz(uid)
+        profil, loglar = await asyncio.gather(
+            _profil_getir(uid),
+            _hafta_loglari(uid, ilk_gun, bugun),
+        )
         
-        if not makro_response.get("success"):
-            return makro_response
+        gunler = _gunlere_ayir(loglar, ilk_gun)
+        makro = gunler[bugun]
         
-        # Hedef makrolar (basit hesaplama: %30 protein, %40 karb, %30 yağ)
-        hedef_protein = int((hedef_kalori * 0.30) / 4)  # 1g protein = 4 kalori
-        hedef_karb = int((hedef_kalori * 0.40) / 4)
-        hedef_yag = int((hedef_kalori * 0.30) / 9)  # 1g yağ = 9 kalori
+        hedef_ozeti = {"success": False, "error": "Kullanıcı bulunamadı"}
+        if profil is not None:
+            hedef_ozeti = _hedef_ozeti_yaniti(profil.get("tdee", 2000), makro)
         
         return {
             "success": True,
-            "hedef": {
-                "kalori": hedef_kalori,
-                "protein": hedef_protein,
-                "karbonhidrat": hedef_karb,
-                "yag": hedef_yag
-            },
-            "gerceklesen": {
-                "kalori": makro_response.get("kalori", 0),
-                "protein": makro_response.get("protein", 0),
-                "karbonhidrat": makro_response.get("karbonhidrat", 0),
-                "yag": makro_response.get("yag", 0),
-                "yakilan": makro_response.get("yakilan", 0)
-            }
+            "haftalik": _haftalik_yanit(gunler),
+            "makro": {"success": True, **makro},
+            "hedef_ozeti": hedef_ozeti
         }
     except Exception as e:
-        print(f"Hedef özeti hatası: {e}")
+        print(f"Dashboard hatası: {e}")
         return {"success": False, "error": str(e)}
+
+@app.get("/dashboard/{uid}")
+async def dashboard(uid: str, request: Request):
+    """Rapor ekranının tüm verisi: haftalık trend, bugünkü makrolar ve hedef özeti.
+    Profil ve haftalık loglar paralel okunur; bugünün logları haftalık aralığın içinde olduğu
+    için ayrıca sorgulanmaz, tüm değerler tek geçişte hesaplanır."""
+    bugun = date.today()
+    return await _onbellekli(request, uid, f"dashboard:{bugun}", lambda: _dashboard(uid, bugun))
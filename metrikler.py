@@ -0,0 +1,259 @@
+"""
+METRİKLER (PROMETHEUS METİN FORMATI)
+
+/metrics endpoint'i için bağımlılıksız sayaç, histogram ve gösterge tanımları.
+Değerler süreç içinde tutulur; birden fazla uvicorn worker'ı varsa her worker
+kendi değerlerini yayınlar (Prometheus worker başına ayrı hedef olarak toplamalı).
+
+- İstek süreleri: route şablonu (/gunluk/{uid}) ve durum koduna göre histogram
+- Tahmin aşamaları: decode / resize / normalize / forward / postprocess süreleri
+- Depo işlemleri: işlem ve koleksiyon başına adet, süre ve okunan doküman sayısı
+- İstek başına depo işlemi ve okunan doküman sayısı: N+1 sorgu kalıpları (ör. gün
+  başına ayrı sorgu atan bir döngü) bu histogramlarda yüksek değerler olarak görünür
+"""
+import contextvars
+import threading
+import time
+
+# Saniye cinsinden histogram sınırları
+SURE_SINIRLARI = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ADET_SINIRLARI = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# O anki isteğin depo sayaçları (middleware her istek için yeni bir sözlük koyar;
+# asyncio.gather ile açılan alt görevler aynı sözlüğü paylaşır)
+_istek_sayaclari = contextvars.ContextVar("istek_sayaclari", default=None)
+
+
+def _sayi(deger):
+    if deger == float("inf"):
+        return "+Inf"
+    if isinstance(deger, float) and deger.is_integer():
+        return str(int(deger))
+    return repr(deger) if isinstance(deger, float) else str(deger)
+
+
+def _etiket_metni(adlar, degerler, ek=None):
+    ciftler = list(zip(adlar, degerler)) + (ek or [])
+    if not ciftler:
+        return ""
+    kacisli = (
+        f'{ad}="' + str(deger).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for ad, deger in ciftler
+    )
+    return "{" + ",".join(kacisli) + "}"
+
+
+class _Metrik:
+    tur = None
+
+    def __init__(self, ad, aciklama, etiketler=()):
+        self.ad = ad
+        self.aciklama = aciklama
+        self.etiketler = tuple(etiketler)
+        self._degerler = {}
+        # Aşama süreleri tahmin thread'lerinden de yazılır
+        self._kilit = threading.Lock()
+
+    def _anahtar(self, etiketler):
+        return tuple(str(etiketler[ad]) for ad in self.etiketler)
+
+    def satirlar(self):
+        yield f"# HELP {self.ad} {self.aciklama}"
+        yield f"# TYPE {self.ad} {self.tur}"
+        with self._kilit:
+            degerler = [(anahtar, self._kopya(deger)) for anahtar, deger in sorted(self._degerler.items())]
+        for anahtar, deger in degerler:
+            yield from self._deger_satirlari(anahtar, deger)
+
+    def _kopya(self, deger):
+        return deger
+
+
+class Sayac(_Metrik):
+    tur = "counter"
+
+    def artir(self, miktar=1, **etiketler):
+        anahtar = self._anahtar(etiketler)
+        with self._kilit:
+            self._degerler[anahtar] = self._degerler.get(anahtar, 0) + miktar
+
+    def _deger_satirlari(self, anahtar, deger):
+        yield f"{self.ad}{_etiket_metni(self.etiketler, anahtar)} {_sayi(deger)}"
+
+
+class Histogram(_Metrik):
+    tur = "histogram"
+
+    def __init__(self, ad, aciklama, etiketler=(), sinirlar=SURE_SINIRLARI):
+        super().__init__(ad, aciklama, etiketler)
+        self.sinirlar = tuple(sorted(sinirlar))
+
+    def gozlemle(self, deger, **etiketler):
+        anahtar = self._anahtar(etiketler)
+        with self._kilit:
+            kova = self._degerler.get(anahtar)
+            if kova is None:
+                # [sınır başına adet..., toplam, adet]
+                kova = self._degerler[anahtar] = [0] * len(self.sinirlar) + [0.0, 0]
+            for i, sinir in enumerate(self.sinirlar):
+                if deger <= sinir:
+                    kova[i] += 1
+                    break
+            kova[-2] += deger
+            kova[-1] += 1
+
+    def _kopya(self, deger):
+        return list(deger)
+
+    def _deger_satirlari(self, anahtar, kova):
+        kumulatif = 0
+        for sinir, adet in zip(self.sinirlar, kova):
+            kumulatif += adet
+            yield f"{self.ad}_bucket{_etiket_metni(self.etiketler, anahtar, [('le', _sayi(float(sinir)))])} {kumulatif}"
+        yield f"{self.ad}_bucket{_etiket_metni(self.etiketler, anahtar, [('le', '+Inf')])} {kova[-1]}"
+        yield f"{self.ad}_sum{_etiket_metni(self.etiketler, anahtar)} {_sayi(round(kova[-2], 6))}"
+        yield f"{self.ad}_count{_etiket_metni(self.etiketler, anahtar)} {kova[-1]}"
+
+
+class Gosterge(_Metrik):
+    """Değeri okuma anında fonksiyondan alınır (kuyruk derinliği, önbellek boyutu gibi)"""
+
+    tur = "gauge"
+
+    def __init__(self, ad, aciklama, fonk, etiket=None):
+        # fonk() bir sayı ya da etiket verildiyse {etiket_degeri: sayı} döndürür
+        super().__init__(ad, aciklama, (etiket,) if etiket else ())
+        self.fonk = fonk
+
+    def satirlar(self):
+        yield f"# HELP {self.ad} {self.aciklama}"
+        yield f"# TYPE {self.ad} {self.tur}"
+        degerler = self.fonk()
+        if not self.etiketler:
+            degerler = {None: degerler}
+        for etiket, deger in sorted(degerler.items(), key=lambda x: str(x[0])):
+            anahtar = () if etiket is None else (etiket,)
+            yield f"{self.ad}{_etiket_metni(self.etiketler, anahtar)} {_sayi(deger)}"
+
+
+class MetrikKaydi:
+    def __init__(self):
+        self._metrikler = {}
+
+    def _ekle(self, metrik):
+        # Aynı isimle tekrar tanımlanırsa mevcut metrik döner (ör. depo sarmalayıcısı tekrar kurulduğunda)
+        return self._metrikler.setdefault(metrik.ad, metrik)
+
+    def sayac(self, ad, aciklama, etiketler=()):
+        return self._ekle(Sayac(ad, aciklama, etiketler))
+
+    def histogram(self, ad, aciklama, etiketler=(), sinirlar=SURE_SINIRLARI):
+        return self._ekle(Histogram(ad, aciklama, etiketler, sinirlar))
+
+    def gosterge(self, ad, aciklama, fonk, etiket=None):
+        return self._ekle(Gosterge(ad, aciklama, fonk, etiket))
+
+    def metin(self):
+        satirlar = []
+        for metrik in self._metrikler.values():
+            satirlar.extend(metrik.satirlar())
+        return "\n".join(satirlar) + "\n"
+
+
+# --- İstek başına depo sayaçları ---
+def istek_baslat():
+    """Yeni isteğin sayaçlarını bağlama koyar: (sayaçlar, token)"""
+    sayaclar = {"islem": 0, "okunan": 0}
+    return sayaclar, _istek_sayaclari.set(sayaclar)
+
+
+def istek_bitir(token):
+    _istek_sayaclari.reset(token)
+
+
+# --- Depo sarmalayıcısı ---
+def _sifir(args, sonuc):
+    return 0
+
+
+def _tek(args, sonuc):
+    return 1
+
+
+def _adet(args, sonuc):
+    return len(sonuc)
+
+
+def _toplu_gunler(args, sonuc):
+    # Toplu kayıt etkilenen her günün özetini bir kez okur
+    return len({(veri.get("kullanici_id"), veri["tarih"].date()) for veri in args[0]})
+
+
+# işlem -> (koleksiyon, okunan doküman sayısı (argümanlar, sonuç) -> int)
+DEPO_ISLEMLERI = {
+    "profil_getir": ("users", _tek),
+    "profil_kaydet": ("users", _sifir),
+    "log_ekle": ("yemek_gunlugu", _tek),  # transaction içinde günün özeti
+    "loglari_toplu_ekle": ("yemek_gunlugu", _toplu_gunler),
+    "log_sil": ("yemek_gunlugu", lambda args, sonuc: 2),  # log + özet
+    "gun_loglari": ("yemek_gunlugu", _adet),
+    "log_sayfasi": ("yemek_gunlugu", lambda args, sonuc: len(sonuc[0])),
+    "log_degisiklikleri": ("yemek_gunlugu", lambda args, sonuc: len(sonuc[0]) + len(sonuc[1])),
+    "ozet_getir": ("gunluk_ozet", _tek),
+    "gunluk_ozetler": ("gunluk_ozet", _adet),
+    "aylik_ozetler": ("aylik_ozet", _adet),
+    "su_toplu_ekle": ("su_takibi", _sifir),
+    "su_getir": ("gunluk_su", _tek),
+    "su_araligi": ("gunluk_su", _adet),
+    "su_sayfasi": ("su_takibi", lambda args, sonuc: len(sonuc[0])),
+    "var_olan_idler": ("yemek_gunlugu", lambda args, sonuc: len(args[0]) + len(args[1])),
+}
+
+
+class IzlenenDepo:
+    """Depo (bkz. depo.py) çağrılarını sarar: işlem/koleksiyon başına adet, süre, hata ve
+    okunan doküman sayısı; o anki isteğin sayaçlarını da artırır"""
+
+    def __init__(self, depo, kayit):
+        self._depo = depo
+        self.ad = depo.ad
+        self._sure = kayit.histogram(
+            "dietapp_depo_islem_suresi_saniye", "Depo işlem süresi",
+            ("depo", "islem", "koleksiyon"),
+        )
+        self._hata = kayit.sayac(
+            "dietapp_depo_islem_hata_total", "Hata ile biten depo işlemleri",
+            ("depo", "islem", "koleksiyon"),
+        )
+        self._okunan = kayit.sayac(
+            "dietapp_depo_okunan_dokuman_total", "Depo işlemlerinde okunan doküman sayısı",
+            ("depo", "islem", "koleksiyon"),
+        )
+
+    def __getattr__(self, ad):
+        hedef = getattr(self._depo, ad)
+        if ad not in DEPO_ISLEMLERI:
+            return hedef
+        koleksiyon, okunan_hesapla = DEPO_ISLEMLERI[ad]
+        etiketler = {"depo": self.ad, "islem": ad, "koleksiyon": koleksiyon}
+
+        async def sarmal(*args, **kwargs):
+            baslangic = time.perf_counter()
+            try:
+                sonuc = await hedef(*args, **kwargs)
+            except Exception:
+                self._hata.artir(**etiketler)
+                raise
+            finally:
+                self._sure.gozlemle(time.perf_counter() - baslangic, **etiketler)
+            okunan = okunan_hesapla(args, sonuc)
+            self._okunan.artir(okunan, **etiketler)
+            sayaclar = _istek_sayaclari.get()
+            if sayaclar is not None:
+                sayaclar["islem"] += 1
+                sayaclar["okunan"] += okunan
+            return sonuc
+
+        # Sonraki erişimler __getattr__'a düşmez
+        setattr(self, ad, sarmal)
+        return sarmal
@@ -0,0 +1,145 @@
+"""
+MODEL DIŞA AKTARMA + PARİTE KONTROLÜ
+
+Eğitilmiş yeni_model klasöründen safetensors (yoksa), TorchScript, ONNX ve int8 ONNX dosyalarını üretir,
+ardından her backend'in top-1 tahminlerini eager PyTorch ile karşılaştırır.
+
+Kullanım:
+    python model_disa_aktar.py
+    python model_disa_aktar.py --model ./yeni_model --resimler dataset --adet 200
+    python model_disa_aktar.py --sadece-kontrol
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import ViTImageProcessor
+
+from tahmin_backend import (
+    BACKENDLER,
+    LogitSarmalayici,
+    ONNX_DOSYA,
+    ONNX_INT8_DOSYA,
+    TORCHSCRIPT_DOSYA,
+    _eager_model,
+    backend_yukle,
+)
+
+
+def disa_aktar(model_yolu):
+    model = _eager_model(model_yolu)
+
+    if not os.path.exists(os.path.join(model_yolu, "model.safetensors")):
+        # Sunucu açılışında ağırlıklar mmap ile okunabilsin
+        print("📦 safetensors üretiliyor...")
+        model.save_pretrained(model_yolu, safe_serialization=True)
+
+    sarmal = LogitSarmalayici(model).eval()
+    ornek = torch.randn(1, 3, 224, 224)
+
+    print("📦 TorchScript üretiliyor...")
+    with torch.no_grad():
+        izlenen = torch.jit.trace(sarmal, ornek)
+    izlenen.save(os.path.join(model_yolu, TORCHSCRIPT_DOSYA))
+
+    print("📦 ONNX üretiliyor...")
+    onnx_yolu = os.path.join(model_yolu, ONNX_DOSYA)
+    torch.onnx.export(
+        sarmal,
+        (ornek,),
+        onnx_yolu,
+        input_names=["pixel_values"],
+        output_names=["logits"],
+        dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=14,
+    )
+
+    print("📦 int8 ONNX üretiliyor...")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_yolu, os.path.join(model_yolu, ONNX_INT8_DOSYA), weight_type=QuantType.QInt8)
+
+    for dosya in (TORCHSCRIPT_DOSYA, ONNX_DOSYA, ONNX_INT8_DOSYA):
+        boyut = os.path.getsize(os.path.join(model_yolu, dosya)) / 1024 / 1024
+        print(f"   ✅ {dosya}: {boyut:.1f} MB")
+
+
+def kontrol_girdileri(model_yolu, resim_klasoru, adet):
+    """Parite kontrolü için gerçek resimler, yoksa rastgele girdiler"""
+    processor = ViTImageProcessor.from_pretrained(model_yolu)
+    dosyalar = []
+    for uzanti in ("jpg", "jpeg", "png"):
+        dosyalar += glob.glob(os.path.join(resim_klasoru, "**", f"*.{uzanti}"), recursive=True)
+    dosyalar = sorted(dosyalar)[:adet]
+
+    if not dosyalar:
+        print(f"⚠️ {resim_klasoru} içinde resim yok, rastgele girdilerle kontrol ediliyor")
+        return [torch.randn(1, 3, 224, 224).numpy() for _ in range(adet)]
+
+    girdiler = []
+    for dosya in dosyalar:
+        try:
+            img = Image.open(dosya).convert("RGB")
+            girdiler.append(processor(images=img, return_tensors="np")["pixel_values"])
+        except Exception:
+            pass
+    return girdiler
+
+
+def parite_kontrolu(model_yolu, girdiler):
+    """Her backend'in top-1 etiketlerini eager ile karşılaştırır"""
+    referans = None
+    basarili = True
+
+    for ad in BACKENDLER:
+        try:
+            backend = backend_yukle(ad, model_yolu)
+        except Exception as e:
+            print(f"   ⏭️ {ad}: yüklenemedi ({e})")
+            continue
+
+        backend(girdiler[0])  # ısınma
+        baslangic = time.perf_counter()
+        tahminler = np.concatenate([backend(g).argmax(-1) for g in girdiler])
+        ms = (time.perf_counter() - baslangic) * 1000 / len(girdiler)
+
+        if referans is None:
+            referans = tahminler
+            print(f"   📏 {ad}: {ms:.1f} ms/resim (referans)")
+            continue
+
+        uyum = float((tahminler == referans).mean())
+        durum = "✅" if uyum == 1.0 else "❌"
+        print(f"   {durum} {ad}: {ms:.1f} ms/resim, top-1 uyumu %{uyum * 100:.2f}")
+        if uyum < 1.0:
+            basarili = False
+
+    return basarili
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modeli optimize backend'ler için dışa aktar")
+    parser.add_argument("--model", default="./yeni_model", help="Eğitilmiş model klasörü")
+    parser.add_argument("--resimler", default="dataset", help="Parite kontrolü için resim klasörü")
+    parser.add_argument("--adet", type=int, default=100, help="Kontrolde kullanılacak resim sayısı")
+    parser.add_argument("--sadece-kontrol", action="store_true", help="Dışa aktarmadan sadece kontrol et")
+    args = parser.parse_args()
+
+    if not args.sadece_kontrol:
+        disa_aktar(args.model)
+
+    print("\n🔍 Parite kontrolü (top-1 etiketler)...")
+    girdiler = kontrol_girdileri(args.model, args.resimler, args.adet)
+    if not parite_kontrolu(args.model, girdiler):
+        print("\n❌ Bazı backend'ler eager ile aynı etiketi vermiyor!")
+        sys.exit(1)
+    print("\n✅ Tüm backend'ler aynı top-1 etiketleri veriyor.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+HIZLI RESİM ÇÖZME VE ÖN İŞLEME
+
+ViTImageProcessor ile aynı çıktıyı (tolerans dahilinde) daha ucuza üretir:
+- Boyut ve dosya imzası kontrolü ile geçersiz yüklemeler çözülmeden reddedilir
+- JPEG'ler draft modunda doğrudan ~224 px'e yakın ölçekte çözülür (12 MP yerine)
+- Yeniden boyutlandırma PIL'in C kodunda, rescale + normalize tek NumPy adımında yapılır
+
+Karşılaştırma ve aşama süreleri için:
+    python on_isleme.py test.jpg
+"""
+import io
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+from PIL import Image
+
+MAX_YUKLEME_BAYT = int(float(os.getenv("MAX_YUKLEME_MB", "15")) * 1024 * 1024)
+MAX_PIKSEL = int(os.getenv("MAX_PIKSEL", "60000000"))
+
+# Desteklenen resim formatlarının dosya imzaları
+IMZALAR = (
+    b"\xff\xd8\xff",         # JPEG
+    b"\x89PNG\r\n\x1a\n",    # PNG
+    b"GIF87a", b"GIF89a",    # GIF
+    b"BM",                   # BMP
+)
+
+
+class GecersizResim(Exception):
+    """Yükleme resim değilse (415) veya çok büyükse (413) fırlatılır"""
+
+    def __init__(self, mesaj, status_code=415):
+        super().__init__(mesaj)
+        self.status_code = status_code
+
+
+class AsamaZamanlayici:
+    """Aşama başına (decode / resize / normalize / forward / postprocess) süre istatistikleri"""
+
+    def __init__(self, histogram=None):
+        # histogram: opsiyonel metrikler.Histogram ("asama" etiketli), /metrics için
+        self.histogram = histogram
+        self.sayac = defaultdict(int)
+        self.toplam = defaultdict(float)
+        self.en_fazla = defaultdict(float)
+
+    def kaydet(self, asama, saniye):
+        if self.histogram is not None:
+            self.histogram.gozlemle(saniye, asama=asama)
+        self.sayac[asama] += 1
+        self.toplam[asama] += saniye
+        self.en_fazla[asama] = max(self.en_fazla[asama], saniye)
+
+    def istatistik(self):
+        return {
+            asama: {
+                "adet": self.sayac[asama],
+                "ortalama_ms": round(self.toplam[asama] / self.sayac[asama] * 1000, 3),
+                "max_ms": round(self.en_fazla[asama] * 1000, 3),
+            }
+            for asama in self.sayac
+        }
+
+
+def yukleme_dogrula(contents):
+    """Resmi çözmeden önce boyut ve imza kontrolü"""
+    if len(contents) > MAX_YUKLEME_BAYT:
+        raise GecersizResim(f"Dosya çok büyük (en fazla {MAX_YUKLEME_BAYT // (1024 * 1024)} MB)", 413)
+    baslik = contents[:12]
+    webp = baslik[:4] == b"RIFF" and baslik[8:12] == b"WEBP"
+    if not (webp or baslik.startswith(IMZALAR)):
+        raise GecersizResim("Desteklenmeyen dosya türü, lütfen bir resim yükleyin")
+
+
+class HizliOnIsleyici:
+    def __init__(self, processor, zamanlayici=None):
+        # Hedef boyut ve normalize değerleri eğitimdeki processor'dan okunur
+        self.boyut = (processor.size["width"], processor.size["height"])
+        self.resample = Image.Resampling(processor.resample)
+        olcek = processor.rescale_factor if processor.do_rescale else 1.0
+        ortalama = np.array(processor.image_mean if processor.do_normalize else [0, 0, 0], dtype=np.float32)
+        sapma = np.array(processor.image_std if processor.do_normalize else [1, 1, 1], dtype=np.float32)
+
+        # (x * olcek - ortalama) / sapma  ==  x * carpan + ekleme
+        self.carpan = (olcek / sapma).astype(np.float32)
+        self.ekleme = (-ortalama / sapma).astype(np.float32)
+        self.zamanlayici = zamanlayici or AsamaZamanlayici()
+
+    def coz(self, contents):
+        yukleme_dogrula(contents)
+        try:
+            img = Image.open(io.BytesIO(contents))
+        except Exception:
+            raise GecersizResim("Resim okunamadı")
+
+        # Dekompresyon bombalarını piksel verisini çözmeden reddet
+        if img.width * img.height > MAX_PIKSEL:
+            raise GecersizResim("Resim çözünürlüğü çok yüksek", 413)
+
+        # JPEG: DCT ölçekleme ile hedef boyuttan küçük olmayan en küçük ölçekte çöz
+        img.draft("RGB", self.boyut)
+        return img.convert("RGB")
+
+    def boyutlandir(self, img):
+        return img.resize(self.boyut, self.resample, reducing_gap=3.0)
+
+    def normalize(self, img):
+        arr = np.asarray(img, dtype=np.float32)
+        arr = arr * self.carpan + self.ekleme
+        return np.ascontiguousarray(arr.transpose(2, 0, 1)[None])
+
+    def __call__(self, contents):
+        """Resim baytlarından [1, 3, H, W] float32 pixel_values üretir"""
+        t0 = time.perf_counter()
+        img = self.coz(contents)
+        t1 = time.perf_counter()
+        img = self.boyutlandir(img)
+        t2 = time.perf_counter()
+        pixel_values = self.normalize(img)
+        t3 = time.perf_counter()
+
+        self.zamanlayici.kaydet("decode", t1 - t0)
+        self.zamanlayici.kaydet("resize", t2 - t1)
+        self.zamanlayici.kaydet("normalize", t3 - t2)
+        return pixel_values
+
+
+def parite_farki(processor, contents):
+    """Hızlı yolun çıktısını ViTImageProcessor ile karşılaştırır (max / ortalama mutlak fark)"""
+    referans = processor(images=Image.open(io.BytesIO(contents)).convert("RGB"), return_tensors="np")["pixel_values"]
+    hizli = HizliOnIsleyici(processor)(contents)
+    fark = np.abs(referans - hizli)
+    return float(fark.max()), float(fark.mean())
+
+
+if __name__ == "__main__":
+    from transformers import ViTImageProcessor
+
+    dosya = sys.argv[1] if len(sys.argv) > 1 else "test.jpg"
+    model_yolu = sys.argv[2] if len(sys.argv) > 2 else "./yeni_model"
+    processor = ViTImageProcessor.from_pretrained(model_yolu)
+    with open(dosya, "rb") as f:
+        contents = f.read()
+
+    tekrar = 20
+    baslangic = time.perf_counter()
+    for _ in range(tekrar):
+        processor(images=Image.open(io.BytesIO(contents)).convert("RGB"), return_tensors="np")
+    eski_ms = (time.perf_counter() - baslangic) * 1000 / tekrar
+
+    on_isleyici = HizliOnIsleyici(processor)
+    for _ in range(tekrar):
+        on_isleyici(contents)
+
+    max_fark, ort_fark = parite_farki(processor, contents)
+    print(f"ViTImageProcessor: {eski_ms:.1f} ms/resim")
+    for asama, deger in on_isleyici.zamanlayici.istatistik().items():
+        print(f"  {asama:<10} {deger['ortalama_ms']:.2f} ms")
+    print(f"Fark: max {max_fark:.4f}, ortalama {ort_fark:.4f}")
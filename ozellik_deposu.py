@@ -0,0 +1,144 @@
+"""
+ÖZELLİK DEPOSU (DONDURULMUŞ OMURGA)
+
+Dondurulmuş ViT omurgasının her resim için ürettiği CLS vektörü (sınıflandırma
+katmanının girdisi) bir kez hesaplanıp diskte tutulur; `egitim.py --mod bas` sadece
+sınıflandırma katmanını bu vektörler üzerinde saniyeler içinde eğitir.
+
+Klasör yapısı:
+    ozellikler.f16   (kapasite, boyut) float16 np.memmap; kapasite doldukça dosya büyütülür
+    meta.json        omurga, parmak izi, satır sayısı ve dosya -> satır indeksi
+
+dataset/ altındaki her dosya (göreli yol) boyutu ve değişme zamanıyla indekslenir:
+yeni sınıf klasörleri veya eklenen / değişen resimler sonraki çalıştırmada sadece
+onlar için omurga çalıştırılarak depoya eklenir, silinen dosyalar indeksten düşer.
+Omurga değişirse (parmak izi tutmazsa) depo baştan kurulur.
+"""
+import json
+import os
+
+import numpy as np
+
+RESIM_UZANTILARI = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+META_SURUMU = 1
+
+
+def dataset_tara(klasor):
+    """dataset/<sınıf>/<resim> dosyaları: {göreli yol: (sınıf, mtime_ns, bayt)}"""
+    dosyalar = {}
+    for sinif in sorted(os.listdir(klasor)):
+        sinif_klasoru = os.path.join(klasor, sinif)
+        if not os.path.isdir(sinif_klasoru):
+            continue
+        for kok, _, adlar in os.walk(sinif_klasoru):
+            for ad in adlar:
+                if not ad.lower().endswith(RESIM_UZANTILARI):
+                    continue
+                yol = os.path.join(kok, ad)
+                bilgi = os.stat(yol)
+                dosyalar[os.path.relpath(yol, klasor).replace(os.sep, "/")] = (sinif, bilgi.st_mtime_ns, bilgi.st_size)
+    return dosyalar
+
+
+class OzellikDeposu:
+    def __init__(self, klasor, omurga, parmak_izi, boyut):
+        self.klasor = klasor
+        self._meta_yolu = os.path.join(klasor, "meta.json")
+        self._veri_yolu = os.path.join(klasor, "ozellikler.f16")
+        os.makedirs(klasor, exist_ok=True)
+
+        meta = None
+        if os.path.exists(self._meta_yolu) and os.path.exists(self._veri_yolu):
+            with open(self._meta_yolu, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta.get("surum"), meta.get("parmak_izi"), meta.get("boyut")) != (META_SURUMU, parmak_izi, boyut):
+                print(f"♻️ Omurga değişmiş ({meta.get('omurga')} -> {omurga}), özellik deposu yeniden kuruluyor")
+                meta = None
+
+        if meta is None:
+            meta = {"surum": META_SURUMU, "omurga": omurga, "parmak_izi": parmak_izi, "boyut": boyut,
+                    "adet": 0, "kapasite": 0, "dosyalar": {}}
+            open(self._veri_yolu, "wb").close()
+        self.meta = meta
+        self.meta["omurga"] = omurga
+        self._memmap = None
+        self._ac()
+
+    @property
+    def boyut(self):
+        return self.meta["boyut"]
+
+    @property
+    def adet(self):
+        return self.meta["adet"]
+
+    def _ac(self):
+        kapasite = self.meta["kapasite"]
+        self._memmap = np.memmap(self._veri_yolu, dtype=np.float16, mode="r+", shape=(kapasite, self.boyut)) if kapasite else None
+
+    def _buyut(self, gereken):
+        kapasite = self.meta["kapasite"]
+        if gereken <= kapasite:
+            return
+        yeni = max(gereken, kapasite * 2, 1024)
+        if self._memmap is not None:
+            self._memmap.flush()
+            del self._memmap
+        with open(self._veri_yolu, "r+b") as f:
+            f.truncate(yeni * self.boyut * np.dtype(np.float16).itemsize)
+        self.meta["kapasite"] = yeni
+        self._ac()
+
+    def eksikler(self, dosyalar):
+        """dataset_tara() çıktısına göre indeksi günceller: silinen dosyalar düşer,
+        özelliği çıkarılması gereken (yeni / değişmiş) dosyalar [(göreli yol, sınıf)] olarak döner"""
+        indeks = self.meta["dosyalar"]
+        for yol in [yol for yol in indeks if yol not in dosyalar]:
+            del indeks[yol]
+        eksik = []
+        for yol, (sinif, mtime, bayt) in dosyalar.items():
+            kayit = indeks.get(yol)
+            if kayit is None or (kayit["sinif"], kayit["mtime"], kayit["bayt"]) != (sinif, mtime, bayt):
+                eksik.append((yol, sinif))
+        return eksik
+
+    def ekle(self, kayitlar, vektorler):
+        """kayitlar: [(göreli yol, sınıf, mtime_ns, bayt)], vektorler: (len(kayitlar), boyut).
+        Vektörü None olan (okunamayan) resimler satırsız indekslenir, değişene kadar tekrar denenmez."""
+        gecerli = [i for i, v in enumerate(vektorler) if v is not None]
+        baslangic = self.adet
+        self._buyut(baslangic + len(gecerli))
+        if gecerli:
+            self._memmap[baslangic:baslangic + len(gecerli)] = np.stack([vektorler[i] for i in gecerli]).astype(np.float16)
+        satirlar = dict(zip(gecerli, range(baslangic, baslangic + len(gecerli))))
+        for i, (yol, sinif, mtime, bayt) in enumerate(kayitlar):
+            self.meta["dosyalar"][yol] = {"satir": satirlar.get(i, -1), "sinif": sinif, "mtime": mtime, "bayt": bayt}
+        self.meta["adet"] = baslangic + len(gecerli)
+
+    def kaydet(self):
+        """Vektörler diske yazıldıktan sonra indeks atomik olarak değiştirilir (yarıda kesilen
+        çıkarma, indekste olmayan satırları yeniden hesaplar)"""
+        if self._memmap is not None:
+            self._memmap.flush()
+        gecici = self._meta_yolu + ".tmp"
+        with open(gecici, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(gecici, self._meta_yolu)
+
+    def veri(self):
+        """İndeksteki geçerli satırlar: (vektörler float32 (N, boyut), sınıf adları [N])"""
+        kayitlar = sorted((k["satir"], k["sinif"]) for k in self.meta["dosyalar"].values() if k["satir"] >= 0)
+        if not kayitlar:
+            return np.zeros((0, self.boyut), dtype=np.float32), []
+        satirlar = np.array([satir for satir, _ in kayitlar])
+        return np.asarray(self._memmap[satirlar], dtype=np.float32), [sinif for _, sinif in kayitlar]
+
+    def istatistik(self):
+        return {
+            "dosya": len(self.meta["dosyalar"]),
+            "satir": self.adet,
+            # Silinen / değişen dosyalardan kalan, indekste olmayan satırlar
+            "bos_satir": self.adet - sum(1 for k in self.meta["dosyalar"].values() if k["satir"] >= 0),
+            "kapasite": self.meta["kapasite"],
+            "disk_mb": round(os.path.getsize(self._veri_yolu) / 1e6, 1),
+        }
@@ -0,0 +1,98 @@
+"""
+Günlük Özetleri Yeniden Oluşturma Script'i
+yemek_gunlugu kayıtlarından gunluk_ozet ve aylik_ozet dokümanlarını baştan hesaplar.
+İlk kurulumda, demo veri ekledikten sonra veya özetlerden şüphelenildiğinde çalıştırın.
+
+Kullanım:
+    python ozet_yeniden_olustur.py --kullanici_id YOUR_USER_ID
+    python ozet_yeniden_olustur.py --hepsi
+"""
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+from collections import defaultdict
+import argparse
+
+from gunluk_ozet import AYLIK_KOLEKSIYONU, OZET_KOLEKSIYONU, ay_id, bos_ozet, loglardan_ozet, ozet_id
+
+BATCH_LIMITI = 500  # Firestore batch başına en fazla işlem
+
+# Firebase bağlantısı
+try:
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("firebase_key.json")
+        firebase_admin.initialize_app(cred)
+        print("✅ Firebase Bağlandı")
+except Exception as e:
+    print(f"❌ Firebase Hatası: {e}")
+
+db = firestore.client()
+
+
+def toplu_yaz(islemler):
+    """(tur, ref, veri) listesini 500'lük batch'ler halinde yazar"""
+    for i in range(0, len(islemler), BATCH_LIMITI):
+        batch = db.batch()
+        for tur, ref, veri in islemler[i:i + BATCH_LIMITI]:
+            if tur == "sil":
+                batch.delete(ref)
+            else:
+                batch.set(ref, veri)
+        batch.commit()
+
+
+def yeniden_olustur(kullanici_id=None):
+    sorgu = db.collection("yemek_gunlugu")
+    if kullanici_id:
+        sorgu = sorgu.where("kullanici_id", "==", kullanici_id)
+
+    # (kullanıcı, gün) -> loglar
+    gruplar = defaultdict(list)
+    for doc in sorgu.stream():
+        veri = doc.to_dict()
+        if "tarih" not in veri or "kullanici_id" not in veri:
+            continue
+        gruplar[(veri["kullanici_id"], veri["tarih"].strftime("%Y-%m-%d"))].append(veri)
+
+    islemler = []
+    aylar = defaultdict(bos_ozet)
+    for (uid, tarih_str), loglar in gruplar.items():
+        ozet = loglardan_ozet(loglar)
+        ref = db.collection(OZET_KOLEKSIYONU).document(ozet_id(uid, tarih_str))
+        islemler.append(("yaz", ref, {"kullanici_id": uid, "tarih_str": tarih_str, **ozet}))
+        for alan, deger in ozet.items():
+            aylar[(uid, tarih_str[:7])][alan] += deger
+
+    for (uid, ay), ozet in aylar.items():
+        ref = db.collection(AYLIK_KOLEKSIYONU).document(ay_id(uid, ay))
+        islemler.append(("yaz", ref, {"kullanici_id": uid, "ay": ay, **ozet}))
+
+    # Artık logu kalmamış gün/ayların eski özetlerini temizle
+    eskiler = 0
+    for koleksiyon, anahtar, mevcut in ((OZET_KOLEKSIYONU, "tarih_str", gruplar), (AYLIK_KOLEKSIYONU, "ay", aylar)):
+        ozet_sorgusu = db.collection(koleksiyon)
+        if kullanici_id:
+            ozet_sorgusu = ozet_sorgusu.where("kullanici_id", "==", kullanici_id)
+        for doc in ozet_sorgusu.stream():
+            veri = doc.to_dict()
+            if (veri.get("kullanici_id"), veri.get(anahtar)) not in mevcut:
+                islemler.append(("sil", doc.reference, None))
+                eskiler += 1
+
+    toplu_yaz(islemler)
+    print(f"🎉 {len(gruplar)} günlük ve {len(aylar)} aylık özet yazıldı, {eskiler} eski özet silindi.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Günlük özetleri loglardan yeniden oluştur")
+    parser.add_argument("--kullanici_id", type=str, help="Firebase kullanıcı ID'si")
+    parser.add_argument("--hepsi", action="store_true", help="Tüm kullanıcılar için")
+
+    args = parser.parse_args()
+
+    if not args.kullanici_id and not args.hepsi:
+        print("❌ Kullanıcı ID'si veya --hepsi gerekli!")
+        print("Kullanım: python ozet_yeniden_olustur.py --kullanici_id YOUR_USER_ID")
+    else:
+        print("⚠️ Yeniden oluşturma sırasında yapılan yeni kayıtlar için script'i tekrar çalıştırın.")
+        yeniden_olustur(args.kullanici_id)
@@ -0,0 +1,235 @@
+"""
+KULLANICI PROFİLİ ÖNBELLEĞİ
+
+/spor-yap her kayıtta `kilo`, /hedef-ozeti ve /dashboard `tdee` için `users/{uid}`
+dokümanını okur; bu değerler nadiren değişir. Profiller süreç içinde LRU + TTL
+önbellekte tutulur, aynı kullanıcı için eşzamanlı istekler tek Firestore okumasını
+paylaşır.
+
+Birden fazla uvicorn worker'ı çalışıyorsa PROFIL_ONBELLEK_DOSYA ile ortak bir SQLite
+dosyası verilebilir: bir worker'ın okuduğu profil diğerlerine de hizmet eder ve
+geçersiz kılma (profil güncellendi) tüm worker'lara yansır. Ortak dosyaya event loop
+dışında (thread'de) ve sadece yerel ıskada gidilir; yerel isabetler bellekten döner.
+Diğer worker'lardaki geçersiz kılmalar isabet sırasında en fazla yoklama aralığında
+bir (gecersiz_yoklama_ms) thread'de sorgulanır, yani en geç bu kadar gecikmeyle yansır.
+
+Dokümanı olmayan kullanıcılar da (daha kısa süreyle) önbelleğe alınır; çağıran taraf
+None alır ve varsayılan değerleri kullanır.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_YOK = object()  # Önbellekte "doküman yok" kaydı
+
+
+class PaylasimliProfilDeposu:
+    """Worker'lar arasında paylaşılan yerel SQLite deposu"""
+
+    def __init__(self, yol):
+        self._baglanti = sqlite3.connect(yol, check_same_thread=False, isolation_level=None, timeout=1)
+        self._kilit = threading.Lock()
+        with self._kilit:
+            self._baglanti.execute("PRAGMA journal_mode=WAL")
+            self._baglanti.execute("PRAGMA synchronous=NORMAL")
+            self._baglanti.execute("CREATE TABLE IF NOT EXISTS profil (uid TEXT PRIMARY KEY, veri TEXT, eklenme REAL)")
+            self._baglanti.execute("CREATE TABLE IF NOT EXISTS gecersiz (uid TEXT PRIMARY KEY, zaman REAL)")
+            self._baglanti.execute("CREATE INDEX IF NOT EXISTS gecersiz_zaman ON gecersiz (zaman)")
+
+    def getir(self, uid):
+        """(profil veya None, eklenme, son geçersiz kılma zamanı) ya da kayıt yoksa None"""
+        with self._kilit:
+            satir = self._baglanti.execute("SELECT veri, eklenme FROM profil WHERE uid = ?", (uid,)).fetchone()
+            gecersiz = self._baglanti.execute("SELECT zaman FROM gecersiz WHERE uid = ?", (uid,)).fetchone()
+        if satir is None:
+            return None
+        return json.loads(satir[0]), satir[1], gecersiz[0] if gecersiz else 0
+
+    def koy(self, uid, profil, eklenme):
+        with self._kilit:
+            self._baglanti.execute(
+                "INSERT OR REPLACE INTO profil (uid, veri, eklenme) VALUES (?, ?, ?)",
+                (uid, json.dumps(profil, default=str), eklenme),
+            )
+
+    def gecersizler(self, esik):
+        """esik'ten sonra geçersiz kılınan profiller: [(uid, zaman)]"""
+        with self._kilit:
+            return self._baglanti.execute("SELECT uid, zaman FROM gecersiz WHERE zaman > ?", (esik,)).fetchall()
+
+    def gecersiz_kil(self, uid, zaman):
+        with self._kilit:
+            self._baglanti.execute("DELETE FROM profil WHERE uid = ?", (uid,))
+            self._baglanti.execute("INSERT OR REPLACE INTO gecersiz (uid, zaman) VALUES (?, ?)", (uid, zaman))
+
+
+class ProfilOnbellegi:
+    def __init__(self, max_boyut=10000, ttl_sn=600, bos_ttl_sn=60, paylasimli_dosya=None, gecersiz_yoklama_ms=500):
+        self.max_boyut = max_boyut
+        self.ttl = ttl_sn
+        self.bos_ttl = bos_ttl_sn
+        self.paylasimli = PaylasimliProfilDeposu(paylasimli_dosya) if paylasimli_dosya else None
+        self.yoklama_araligi = gecersiz_yoklama_ms / 1000
+        # Eklenme zamanları worker'lar arası karşılaştırılabilsin diye duvar saati (time.time)
+        self._veri = OrderedDict()  # uid -> (profil veya _YOK, eklenme)
+        self._ucustaki = {}
+        self._ucusta_gecersiz = set()  # Okuması sürerken geçersiz kılınan uid'ler
+        self._son_yoklama = time.time()
+        self._yoklama_esigi = self._son_yoklama  # Bundan sonraki geçersiz kılmalar henüz görülmedi
+        self._yoklama_gorevi = None
+
+        # İstatistikler
+        self.isabet = 0
+        self.paylasimli_isabet = 0
+        self.iska = 0
+        self.bulunamayan = 0
+        self.cikarilan = 0
+        self.suresi_dolan = 0
+        self.gecersiz_kilinan = 0
+
+    def _taze(self, profil, eklenme):
+        ttl = self.bos_ttl if profil is _YOK else self.ttl
+        return time.time() - eklenme <= ttl
+
+    def _yerel_getir(self, uid):
+        kayit = self._veri.get(uid)
+        if kayit is None:
+            return None
+        if not self._taze(*kayit):
+            del self._veri[uid]
+            self.suresi_dolan += 1
+            return None
+        self._veri.move_to_end(uid)
+        return kayit
+
+    def _yerel_koy(self, uid, profil, eklenme):
+        self._veri[uid] = (profil, eklenme)
+        self._veri.move_to_end(uid)
+        while len(self._veri) > self.max_boyut:
+            self._veri.popitem(last=False)
+            self.cikarilan += 1
+
+    def _yoklama_planla(self):
+        # Başka bir worker'da geçersiz kılınan profillerin yerel kopyaları thread'de yapılan
+        # yoklamayla silinir; isabet yolu SQLite'ı beklemez
+        if self.paylasimli is None or self._yoklama_gorevi is not None:
+            return
+        if time.time() - self._son_yoklama < self.yoklama_araligi:
+            return
+        self._yoklama_gorevi = asyncio.ensure_future(self._yokla())
+
+    async def _yokla(self):
+        baslangic = self._son_yoklama = time.time()
+        try:
+            # Worker saatleri arasındaki küçük farklar için 1 sn geriden sorgulanır
+            gecersizler = await asyncio.get_running_loop().run_in_executor(
+                None, self.paylasimli.gecersizler, self._yoklama_esigi - 1
+            )
+            self._yoklama_esigi = baslangic
+            for uid, zaman in gecersizler:
+                kayit = self._veri.get(uid)
+                if kayit is not None and kayit[1] <= zaman:
+                    del self._veri[uid]
+        except Exception as e:
+            print(f"⚠️ Profil önbelleği geçersiz kılmaları okunamadı: {e}")
+        finally:
+            self._yoklama_gorevi = None
+
+    async def _paylasimli_getir(self, uid):
+        """Ortak depodaki taze ve geçersiz kılınmamış kayıt: (profil veya _YOK, eklenme) ya da None"""
+        try:
+            ortak = await asyncio.get_running_loop().run_in_executor(None, self.paylasimli.getir, uid)
+        except Exception as e:
+            print(f"⚠️ Ortak profil önbelleği okunamadı: {e}")
+            return None
+        if ortak is None:
+            return None
+        profil, eklenme, gecersiz = ortak
+        profil = _YOK if profil is None else profil
+        if not self._taze(profil, eklenme) or gecersiz >= eklenme:
+            return None
+        return profil, eklenme
+
+    async def _koy(self, uid, profil, eklenme):
+        self._yerel_koy(uid, _YOK if profil is None else profil, eklenme)
+        if self.paylasimli is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.paylasimli.koy, uid, profil, eklenme)
+            except Exception as e:
+                # Ortak kopya sadece diğer worker'lara kolaylık; yazılamazsa istek bozulmaz
+                print(f"⚠️ Ortak profil önbelleğine yazılamadı: {e}")
+
+    async def gecersiz_kil(self, uid):
+        """Profil güncellendiğinde çağrılır; yerel ve paylaşılan kopyalar silinir"""
+        self._veri.pop(uid, None)
+        if uid in self._ucustaki:
+            self._ucusta_gecersiz.add(uid)
+        if self.paylasimli is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.paylasimli.gecersiz_kil, uid, time.time())
+        self.gecersiz_kilinan += 1
+
+    async def getir_veya_yukle(self, uid, yukle):
+        """Profil dict'i veya doküman yoksa None; yukle() async olarak dict veya None döndürür.
+        Aynı uid için eşzamanlı istekler tek okumayı (ortak depo + yukle) bekler."""
+        kayit = self._yerel_getir(uid)
+        if kayit is not None:
+            self.isabet += 1
+            self._yoklama_planla()
+            return None if kayit[0] is _YOK else kayit[0]
+
+        if uid in self._ucustaki:
+            self.isabet += 1
+            return await asyncio.shield(self._ucustaki[uid])
+
+        future = asyncio.get_running_loop().create_future()
+        self._ucustaki[uid] = future
+        try:
+            # Eklenme zamanı okumanın başı: okuma sırasında başka worker'da yapılan
+            # geçersiz kılma daha yeni sayılır ve bu kopya eski kabul edilir
+            baslangic = time.time()
+            ortak = await self._paylasimli_getir(uid) if self.paylasimli is not None else None
+            if ortak is not None and uid not in self._ucusta_gecersiz:
+                self._yerel_koy(uid, *ortak)
+                self.paylasimli_isabet += 1
+                profil = None if ortak[0] is _YOK else ortak[0]
+            else:
+                self.iska += 1
+                profil = await yukle()
+                if profil is None:
+                    self.bulunamayan += 1
+                if uid not in self._ucusta_gecersiz:
+                    await self._koy(uid, profil, baslangic)
+            future.set_result(profil)
+            return profil
+        except Exception as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısını önle
+            future.exception()
+            raise
+        finally:
+            # Lider görev iptal edildiyse (istemci koptu, kapanış) bekleyenler asılı kalmasın
+            if not future.done():
+                future.set_exception(RuntimeError("Ortak profil okuması iptal edildi"))
+                future.exception()
+            del self._ucustaki[uid]
+            self._ucusta_gecersiz.discard(uid)
+
+    def istatistik(self):
+        toplam = self.isabet + self.paylasimli_isabet + self.iska
+        return {
+            "boyut": len(self._veri),
+            "max_boyut": self.max_boyut,
+            "ttl_sn": self.ttl,
+            "paylasimli": self.paylasimli is not None,
+            "isabet": self.isabet,
+            "paylasimli_isabet": self.paylasimli_isabet,
+            "iska": self.iska,
+            "isabet_orani": round((self.isabet + self.paylasimli_isabet) / toplam, 3) if toplam else 0,
+            "bulunamayan": self.bulunamayan,
+            "cikarilan": self.cikarilan,
+            "suresi_dolan": self.suresi_dolan,
+            "gecersiz_kilinan": self.gecersiz_kilinan,
+        }
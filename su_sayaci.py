@@ -0,0 +1,62 @@
+"""
+GÜNLÜK SU SAYAÇLARI
+
+Her kullanıcı ve gün için tek bir `gunluk_su/{uid}_{YYYY-MM-DD}` sayaç dokümanı tutulur.
+/su-ic her bardak için `su_takibi`'ne olay kaydı ekler ve sayacı aynı batch'te
+Increment ile artırır; /su-durumu günün tüm kayıtlarını toplamak yerine tek doküman okur.
+
+Sayaçlar geriye dönük olarak `python su_sayaci_olustur.py` ile su_takibi kayıtlarından
+kurulur (ilk kurulumda ve demo veri ekledikten sonra).
+"""
+from collections import defaultdict
+
+from firebase_admin import firestore
+
+SU_KOLEKSIYONU = "gunluk_su"
+# Olay başına bir yazma + gün başına bir sayaç yazması; 500 işlem sınırının altında kalır
+BATCH_OLAY_SAYISI = 250
+
+
+def su_id(uid, tarih_str):
+    return f"{uid}_{tarih_str}"
+
+
+async def su_toplu_ekle(db, kayitlar):
+    """[{"kullanici_id", "miktar", "tarih", "id" (opsiyonel)}] olaylarını yazar ve sayaçları
+    artırır. Her batch kendi olaylarının sayaç artışlarını içerir (bir batch'in yazılması
+    diğerlerini etkilemez)."""
+    for i in range(0, len(kayitlar), BATCH_OLAY_SAYISI):
+        batch = db.batch()
+        sayaclar = defaultdict(lambda: {"toplam": 0, "bardak": 0})  # (uid, gün) -> artış
+        for kayit in kayitlar[i:i + BATCH_OLAY_SAYISI]:
+            uid = kayit["kullanici_id"]
+            tarih_str = kayit["tarih"].strftime("%Y-%m-%d")
+            batch.set(db.collection("su_takibi").document(kayit.get("id")), {
+                "miktar": kayit["miktar"],
+                "kullanici_id": uid,
+                "tarih": kayit["tarih"],
+                "tarih_str": tarih_str,
+            })
+            sayaclar[(uid, tarih_str)]["toplam"] += kayit["miktar"]
+            sayaclar[(uid, tarih_str)]["bardak"] += 1
+
+        for (uid, tarih_str), artis in sayaclar.items():
+            batch.set(db.collection(SU_KOLEKSIYONU).document(su_id(uid, tarih_str)), {
+                "kullanici_id": uid,
+                "tarih_str": tarih_str,
+                "toplam": firestore.Increment(artis["toplam"]),
+                "bardak": firestore.Increment(artis["bardak"]),
+            }, merge=True)
+        await batch.commit()
+
+
+async def su_getir(db, uid, tarih_str):
+    """Günün toplam su miktarı (ml), tek doküman okuması"""
+    doc = await db.collection(SU_KOLEKSIYONU).document(su_id(uid, tarih_str)).get()
+    return doc.to_dict().get("toplam", 0) if doc.exists else 0
+
+
+async def su_araligi(db, uid, baslangic, bitis):
+    """[baslangic, bitis] arasındaki günlük toplamlar: {"YYYY-MM-DD": ml}"""
+    docs = db.collection(SU_KOLEKSIYONU).where("kullanici_id", "==", uid).where("tarih_str", ">=", baslangic.isoformat()).where("tarih_str", "<=", bitis.isoformat()).stream()
+    return {veri["tarih_str"]: veri.get("toplam", 0) for veri in [d.to_dict() async for d in docs]}
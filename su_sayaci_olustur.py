@@ -0,0 +1,93 @@
+"""
+Su Sayaçlarını Oluşturma Script'i
+su_takibi kayıtlarından gunluk_su sayaç dokümanlarını baştan hesaplar.
+Sayaçlara geçişte (sunucu güncellendikten hemen sonra), demo veri ekledikten sonra
+veya sayaçlardan şüphelenildiğinde çalıştırın. Tekrar çalıştırmak güvenlidir.
+
+Kullanım:
+    python su_sayaci_olustur.py --kullanici_id YOUR_USER_ID
+    python su_sayaci_olustur.py --hepsi
+"""
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+from collections import defaultdict
+import argparse
+
+from su_sayaci import SU_KOLEKSIYONU, su_id
+
+BATCH_LIMITI = 500  # Firestore batch başına en fazla işlem
+
+# Firebase bağlantısı
+try:
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("firebase_key.json")
+        firebase_admin.initialize_app(cred)
+        print("✅ Firebase Bağlandı")
+except Exception as e:
+    print(f"❌ Firebase Hatası: {e}")
+
+db = firestore.client()
+
+
+def toplu_yaz(islemler):
+    """(tur, ref, veri) listesini 500'lük batch'ler halinde yazar"""
+    for i in range(0, len(islemler), BATCH_LIMITI):
+        batch = db.batch()
+        for tur, ref, veri in islemler[i:i + BATCH_LIMITI]:
+            if tur == "sil":
+                batch.delete(ref)
+            else:
+                batch.set(ref, veri)
+        batch.commit()
+
+
+def sayaclari_olustur(kullanici_id=None):
+    sorgu = db.collection("su_takibi")
+    if kullanici_id:
+        sorgu = sorgu.where("kullanici_id", "==", kullanici_id)
+
+    # (kullanıcı, gün) -> {"toplam", "bardak"}
+    gunler = defaultdict(lambda: {"toplam": 0, "bardak": 0})
+    for doc in sorgu.stream():
+        veri = doc.to_dict()
+        if "kullanici_id" not in veri:
+            continue
+        tarih_str = veri.get("tarih_str") or veri["tarih"].strftime("%Y-%m-%d")
+        sayac = gunler[(veri["kullanici_id"], tarih_str)]
+        sayac["toplam"] += veri.get("miktar", 0)
+        sayac["bardak"] += 1
+
+    islemler = []
+    for (uid, tarih_str), sayac in gunler.items():
+        ref = db.collection(SU_KOLEKSIYONU).document(su_id(uid, tarih_str))
+        islemler.append(("yaz", ref, {"kullanici_id": uid, "tarih_str": tarih_str, **sayac}))
+
+    # Artık kaydı kalmamış günlerin sayaçlarını temizle
+    eskiler = 0
+    sayac_sorgusu = db.collection(SU_KOLEKSIYONU)
+    if kullanici_id:
+        sayac_sorgusu = sayac_sorgusu.where("kullanici_id", "==", kullanici_id)
+    for doc in sayac_sorgusu.stream():
+        veri = doc.to_dict()
+        if (veri.get("kullanici_id"), veri.get("tarih_str")) not in gunler:
+            islemler.append(("sil", doc.reference, None))
+            eskiler += 1
+
+    toplu_yaz(islemler)
+    print(f"🎉 {len(gunler)} günlük su sayacı yazıldı, {eskiler} eski sayaç silindi.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Su sayaçlarını su_takibi kayıtlarından oluştur")
+    parser.add_argument("--kullanici_id", type=str, help="Firebase kullanıcı ID'si")
+    parser.add_argument("--hepsi", action="store_true", help="Tüm kullanıcılar için")
+
+    args = parser.parse_args()
+
+    if not args.kullanici_id and not args.hepsi:
+        print("❌ Kullanıcı ID'si veya --hepsi gerekli!")
+        print("Kullanım: python su_sayaci_olustur.py --kullanici_id YOUR_USER_ID")
+    else:
+        print("⚠️ Oluşturma sırasında içilen su için script'i tekrar çalıştırın.")
+        sayaclari_olustur(args.kullanici_id)
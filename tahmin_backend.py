@@ -0,0 +1,105 @@
+"""
+YEMEK SINIFLANDIRICI İÇİN ÇIKARIM BACKEND'LERİ
+
+Eğitilmiş ViT modelini farklı çalışma zamanlarıyla yükler. Hepsi aynı arayüzü
+sunar: backend(pixel_values) -> logits (numpy, [batch, sınıf]) ve model.config.
+
+Backend'ler (MODEL_BACKEND ortam değişkeni):
+- eager       : Düz PyTorch fp32 (varsayılan)
+- torchscript : model_disa_aktar.py ile üretilen TorchScript dosyası
+- compile     : torch.compile ile derlenmiş model
+- int8        : Linear katmanları dinamik int8 quantize edilmiş PyTorch modeli
+- onnx        : ONNX Runtime (fp32)
+- onnx-int8   : ONNX Runtime (dinamik int8 quantize)
+
+torchscript / onnx / onnx-int8 için önce `python model_disa_aktar.py` çalıştırılmalı.
+"""
+import os
+
+import numpy as np
+import torch
+from transformers import ViTConfig, ViTForImageClassification
+
+BACKENDLER = ["eager", "torchscript", "compile", "int8", "onnx", "onnx-int8"]
+
+# Dışa aktarılan dosyalar model klasörünün içinde tutulur
+TORCHSCRIPT_DOSYA = "model.torchscript.pt"
+ONNX_DOSYA = "model.onnx"
+ONNX_INT8_DOSYA = "model.int8.onnx"
+
+
+class LogitSarmalayici(torch.nn.Module):
+    """HF çıktısı yerine sadece logits döndürür (trace / ONNX export için)"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return self.model(pixel_values=pixel_values).logits
+
+
+class TorchBackend:
+    def __init__(self, modul, config, ad):
+        self.modul = modul
+        self.config = config
+        self.ad = ad
+
+    def __call__(self, pixel_values):
+        with torch.inference_mode():
+            return self.modul(torch.as_tensor(pixel_values)).numpy()
+
+
+class OnnxBackend:
+    def __init__(self, dosya, config, ad):
+        import onnxruntime as ort
+
+        ayarlar = ort.SessionOptions()
+        ayarlar.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.oturum = ort.InferenceSession(dosya, ayarlar, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.ad = ad
+
+    def __call__(self, pixel_values):
+        if isinstance(pixel_values, torch.Tensor):
+            pixel_values = pixel_values.numpy()
+        girdi = np.ascontiguousarray(pixel_values, dtype=np.float32)
+        return self.oturum.run(["logits"], {"pixel_values": girdi})[0]
+
+
+def _eager_model(model_yolu):
+    # model.safetensors varsa ağırlıklar mmap ile okunur; low_cpu_mem_usage
+    # rastgele başlatma + kopyalama adımını atlar (daha hızlı açılış, daha az bellek)
+    model = ViTForImageClassification.from_pretrained(model_yolu, low_cpu_mem_usage=True)
+    model.eval()
+    return model
+
+
+def backend_yukle(ad, model_yolu):
+    """İstenen backend'i yükler, dosya eksikse anlaşılır bir hata verir"""
+    if ad not in BACKENDLER:
+        raise ValueError(f"Bilinmeyen backend: {ad} (seçenekler: {', '.join(BACKENDLER)})")
+
+    if ad in ("onnx", "onnx-int8"):
+        # ONNX yolunda PyTorch ağırlıkları belleğe hiç yüklenmez
+        dosya = os.path.join(model_yolu, ONNX_DOSYA if ad == "onnx" else ONNX_INT8_DOSYA)
+        if not os.path.exists(dosya):
+            raise FileNotFoundError(f"{dosya} yok, önce model_disa_aktar.py çalıştırın")
+        return OnnxBackend(dosya, ViTConfig.from_pretrained(model_yolu), ad)
+
+    if ad == "torchscript":
+        dosya = os.path.join(model_yolu, TORCHSCRIPT_DOSYA)
+        if not os.path.exists(dosya):
+            raise FileNotFoundError(f"{dosya} yok, önce model_disa_aktar.py çalıştırın")
+        modul = torch.jit.optimize_for_inference(torch.jit.load(dosya).eval())
+        return TorchBackend(modul, ViTConfig.from_pretrained(model_yolu), ad)
+
+    model = _eager_model(model_yolu)
+    modul = LogitSarmalayici(model).eval()
+
+    if ad == "int8":
+        modul = torch.ao.quantization.quantize_dynamic(modul, {torch.nn.Linear}, dtype=torch.qint8)
+    elif ad == "compile":
+        modul = torch.compile(modul, dynamic=True)
+
+    return TorchBackend(modul, model.config, ad)
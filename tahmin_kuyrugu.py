@@ -0,0 +1,238 @@
+"""
+MİKRO-BATCH TAHMİN KUYRUĞU
+
+/predict isteklerini kısa bir pencere boyunca (max batch boyutu / max bekleme ms)
+toplar, modeli tek bir batch forward ile çalıştırır ve her çağırana kendi
+sonucunu döndürür. Kuyruktaki her girdi bir veya birden fazla satır (resim)
+taşıyabilir; batch boyutu satır sayısına göre hesaplanır ve max_batch satırı aşmaz
+(sığmayan girdi bir sonraki batch'i başlatır).
+
+Ön işleme ve forward, event loop'u bloklamamak için boyutu sınırlı bir
+ThreadPoolExecutor'da çalışır. Bekleyen istek sayısı sınırı aşılırsa yeni
+istekler KuyrukDolu hatası ile hemen reddedilir.
+"""
+import asyncio
+import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Bekleme süresi histogramı için üst sınırlar (ms)
+BEKLEME_KOVALARI_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class KuyrukDolu(Exception):
+    """Bekleyen istek sınırı aşıldığında fırlatılır"""
+
+    def __init__(self, retry_after):
+        super().__init__("Sunucu meşgul, lütfen tekrar deneyin")
+        self.retry_after = retry_after
+
+
+class MikroBatchKuyrugu:
+    def __init__(self, calistir, on_isle=None, max_batch=8, max_bekleme_ms=10, isci_sayisi=1, max_bekleyen=64, bekleme_metrigi=None):
+        # calistir: [satır, ...] dizilerinin listesini alır, her satır için sırayla sonuç döndürür
+        # on_isle: ham girdiyi (ör. resim baytları) modele hazır [1, ...] diziye çevirir
+        # bekleme_metrigi: opsiyonel metrikler.Histogram (saniye), /metrics için
+        self.bekleme_metrigi = bekleme_metrigi
+        self.calistir = calistir
+        self.on_isle = on_isle
+        self.max_batch = max_batch
+        self.max_bekleme = max_bekleme_ms / 1000
+        self.isci_sayisi = isci_sayisi
+        self.max_bekleyen = max_bekleyen
+        self.havuz = ThreadPoolExecutor(max_workers=isci_sayisi, thread_name_prefix="tahmin")
+        self._kuyruk = None
+        self._artan = None  # Önceki batch'e sığmayan girdi
+        self._gorev = None
+        self._semafor = None
+        self._calisan = set()
+        self._bekleyen = 0
+
+        # İstatistikler
+        self.batch_histogram = Counter()
+        self.derinlik_histogram = Counter()
+        self.bekleme_histogram = Counter()
+        self.toplam_istek = 0
+        self.toplam_batch = 0
+        self.toplam_satir = 0
+        self.reddedilen = 0
+        self.toplam_bekleme = 0.0
+        self.max_bekleme_gorulen = 0.0
+        self.toplam_forward = 0.0
+
+    async def baslat(self):
+        if self._gorev is None:
+            self._kuyruk = asyncio.Queue()
+            self._semafor = asyncio.Semaphore(self.isci_sayisi)
+            self._gorev = asyncio.create_task(self._dongu())
+
+    async def durdur(self):
+        if self._gorev is not None:
+            self._gorev.cancel()
+            try:
+                await self._gorev
+            except asyncio.CancelledError:
+                pass
+            self._gorev = None
+        self.havuz.shutdown(wait=False)
+
+    def _retry_after(self):
+        """Ortalama forward süresine göre kaç saniye sonra tekrar denenmeli"""
+        ortalama = self.toplam_forward / self.toplam_batch if self.toplam_batch else 1
+        tur = math.ceil(self._bekleyen / (self.max_batch * self.isci_sayisi))
+        return max(1, math.ceil(ortalama * tur))
+
+    async def havuzda(self, fonksiyon, *args):
+        """Bloklayan bir işi tahmin havuzunda çalıştırır"""
+        return await asyncio.get_running_loop().run_in_executor(self.havuz, fonksiyon, *args)
+
+    async def kabul_ile(self, fonksiyon, *args):
+        """Tahmin dışı bloklayan bir işi (ör. phash) havuzda çalıştırır; tahminlerle aynı
+        bekleyen sınırından geçer, ani yüklemeler havuzu sınırın ötesinde doldurmaz"""
+        await self.baslat()
+        self._kabul_et(1)
+        try:
+            return await self.havuzda(fonksiyon, *args)
+        finally:
+            self._bekleyen -= 1
+
+    def _kabul_et(self, adet):
+        # Kabul kontrolü: sınır aşıldıysa gecikme biriktirmek yerine hemen reddet
+        if self._bekleyen + adet > self.max_bekleyen:
+            self.reddedilen += adet
+            raise KuyrukDolu(self._retry_after())
+        self._bekleyen += adet
+
+    async def _kuyruga_ekle(self, girdi):
+        future = asyncio.get_running_loop().create_future()
+        self.derinlik_histogram[self._kuyruk.qsize()] += 1
+        await self._kuyruk.put((girdi, future, time.monotonic()))
+        self.toplam_istek += 1
+        return await future
+
+    async def tahmin_et(self, girdi):
+        """Girdiyi kuyruğa ekler ve batch sonucunu bekler"""
+        await self.baslat()
+        self._kabul_et(1)
+        try:
+            if self.on_isle:
+                girdi = await self.havuzda(self.on_isle, girdi)
+            return (await self._kuyruga_ekle(girdi))[0]
+        finally:
+            self._bekleyen -= 1
+
+    async def tahmin_et_toplu(self, girdiler):
+        """Birden fazla girdiyi paralel ön işler ve max_batch satırlık forward'larda sınıflandırır.
+        Ön işlemede hata veren girdiler için sonuç yerine hata nesnesi döner."""
+        await self.baslat()
+        self._kabul_et(len(girdiler))
+        try:
+            if self.on_isle:
+                girdiler = await asyncio.gather(
+                    *[self.havuzda(self.on_isle, g) for g in girdiler], return_exceptions=True
+                )
+            gecerli = [g for g in girdiler if not isinstance(g, Exception)]
+            satirlar = np.concatenate(gecerli) if gecerli else []
+            parcalar = await asyncio.gather(
+                *[self._kuyruga_ekle(satirlar[i:i + self.max_batch]) for i in range(0, len(satirlar), self.max_batch)]
+            )
+            sonuclar = iter([sonuc for parca in parcalar for sonuc in parca])
+            return [g if isinstance(g, Exception) else next(sonuclar) for g in girdiler]
+        finally:
+            self._bekleyen -= len(girdiler)
+
+    async def _topla(self):
+        """İlk isteği bekler, pencere dolana kadar max_batch satırı aşmayan yenilerini ekler"""
+        if self._artan is not None:
+            batch, self._artan = [self._artan], None
+        else:
+            batch = [await self._kuyruk.get()]
+        satir = len(batch[0][0])
+        son = time.monotonic() + self.max_bekleme
+
+        while satir < self.max_batch:
+            kalan = son - time.monotonic()
+            if kalan <= 0:
+                break
+            try:
+                oge = await asyncio.wait_for(self._kuyruk.get(), kalan)
+            except asyncio.TimeoutError:
+                break
+            if satir + len(oge[0]) > self.max_batch:
+                self._artan = oge
+                break
+            batch.append(oge)
+            satir += len(oge[0])
+        return batch
+
+    def _bekleme_kaydet(self, saniye):
+        self.toplam_bekleme += saniye
+        self.max_bekleme_gorulen = max(self.max_bekleme_gorulen, saniye)
+        ms = saniye * 1000
+        kova = next((k for k in BEKLEME_KOVALARI_MS if ms <= k), "+Inf")
+        self.bekleme_histogram[kova] += 1
+        if self.bekleme_metrigi is not None:
+            self.bekleme_metrigi.gozlemle(saniye)
+
+    async def _dongu(self):
+        while True:
+            # Boş işçi yoksa istekler kuyrukta birikir, sonraki batch daha dolu olur
+            await self._semafor.acquire()
+            try:
+                batch = await self._topla()
+            except asyncio.CancelledError:
+                self._semafor.release()
+                raise
+            gorev = asyncio.create_task(self._calistir(batch))
+            self._calisan.add(gorev)
+            gorev.add_done_callback(self._calisan.discard)
+
+    async def _calistir(self, batch):
+        try:
+            baslangic = time.monotonic()
+            for _, _, eklenme in batch:
+                self._bekleme_kaydet(baslangic - eklenme)
+            satirlar = [len(girdi) for girdi, _, _ in batch]
+            self.batch_histogram[sum(satirlar)] += 1
+            self.toplam_batch += 1
+            self.toplam_satir += sum(satirlar)
+
+            try:
+                sonuclar = await self.havuzda(self.calistir, [girdi for girdi, _, _ in batch])
+                # Düz sonuç listesini her girdinin satır sayısına göre böl
+                bas = 0
+                for (_, future, _), adet in zip(batch, satirlar):
+                    if not future.done():
+                        future.set_result(sonuclar[bas:bas + adet])
+                    bas += adet
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.toplam_forward += time.monotonic() - baslangic
+        finally:
+            self._semafor.release()
+
+    def istatistik(self):
+        return {
+            "kuyruk_derinligi": self._kuyruk.qsize() if self._kuyruk else 0,
+            "bekleyen": self._bekleyen,
+            "max_bekleyen": self.max_bekleyen,
+            "isci_sayisi": self.isci_sayisi,
+            "max_batch": self.max_batch,
+            "max_bekleme_ms": int(self.max_bekleme * 1000),
+            "toplam_istek": self.toplam_istek,
+            "toplam_batch": self.toplam_batch,
+            "reddedilen": self.reddedilen,
+            "ortalama_batch": round(self.toplam_satir / self.toplam_batch, 2) if self.toplam_batch else 0,
+            "batch_histogram": dict(sorted(self.batch_histogram.items())),
+            "derinlik_histogram": dict(sorted(self.derinlik_histogram.items())),
+            "kuyruk_bekleme": {
+                "ortalama_ms": round(self.toplam_bekleme / self.toplam_istek * 1000, 2) if self.toplam_istek else 0,
+                "max_ms": round(self.max_bekleme_gorulen * 1000, 2),
+                "histogram_ms": {str(k): self.bekleme_histogram[k] for k in BEKLEME_KOVALARI_MS + ["+Inf"]},
+            },
+        }
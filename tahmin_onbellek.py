@@ -0,0 +1,162 @@
+"""
+TAHMİN ÖNBELLEĞİ
+
+Aynı fotoğraf tekrar yüklendiğinde (ağ hatası sonrası retry, galeriden tekrar seçme)
+ViT forward'ı yeniden çalıştırmamak için yükleme baytlarının hash'i ile anahtarlanan
+LRU + TTL önbellek.
+
+phash modunda ayrıca 64 bitlik fark hash'i (dHash) tutulur; yeniden sıkıştırılmış
+neredeyse aynı resimler Hamming mesafesi eşiğin altındaysa önbellekten döner. dHash
+resmi çözmeyi gerektirdiği için sadece birebir (bayt hash) eşleşme yoksa hesaplanır.
+Aynı anahtar için uçuştaki tahminler tek bir forward'ı paylaşır.
+"""
+import asyncio
+import hashlib
+import io
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from on_isleme import MAX_PIKSEL, GecersizResim
+
+
+def bayt_hash(contents):
+    return hashlib.sha256(contents).hexdigest()
+
+
+def algisal_hash(contents):
+    """9x8 gri tonlamalı küçük resimde yatay komşu farklarından 64 bitlik dHash.
+    Çözülemeyen resimler tahmin yolundaki gibi GecersizResim fırlatır."""
+    try:
+        img = Image.open(io.BytesIO(contents))
+    except Exception:
+        raise GecersizResim("Resim okunamadı")
+    if img.width * img.height > MAX_PIKSEL:
+        raise GecersizResim("Resim çözünürlüğü çok yüksek", 413)
+    img.draft("L", (64, 64))
+    try:
+        piksel = list(img.convert("L").resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    except OSError:
+        raise GecersizResim("Resim okunamadı")
+    deger = 0
+    for satir in range(8):
+        for sutun in range(8):
+            sol = piksel[satir * 9 + sutun]
+            sag = piksel[satir * 9 + sutun + 1]
+            deger = (deger << 1) | (sol > sag)
+    return deger
+
+
+class TahminOnbellegi:
+    def __init__(self, max_boyut=1024, ttl_sn=3600, phash_esik=None):
+        # phash_esik None ise sadece birebir aynı baytlar eşleşir
+        self.max_boyut = max_boyut
+        self.ttl = ttl_sn
+        self.phash_esik = phash_esik
+        self._veri = OrderedDict()  # anahtar -> (etiket, eklenme, phash)
+        self._ucustaki = {}
+
+        # İstatistikler
+        self.isabet = 0
+        self.phash_isabet = 0
+        self.iska = 0
+        self.cikarilan = 0
+        self.suresi_dolan = 0
+
+    def _gecerli(self, anahtar):
+        kayit = self._veri.get(anahtar)
+        if kayit is None:
+            return None
+        if time.monotonic() - kayit[1] > self.ttl:
+            del self._veri[anahtar]
+            self.suresi_dolan += 1
+            return None
+        return kayit
+
+    def _phash_ara(self, phash):
+        for anahtar, (_, _, diger) in list(self._veri.items()):
+            if diger is not None and bin(phash ^ diger).count("1") <= self.phash_esik:
+                kayit = self._gecerli(anahtar)
+                if kayit:
+                    self._veri.move_to_end(anahtar)
+                    return kayit[0]
+        return None
+
+    def getir(self, anahtar, phash=None):
+        kayit = self._gecerli(anahtar)
+        if kayit:
+            self._veri.move_to_end(anahtar)
+            self.isabet += 1
+            return kayit[0]
+
+        if phash is not None and self.phash_esik is not None:
+            etiket = self._phash_ara(phash)
+            if etiket is not None:
+                self.phash_isabet += 1
+                return etiket
+
+        self.iska += 1
+        return None
+
+    def koy(self, anahtar, etiket, phash=None):
+        self._veri[anahtar] = (etiket, time.monotonic(), phash)
+        self._veri.move_to_end(anahtar)
+        while len(self._veri) > self.max_boyut:
+            self._veri.popitem(last=False)
+            self.cikarilan += 1
+
+    async def getir_veya_hesapla(self, anahtar, hesapla, phash_hesapla=None):
+        """Önbellekte yoksa hesapla(); aynı anahtar için eşzamanlı istekler tek hesaplamayı bekler.
+        phash_hesapla (async, opsiyonel) sadece birebir eşleşme ve uçuştaki tahmin yoksa çağrılır."""
+        etiket = self.getir(anahtar)
+        if etiket is not None:
+            return etiket, True
+
+        if anahtar in self._ucustaki:
+            self.iska -= 1
+            self.isabet += 1
+            return await asyncio.shield(self._ucustaki[anahtar]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._ucustaki[anahtar] = future
+        phash = None
+        try:
+            if phash_hesapla is not None and self.phash_esik is not None:
+                phash = await phash_hesapla()
+                etiket = self._phash_ara(phash)
+                if etiket is not None:
+                    self.iska -= 1
+                    self.phash_isabet += 1
+                    future.set_result(etiket)
+                    return etiket, True
+            etiket = await hesapla()
+            self.koy(anahtar, etiket, phash)
+            future.set_result(etiket)
+            return etiket, False
+        except Exception as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısını önle
+            future.exception()
+            raise
+        finally:
+            # Lider görev iptal edildiyse (istemci koptu, kapanış) bekleyenler asılı kalmasın
+            if not future.done():
+                future.set_exception(RuntimeError("Ortak tahmin iptal edildi"))
+                future.exception()
+            del self._ucustaki[anahtar]
+
+    def istatistik(self):
+        toplam = self.isabet + self.phash_isabet + self.iska
+        return {
+            "boyut": len(self._veri),
+            "max_boyut": self.max_boyut,
+            "ttl_sn": self.ttl,
+            "mod": "phash" if self.phash_esik is not None else "sha256",
+            "isabet": self.isabet,
+            "phash_isabet": self.phash_isabet,
+            "iska": self.iska,
+            "isabet_orani": round((self.isabet + self.phash_isabet) / toplam, 3) if toplam else 0,
+            "cikarilan": self.cikarilan,
+            "suresi_dolan": self.suresi_dolan,
+        }
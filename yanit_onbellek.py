@@ -0,0 +1,174 @@
+"""
+KULLANICI ÖZETİ YANIT ÖNBELLEĞİ (ETag)
+
+Rapor ve ana ekran her odaklanmada /makro-dagilim, /hedef-ozeti, /istatistik-haftalik,
+/su-durumu ve /dashboard isteklerini tekrarlar; çoğu zaman arada hiçbir kayıt değişmez.
+Bu yanıtların JSON gövdeleri (kullanıcı, endpoint + tarih) anahtarıyla LRU önbellekte
+tutulur:
+
+- Her kullanıcının bir sürüm sayacı vardır; yazan endpoint'ler (/kaydet, /spor-yap,
+  /kaydet-toplu, /sil, /su-ic, /profil-guncellendi) sayacı artırır ve kullanıcının
+  önbellekteki tüm yanıtları silinir. Okuma sürerken sürüm değiştiyse hesaplanan yanıt
+  önbelleğe konmaz (yazmadan önce okunmuş eski veri saklanmaz).
+- ETag gövdenin hash'idir: aynı içerik worker veya yeniden başlatmadan bağımsız olarak
+  aynı ETag'i alır. If-None-Match eşleşirse 304 döner; önbellekte geçerli kayıt varsa
+  depoya hiç gidilmez.
+- Bellek hem kayıt sayısıyla hem toplam gövde baytıyla sınırlıdır; sınır aşılınca en
+  uzun süre kullanılmayan yanıtlar çıkarılır. TTL, depoya uygulama dışından yapılan
+  yazmaların (ör. demo betikleri) en geç ne kadar sürede görüneceğini belirler.
+
+Birden fazla uvicorn worker'ı çalışıyorsa YANIT_ONBELLEK_DOSYA ile ortak bir SQLite
+dosyası verilmelidir: sürüm sayaçları orada tutulur, bir worker'daki yazma diğer
+worker'ların önbelleğindeki yanıtları da geçersiz kılar.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class PaylasimliSurumDeposu:
+    """Worker'lar arasında paylaşılan kullanıcı sürüm sayaçları (yerel SQLite)"""
+
+    def __init__(self, yol):
+        self._baglanti = sqlite3.connect(yol, check_same_thread=False, isolation_level=None, timeout=1)
+        self._kilit = threading.Lock()
+        with self._kilit:
+            self._baglanti.execute("PRAGMA journal_mode=WAL")
+            self._baglanti.execute("PRAGMA synchronous=NORMAL")
+            self._baglanti.execute("CREATE TABLE IF NOT EXISTS surum (uid TEXT PRIMARY KEY, deger INTEGER)")
+
+    def getir(self, uid):
+        with self._kilit:
+            satir = self._baglanti.execute("SELECT deger FROM surum WHERE uid = ?", (uid,)).fetchone()
+        return satir[0] if satir else 0
+
+    def artir(self, uid):
+        with self._kilit:
+            self._baglanti.execute(
+                "INSERT INTO surum (uid, deger) VALUES (?, 1) ON CONFLICT(uid) DO UPDATE SET deger = deger + 1",
+                (uid,),
+            )
+
+
+def etag_hesapla(govde):
+    return '"' + hashlib.blake2b(govde, digest_size=12).hexdigest() + '"'
+
+
+def etag_eslesir(if_none_match, etag):
+    """If-None-Match başlığı (virgüllü liste, W/ önekli zayıf ETag veya *) etag'i kapsıyor mu"""
+    if not if_none_match:
+        return False
+    for aday in if_none_match.split(","):
+        aday = aday.strip()
+        if aday.startswith("W/"):
+            aday = aday[2:]
+        if aday == "*" or aday == etag:
+            return True
+    return False
+
+
+class YanitOnbellegi:
+    def __init__(self, max_boyut=10000, max_bayt=32 * 1024 * 1024, ttl_sn=300, max_surum=100000, paylasimli_dosya=None):
+        self.max_boyut = max_boyut
+        self.max_bayt = max_bayt
+        self.ttl = ttl_sn
+        self.max_surum = max_surum
+        self.paylasimli = PaylasimliSurumDeposu(paylasimli_dosya) if paylasimli_dosya else None
+
+        self._veri = OrderedDict()  # (uid, anahtar) -> (surum, etag, govde, eklenme)
+        self._kullanici_anahtarlari = {}  # uid -> {anahtar}; sürüm artınca hepsi silinir
+        self._bayt = 0
+        # Yerel sürümler tek bir artan sayaçtan verilir; sayacı çıkarılan kullanıcılar
+        # _taban'ı alır, böylece çıkarılmadan önceki sürümlerle karışmaz
+        self._surumler = OrderedDict()
+        self._sayac = 0
+        self._taban = 0
+
+        # İstatistikler
+        self.isabet = 0
+        self.iska = 0
+        self.degismedi = 0  # 304 yanıtları
+        self.cikarilan = 0
+        self.suresi_dolan = 0
+        self.gecersiz_kilinan = 0
+
+    def surum(self, uid):
+        if self.paylasimli is not None:
+            return self.paylasimli.getir(uid)
+        return self._surumler.get(uid, self._taban)
+
+    def artir(self, uid):
+        """Kullanıcının verisi değişti: sürüm artar, önbellekteki yanıtları silinir"""
+        if self.paylasimli is not None:
+            self.paylasimli.artir(uid)
+        else:
+            self._sayac += 1
+            self._surumler[uid] = self._sayac
+            self._surumler.move_to_end(uid)
+            while len(self._surumler) > self.max_surum:
+                _, eski = self._surumler.popitem(last=False)
+                self._taban = max(self._taban, eski)
+        for anahtar in self._kullanici_anahtarlari.pop(uid, ()):
+            self._cikar((uid, anahtar))
+        self.gecersiz_kilinan += 1
+
+    def _cikar(self, tam_anahtar):
+        kayit = self._veri.pop(tam_anahtar, None)
+        if kayit is None:
+            return
+        self._bayt -= len(kayit[2])
+        anahtarlar = self._kullanici_anahtarlari.get(tam_anahtar[0])
+        if anahtarlar is not None:
+            anahtarlar.discard(tam_anahtar[1])
+            if not anahtarlar:
+                del self._kullanici_anahtarlari[tam_anahtar[0]]
+
+    def getir(self, uid, anahtar, surum):
+        """Geçerli kayıt için (etag, govde), yoksa None"""
+        kayit = self._veri.get((uid, anahtar))
+        if kayit is not None:
+            eski = kayit[0] != surum
+            if eski or time.monotonic() - kayit[3] > self.ttl:
+                self._cikar((uid, anahtar))
+                if not eski:
+                    self.suresi_dolan += 1
+            else:
+                self._veri.move_to_end((uid, anahtar))
+                self.isabet += 1
+                return kayit[1], kayit[2]
+        self.iska += 1
+        return None
+
+    def koy(self, uid, anahtar, surum, govde):
+        """Yanıt gövdesini saklar ve ETag'ini döndürür; okuma sırasında sürüm değiştiyse saklamaz"""
+        etag = etag_hesapla(govde)
+        if surum != self.surum(uid) or len(govde) > self.max_bayt:
+            return etag
+        self._cikar((uid, anahtar))
+        self._veri[(uid, anahtar)] = (surum, etag, govde, time.monotonic())
+        self._kullanici_anahtarlari.setdefault(uid, set()).add(anahtar)
+        self._bayt += len(govde)
+        while len(self._veri) > self.max_boyut or self._bayt > self.max_bayt:
+            self._cikar(next(iter(self._veri)))
+            self.cikarilan += 1
+        return etag
+
+    def istatistik(self):
+        toplam = self.isabet + self.iska
+        return {
+            "boyut": len(self._veri),
+            "max_boyut": self.max_boyut,
+            "bayt": self._bayt,
+            "max_bayt": self.max_bayt,
+            "ttl_sn": self.ttl,
+            "paylasimli": self.paylasimli is not None,
+            "isabet": self.isabet,
+            "iska": self.iska,
+            "isabet_orani": round(self.isabet / toplam, 3) if toplam else 0,
+            "degismedi_304": self.degismedi,
+            "cikarilan": self.cikarilan,
+            "suresi_dolan": self.suresi_dolan,
+            "gecersiz_kilinan": self.gecersiz_kilinan,
+        }
@@ -0,0 +1,124 @@
+"""
+YAVAŞ İSTEK PROFİLLEYİCİ (OPSİYONEL)
+
+YAVAS_ISTEK_MS verildiğinde açılır. İşlenen istek varken arka plan thread'i
+YAVAS_ISTEK_ORNEK_MS aralıklarla tüm thread'lerin yığınlarını örnekler (event loop,
+tahmin işçileri, threadpool). Süresi eşiği aşan bir istek bittiğinde, isteğin
+başlangıç-bitiş aralığındaki örnekler "collapsed stack" formatında
+(flamegraph.pl / speedscope ile açılır) YAVAS_ISTEK_DIZIN altına yazılır.
+
+Event loop aynı anda birden fazla isteği işlediği için dosyada aynı aralıkta
+çalışan diğer isteklerin yığınları da bulunur; tek istekle (yuk_testi --eszamanli 1
+veya api_benchmark) tekrar üretmek en net sonucu verir.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+
+class YavasIstekProfilleyici:
+    def __init__(self, esik_ms, ornek_ms=5, dizin="yavas_istekler", pencere_sn=60, son_kayit=20):
+        self.esik = esik_ms / 1000
+        self.aralik = ornek_ms / 1000
+        self.dizin = dizin
+        # (zaman, thread adı, yığın); en uzun profillenebilir istek pencere_sn kadardır
+        self._ornekler = deque(maxlen=int(pencere_sn / self.aralik))
+        self._aktif = 0
+        self._kilit = threading.Lock()
+        self._uyandir = threading.Event()
+        self._thread = None
+
+        self._yazanlar = set()  # Dosyayı yazan arka plan görevleri (çöp toplanmasın diye)
+
+        self.son_kayitlar = deque(maxlen=son_kayit)
+        self.yavas_istek = 0
+        self.ornek_sayisi = 0
+
+    def baslat(self):
+        os.makedirs(self.dizin, exist_ok=True)
+        self._thread = threading.Thread(target=self._dongu, name="yavas-istek-ornekleyici", daemon=True)
+        self._thread.start()
+
+    def istek_basladi(self):
+        with self._kilit:
+            self._aktif += 1
+        self._uyandir.set()
+
+    def istek_bitti(self, etiket, baslangic, bitis):
+        """baslangic/bitis time.perf_counter() değerleri; eşik aşıldıysa profil dosyasının yolunu döndürür.
+        Dosya event loop'u bekletmemek için thread'de yazılır (sunucu zaten yavaşken diğer istekler durmasın)."""
+        with self._kilit:
+            self._aktif -= 1
+            if self._aktif == 0:
+                self._uyandir.clear()
+        if bitis - baslangic < self.esik:
+            return None
+
+        yiginlar = Counter(
+            f"{thread};{yigin}" for zaman, thread, yigin in list(self._ornekler) if baslangic <= zaman <= bitis
+        )
+        sure_ms = round((bitis - baslangic) * 1000)
+        dosya_adi = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{re.sub(r'[^A-Za-z0-9_-]+', '_', etiket).strip('_')}_{sure_ms}ms.txt"
+        yol = os.path.join(self.dizin, dosya_adi)
+        try:
+            gorev = asyncio.get_running_loop().run_in_executor(None, _yaz, yol, yiginlar)
+            self._yazanlar.add(gorev)
+            gorev.add_done_callback(self._yazanlar.discard)
+        except RuntimeError:
+            # Event loop dışından çağrıldı
+            _yaz(yol, yiginlar)
+
+        self.yavas_istek += 1
+        self.son_kayitlar.append({
+            "istek": etiket,
+            "sure_ms": sure_ms,
+            "ornek": sum(yiginlar.values()),
+            "dosya": yol,
+            "zaman": datetime.now().isoformat(timespec="seconds"),
+        })
+        print(f"🐢 Yavaş istek: {etiket} {sure_ms} ms -> {yol}")
+        return yol
+
+    def _dongu(self):
+        kendi = threading.get_ident()
+        while True:
+            self._uyandir.wait()
+            isimler = {t.ident: t.name for t in threading.enumerate()}
+            zaman = time.perf_counter()
+            for ident, cerceve in sys._current_frames().items():
+                if ident == kendi:
+                    continue
+                self._ornekler.append((zaman, isimler.get(ident, str(ident)), _yigin(cerceve)))
+            self.ornek_sayisi += 1
+            time.sleep(self.aralik)
+
+    def istatistik(self):
+        return {
+            "aktif": True,
+            "esik_ms": round(self.esik * 1000),
+            "ornek_ms": round(self.aralik * 1000, 1),
+            "ornek_sayisi": self.ornek_sayisi,
+            "yavas_istek": self.yavas_istek,
+            "son_kayitlar": list(self.son_kayitlar),
+        }
+
+
+def _yaz(yol, yiginlar):
+    with open(yol, "w", encoding="utf-8") as f:
+        for yigin, adet in yiginlar.most_common():
+            f.write(f"{yigin} {adet}\n")
+
+
+def _yigin(cerceve):
+    """Kökten yaprağa 'dosya:fonksiyon' zinciri (collapsed stack)"""
+    parcalar = []
+    while cerceve is not None:
+        kod = cerceve.f_code
+        parcalar.append(f"{os.path.basename(kod.co_filename)}:{kod.co_name}")
+        cerceve = cerceve.f_back
+    return ";".join(reversed(parcalar))
@@ -0,0 +1,225 @@
+"""
+GERİ YAZMALI (WRITE-BEHIND) KAYIT GÜNLÜĞÜ
+
+YAZMA_GUNLUGU_DOSYA verildiğinde /su-ic, /kaydet ve /spor-yap Firestore'a yazmayı
+beklemez: kayıt yerel bir günlük dosyasına eklenip diske fsync edildikten sonra
+istek onaylanır. Arka plan görevi bekleyen kayıtları belirli aralıklarla (veya
+grup dolunca) tek seferde Firestore'a yazar.
+
+- Grup commit: aynı anda gelen isteklerin satırları tek fsync ile kalıcı olur.
+  Sadece kalıcı olmuş kayıtlar Firestore'a yazılır. fsync başarısız olursa o gruptaki
+  istekler hata alır; kayıtları bekleyenlerden çıkarılır ve günlük son kalıcı boyuta
+  kırpılır (istemci tekrar deneyince aynı kayıt iki kez oluşmaz).
+- Kayıt id'leri günlüğe yazılırken üretilir; Firestore dokümanları bu id'lerle
+  oluşturulur. Çökme sonrası açılışta günlük baştan okunur ve Firestore'da zaten
+  olan kayıtlar atlanarak yeniden oynatılır (aynı kontrol başarısız bir yazmadan
+  sonraki denemede de yapılır).
+- Bekleyen kayıt kalmadığında günlük dosyası sıfırlanır.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import Counter
+from datetime import datetime
+
+
+def _kodla(nesne):
+    if isinstance(nesne, datetime):
+        return {"__tarih__": nesne.isoformat()}
+    raise TypeError(f"{type(nesne).__name__} günlüğe yazılamaz")
+
+
+def _coz(nesne):
+    if "__tarih__" in nesne:
+        return datetime.fromisoformat(nesne["__tarih__"])
+    return nesne
+
+
+class YazmaGunlugu:
+    def __init__(self, dosya, uygula, aralik_ms=200, max_grup=400):
+        # uygula(kayitlar, dogrula): kayıtları Firestore'a yazan async fonksiyon;
+        # dogrula True ise zaten yazılmış (id'si mevcut) kayıtları atlamalı
+        self.dosya = dosya
+        self.uygula = uygula
+        self.aralik = aralik_ms / 1000
+        self.max_grup = max_grup
+
+        self._bekleyen = []
+        self._kullanici_bekleyen = Counter()
+        self._dogrula = False
+        self._f = None
+        self._sira = 0
+        self._kalici_sira = 0
+        self._kalici_bayt = 0  # Son başarılı fsync'te günlüğün boyutu
+        self._fsync_gorevi = None
+        self._bosaltma_kilidi = None
+        self._uyandir = None
+        self._gorev = None
+
+        # İstatistikler
+        self.eklenen = 0
+        self.yazilan = 0
+        self.grup_sayisi = 0
+        self.fsync_sayisi = 0
+        self.hata = 0
+        self.son_hata = None
+        self.tekrar_oynatilan = 0
+
+    async def baslat(self):
+        """Önceki çalışmadan kalan kayıtları yükler ve arka plan yazıcısını başlatır"""
+        if os.path.exists(self.dosya):
+            with open(self.dosya, "rb+") as f:
+                icerik = f.read()
+                # Çökme anında yarım kalmış son satır (fsync edilmemiş, onaylanmamış) atılır;
+                # yoksa yeni kayıtlar onun devamına yazılırdı
+                tam = icerik.rfind(b"\n") + 1
+                if tam < len(icerik):
+                    f.truncate(tam)
+            for satir in icerik[:tam].splitlines():
+                try:
+                    kayit = json.loads(satir, object_hook=_coz)
+                except ValueError:
+                    continue
+                self._bekleyen.append(kayit)
+                self._kullanici_bekleyen[kayit.get("uid")] += 1
+            if self._bekleyen:
+                self._dogrula = True
+                self.tekrar_oynatilan = len(self._bekleyen)
+                print(f"♻️ Yazma günlüğünde {len(self._bekleyen)} bekleyen kayıt bulundu, tekrar yazılacak")
+
+        # Event loop'a bağlı nesneler burada (uvicorn'un loop'unda) oluşturulur
+        self._bosaltma_kilidi = asyncio.Lock()
+        self._uyandir = asyncio.Event()
+        self._f = open(self.dosya, "ab")
+        self._kalici_bayt = self._f.tell()
+        self._gorev = asyncio.create_task(self._dongu())
+        self._uyandir.set()
+
+    async def durdur(self):
+        """Bekleyenleri son kez yazar; yazılamayanlar günlükte kalır, açılışta tekrar denenir"""
+        if self._gorev:
+            self._gorev.cancel()
+            try:
+                await self._gorev
+            except asyncio.CancelledError:
+                pass
+            self._gorev = None
+        await self.bosalt()
+        if self._f:
+            self._f.close()
+            self._f = None
+
+    async def ekle(self, kayit):
+        """Kaydı günlüğe ekler ve diske kalıcı olunca döner; kayıt id'sini döndürür"""
+        kayit = {"id": uuid.uuid4().hex, **kayit}
+        self._f.write(json.dumps(kayit, default=_kodla, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._sira += 1
+        self._bekleyen.append(kayit)
+        self._kullanici_bekleyen[kayit.get("uid")] += 1
+        self.eklenen += 1
+
+        await self._kalici_yap(self._sira)
+        if len(self._bekleyen) >= self.max_grup:
+            self._uyandir.set()
+        return kayit["id"]
+
+    async def _kalici_yap(self, sira):
+        # Grup commit: devam eden fsync bu satırı kapsamıyorsa bitmesini bekleyip yenisini başlat
+        while self._kalici_sira < sira:
+            if self._fsync_gorevi is None:
+                self._fsync_gorevi = asyncio.ensure_future(self._fsync())
+            await asyncio.shield(self._fsync_gorevi)
+
+    async def _fsync(self):
+        try:
+            son = self._sira
+            self._f.flush()
+            bayt = self._f.tell()
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._f.fileno())
+            self._kalici_sira = max(self._kalici_sira, son)
+            self._kalici_bayt = bayt
+            self.fsync_sayisi += 1
+        except Exception as e:
+            self.hata += 1
+            self.son_hata = str(e)
+            print(f"⚠️ Yazma günlüğü fsync başarısız: {e}")
+            self._kalici_olmayanlari_at()
+            raise
+        finally:
+            self._fsync_gorevi = None
+
+    def _kalici_olmayanlari_at(self):
+        # Kalıcı olmayan satırlar listenin sonundadır ve eklenenlerin hepsi bu fsync'i bekler,
+        # hepsi hata alır: kayıtları bırakılır, günlük son kalıcı boyuta kırpılır
+        adet = self._sira - self._kalici_sira
+        for kayit in self._bekleyen[len(self._bekleyen) - adet:]:
+            self._kullanici_bekleyen[kayit.get("uid")] -= 1
+        del self._bekleyen[len(self._bekleyen) - adet:]
+        self._kullanici_bekleyen += Counter()
+        self._sira = self._kalici_sira
+        try:
+            self._f.close()
+        except OSError:
+            pass  # Tamponda kalan satırlar zaten atılıyor
+        try:
+            os.truncate(self.dosya, self._kalici_bayt)
+        finally:
+            self._f = open(self.dosya, "ab")
+
+    def bekleyen_var(self, uid):
+        return self._kullanici_bekleyen[uid] > 0
+
+    async def _dongu(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._uyandir.wait(), self.aralik)
+            except asyncio.TimeoutError:
+                pass
+            self._uyandir.clear()
+            await self.bosalt()
+
+    async def bosalt(self):
+        """Bekleyen kayıtları gruplar halinde Firestore'a yazar; hata olursa sonraki turda tekrar dener"""
+        async with self._bosaltma_kilidi:
+            while True:
+                # fsync'i bekleyen (henüz kalıcı olmayan) kayıtlar yazılmaz
+                kalici = len(self._bekleyen) - (self._sira - self._kalici_sira)
+                if kalici <= 0:
+                    break
+                grup = self._bekleyen[:min(kalici, self.max_grup)]
+                try:
+                    await self.uygula(grup, self._dogrula)
+                except Exception as e:
+                    # Yazma kısmen gerçekleşmiş olabilir; sonraki denemede mevcutlar atlanır
+                    self._dogrula = True
+                    self.hata += 1
+                    self.son_hata = str(e)
+                    print(f"⚠️ Yazma günlüğü boşaltılamadı: {e}")
+                    return
+                del self._bekleyen[:len(grup)]
+                for kayit in grup:
+                    self._kullanici_bekleyen[kayit.get("uid")] -= 1
+                self._kullanici_bekleyen += Counter()  # sıfırlananları temizle
+                self._dogrula = False
+                self.yazilan += len(grup)
+                self.grup_sayisi += 1
+
+            # Her şey Firestore'da: günlük sıfırlanır (ekle() ile aynı event loop'ta, araya kayıt giremez)
+            if self._f and not self._bekleyen and self._kalici_sira == self._sira and self._fsync_gorevi is None:
+                self._f.truncate(0)
+                self._kalici_bayt = 0
+
+    def istatistik(self):
+        return {
+            "aktif": True,
+            "bekleyen": len(self._bekleyen),
+            "eklenen": self.eklenen,
+            "yazilan": self.yazilan,
+            "grup_sayisi": self.grup_sayisi,
+            "ortalama_grup": round(self.yazilan / self.grup_sayisi, 1) if self.grup_sayisi else 0,
+            "fsync_sayisi": self.fsync_sayisi,
+            "tekrar_oynatilan": self.tekrar_oynatilan,
+            "hata": self.hata,
+            "son_hata": self.son_hata,
+        }
@@ -0,0 +1,91 @@
+"""
+YÜK TESTİ
+
+Çalışan sunucuya artan eşzamanlılıkla Firestore okuyan endpoint'lere istek atar ve
+her seviye için saniyedeki istek sayısını ve gecikmeleri yazdırır. Tek uvicorn
+worker'ı ile çalıştırıldığında sync handler'larda threadpool (varsayılan 40 thread)
+tavanı, async handler'larda ise bu tavanın kalktığı görülür.
+
+Kullanım:
+    uvicorn main:app --workers 1
+    python yuk_testi.py --uid DEMO_KULLANICI_ID
+    python yuk_testi.py --uid DEMO_KULLANICI_ID --eszamanli 10,50,100,200 --sure 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+ENDPOINTLER = [
+    "/gunluk/{uid}",
+    "/su-durumu/{uid}",
+    "/makro-dagilim/{uid}",
+    "/hedef-ozeti/{uid}",
+    "/istatistik-haftalik/{uid}",
+    "/dashboard/{uid}",
+]
+
+
+def yuzdelik(sirali, oran):
+    if not sirali:
+        return 0
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+async def seviye_calistir(istemci, yollar, eszamanli, sure):
+    """sure saniye boyunca eszamanli sayıda istemci döngüsü; (süreler, hata sayısı)"""
+    sureler = []
+    hatalar = 0
+    bitis = time.perf_counter() + sure
+
+    async def dongu(no):
+        nonlocal hatalar
+        i = no
+        while time.perf_counter() < bitis:
+            yol = yollar[i % len(yollar)]
+            i += 1
+            baslangic = time.perf_counter()
+            try:
+                yanit = await istemci.get(yol)
+                if yanit.status_code != 200 or not yanit.json().get("success", True):
+                    hatalar += 1
+            except httpx.HTTPError:
+                hatalar += 1
+            sureler.append(time.perf_counter() - baslangic)
+
+    await asyncio.gather(*(dongu(no) for no in range(eszamanli)))
+    return sureler, hatalar
+
+
+async def main_async(args):
+    yollar = [e.format(uid=args.uid) for e in ENDPOINTLER]
+    seviyeler = [int(x) for x in args.eszamanli.split(",")]
+    limitler = httpx.Limits(max_connections=max(seviyeler), max_keepalive_connections=max(seviyeler))
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limitler, timeout=60) as istemci:
+        # Isınma (bağlantılar ve Firestore kanalı açılsın)
+        await seviye_calistir(istemci, yollar, 4, 1)
+
+        print(f"{'eşzamanlı':>10} {'istek/sn':>10} {'ort ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'hata':>6}")
+        for eszamanli in seviyeler:
+            sureler, hatalar = await seviye_calistir(istemci, yollar, eszamanli, args.sure)
+            sirali = sorted(sureler)
+            ortalama = sum(sirali) / len(sirali) if sirali else 0
+            print(
+                f"{eszamanli:>10} {len(sirali) / args.sure:>10.1f} {ortalama * 1000:>9.1f} "
+                f"{yuzdelik(sirali, 0.50) * 1000:>9.1f} {yuzdelik(sirali, 0.95) * 1000:>9.1f} {hatalar:>6}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firestore endpoint'leri için yük testi")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Sunucu adresi")
+    parser.add_argument("--uid", required=True, help="İsteklerde kullanılacak kullanıcı id'si")
+    parser.add_argument("--eszamanli", default="1,10,40,80,160", help="Virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--sure", type=float, default=10, help="Her seviyenin süresi (sn)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()